@@ -8,8 +8,11 @@ from airport.models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
     Ticket,
-    Order
+    Order,
+    SeatHold,
+    SlowQuery,
 )
 
 admin.site.register(CrewPosition)
@@ -19,5 +22,8 @@ admin.site.register(Route)
 admin.site.register(AirplaneType)
 admin.site.register(Airplane)
 admin.site.register(Flight)
+admin.site.register(FlightSchedule)
 admin.site.register(Ticket)
 admin.site.register(Order)
+admin.site.register(SeatHold)
+admin.site.register(SlowQuery)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class AirportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "airport"
+
+    def ready(self):
+        from airport import signals  # noqa: F401
+        from airport.replicas import check_pin_cache
+
+        checks.register(check_pin_cache, checks.Tags.caches)
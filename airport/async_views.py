@@ -0,0 +1,417 @@
+"""Read-only endpoints written as native async views.
+
+Served from the ASGI application they wait on the database and on slow
+clients without holding a worker thread, which also makes long-polling the
+seat map cheap. They return the same representations as the list and
+retrieve actions of the DRF viewsets and share their filters,
+authentication and throttling.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.views import APIView
+
+from airport.booking import occupied_seats
+from airport.models import Airport, Flight, Route
+from airport.pagination import AirportCursorPagination
+from airport.replicas import read_from, replica_for
+from airport.seat_map import build_seat_bitmap, build_seat_grid, encode_seat_bitmap
+from airport.serializers import FlightDetailSerializer
+from airport.versions import atable_versions
+from airport.views import (
+    filter_airports,
+    filter_flights,
+    filter_routes,
+    with_available_tickets,
+)
+from user.authentication import CachedJWTAuthentication
+
+SEAT_MAP_TABLES = ("airport_ticket", "airport_seathold")
+
+
+def error(detail, status):
+    return JsonResponse({"detail": detail}, status=status)
+
+
+async def authenticate(request):
+    """Resolves the JWT of the request through the cached user flags"""
+
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return AnonymousUser()
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return AnonymousUser()
+
+    token = authentication.get_validated_token(raw_token)
+    return await authentication.aget_user(token)
+
+
+def throttle_wait(request, view=None):
+    """Applies the REST framework throttles, returns seconds to wait or None"""
+
+    waits = []
+    for throttle_class in APIView.throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    if not waits:
+        return None
+    return max((wait for wait in waits if wait is not None), default=None) or 0
+
+
+def async_read_view(view):
+    """Authenticates and throttles a GET-only async view like the viewsets do"""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return error(f'Method "{request.method}" not allowed.', 405)
+        try:
+            request.user = await authenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return error(str(exc.detail), 401)
+        if not request.user.is_authenticated:
+            return error("Authentication credentials were not provided.", 401)
+
+        wait = await sync_to_async(throttle_wait)(request, wrapper)
+        if wait is not None:
+            return error(
+                f"Request was throttled. Expected available in {int(wait)} seconds.",
+                429,
+            )
+
+        read_from(await sync_to_async(replica_for)(request))
+        try:
+            return await view(request, *args, **kwargs)
+        except (ValueError, exceptions.ValidationError):
+            return error("Invalid query parameter.", 400)
+
+    return wrapper
+
+
+def throttle_scope(scope):
+    """Puts an async view under a scoped throttle, like throttle_scope of a
+    DRF view"""
+
+    def decorate(view):
+        view.throttle_scope = scope
+        return view
+
+    return decorate
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps(
+        {
+            "position": [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in values
+            ],
+            "reverse": reverse,
+        }
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """(values of the ordering fields as the types of the fields, reverse)"""
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    values = payload.get("position")
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError("Invalid cursor")
+    try:
+        values = [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValidationError, TypeError):
+        raise ValueError("Invalid cursor")
+    if None in values:
+        raise ValueError("Invalid cursor")
+    return values, bool(payload.get("reverse"))
+
+
+def beyond(ordering, values, lookup):
+    """Rows strictly after (gt) or before (lt) the values in the ordering"""
+
+    if len(ordering) != len(values):
+        raise ValueError("Invalid cursor")
+    condition = Q()
+    for index, field in enumerate(ordering):
+        condition |= Q(
+            **dict(zip(ordering[:index], values[:index])),
+            **{f"{field}__{lookup}": values[index]},
+        )
+    return condition
+
+
+def after(ordering, values):
+    """Rows strictly after the given values in ascending ordering"""
+
+    return beyond(ordering, values, "gt")
+
+
+def before(ordering, values):
+    """Rows strictly before the given values in ascending ordering"""
+
+    return beyond(ordering, values, "lt")
+
+
+def page_url(request, values, reverse=False):
+    query = request.GET.copy()
+    query[AirportCursorPagination.cursor_query_param] = encode_cursor(values, reverse)
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+async def paginate(request, queryset, ordering, represent):
+    """Keyset page of the queryset with the next and previous links and the
+    results of the lists.
+
+    Like the cursor pagination of the viewsets, a page reached through a
+    cursor always links back to the previous one, and paging backwards
+    reads the rows before the cursor in descending order.
+    """
+
+    page_size = AirportCursorPagination.page_size
+    if request.GET.get(AirportCursorPagination.page_size_query_param):
+        page_size = min(
+            max(int(request.GET[AirportCursorPagination.page_size_query_param]), 1),
+            AirportCursorPagination.max_page_size,
+        )
+
+    cursor = request.GET.get(AirportCursorPagination.cursor_query_param)
+    reverse = False
+    if cursor:
+        values, reverse = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(
+            before(ordering, values) if reverse else after(ordering, values)
+        )
+    if reverse:
+        queryset = queryset.order_by(*(f"-{field}" for field in ordering))
+    else:
+        queryset = queryset.order_by(*ordering)
+
+    rows = [row async for row in queryset[: page_size + 1].aiterator()]
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+        has_next, has_previous = bool(cursor), has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    next_url = previous_url = None
+    if rows and has_next:
+        next_url = page_url(request, [rows[-1][field] for field in ordering])
+    if rows and has_previous:
+        previous_url = page_url(
+            request, [rows[0][field] for field in ordering], reverse=True
+        )
+    return JsonResponse(
+        {
+            "next": next_url,
+            "previous": previous_url,
+            "results": [represent(row) for row in rows],
+        }
+    )
+
+
+async def detail(queryset, pk, represent):
+    row = await queryset.filter(pk=pk).afirst()
+    if row is None:
+        return error("Not found.", 404)
+    return JsonResponse(represent(row))
+
+
+def local_time(value):
+    return timezone.localtime(value).strftime("%d-%m-%Y %H:%M")
+
+
+def flight_rows():
+    return with_available_tickets(Flight.objects.all()).values(
+        "id",
+        "departure_time",
+        "arrival_time",
+        "tickets_available",
+        source=F("route__source__name"),
+        destination=F("route__destination__name"),
+        brand=F("airplane__airplane_type__brand"),
+        model=F("airplane__airplane_type__model"),
+    )
+
+
+def represent_flight(row):
+    return {
+        "id": row["id"],
+        "route": f"{row['source']} - {row['destination']}",
+        "airplane": f"{row['brand']} {row['model']}",
+        "departure_time": local_time(row["departure_time"]),
+        "arrival_time": local_time(row["arrival_time"]),
+        "available_tickets": row["tickets_available"],
+    }
+
+
+def airport_rows():
+    return Airport.objects.values("id", "name", "code", "closest_big_city")
+
+
+def route_rows():
+    return Route.objects.values(
+        "id",
+        "distance",
+        source_name=F("source__name"),
+        destination_name=F("destination__name"),
+    )
+
+
+def represent_route(row):
+    return {
+        "id": row["id"],
+        "source": row["source_name"],
+        "destination": row["destination_name"],
+        "distance": f"{row['distance']} miles.",
+    }
+
+
+@throttle_scope("search")
+@async_read_view
+async def flight_list(request):
+    return await paginate(
+        request,
+        filter_flights(flight_rows(), request.GET),
+        ("departure_time", "id"),
+        represent_flight,
+    )
+
+
+@sync_to_async
+def represent_flight_detail(flight):
+    # The nested route and airplane of the retrieve action of FlightViewSet
+    return FlightDetailSerializer(flight).data
+
+
+@throttle_scope("search")
+@async_read_view
+async def flight_detail(request, pk):
+    queryset = with_available_tickets(
+        Flight.objects.select_related("airplane", "route").prefetch_related(
+            "airplane__crew"
+        )
+    )
+    flight = await filter_flights(queryset, request.GET).filter(pk=pk).afirst()
+    if flight is None:
+        return error("Not found.", 404)
+    return JsonResponse(await represent_flight_detail(flight))
+
+
+@async_read_view
+async def airport_list(request):
+    return await paginate(
+        request, filter_airports(airport_rows(), request.GET), ("id",), dict
+    )
+
+
+@async_read_view
+async def airport_detail(request, pk):
+    return await detail(airport_rows(), pk, dict)
+
+
+@async_read_view
+async def route_list(request):
+    return await paginate(
+        request, filter_routes(route_rows(), request.GET), ("id",), represent_route
+    )
+
+
+@async_read_view
+async def route_detail(request, pk):
+    return await detail(route_rows(), pk, represent_route)
+
+
+def poll_timeout(wait):
+    """Seconds to long-poll for ?wait=, clamped to SEAT_MAP_LONG_POLL_TIMEOUT"""
+
+    limit = settings.SEAT_MAP_LONG_POLL_TIMEOUT
+    if wait is None:
+        return limit
+    wait = float(wait)
+    if math.isnan(wait):
+        raise ValueError("Invalid wait")
+    return min(max(wait, 0), limit)
+
+
+async def seat_map_version():
+    versions = await atable_versions(SEAT_MAP_TABLES)
+    return ".".join(str(versions[name]) for name in SEAT_MAP_TABLES)
+
+
+@async_read_view
+async def flight_seats(request, pk):
+    """Seat map of the flight, optionally long-polled for changes.
+
+    With ?since=<version> the response is delayed until the seat map version
+    differs or ?wait=<seconds> (capped by SEAT_MAP_LONG_POLL_TIMEOUT) passes.
+    Holds that expire on their own do not change the version.
+
+    Every waiting request reads the versions once per SEAT_MAP_POLL_INTERVAL,
+    so N waiting clients cost the database about N / interval small queries
+    per second. Raise the interval when that limits how many can wait.
+    """
+
+    flight = await (
+        Flight.objects.filter(pk=pk)
+        .values("id", rows=F("airplane__row"), seats_in_row=F("airplane__seats_in_row"))
+        .afirst()
+    )
+    if flight is None:
+        return error("Not found.", 404)
+
+    version = await seat_map_version()
+    since = request.GET.get("since")
+    if since is not None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + poll_timeout(request.GET.get("wait"))
+        while version == since and loop.time() < deadline:
+            await asyncio.sleep(settings.SEAT_MAP_POLL_INTERVAL)
+            version = await seat_map_version()
+
+    # aiterator() runs values_list() queries in the event loop on Django 4.2,
+    # iterating the queryset fetches the rows in a thread instead
+    occupied = [seat async for seat in occupied_seats(flight["id"])]
+    data = {
+        "flight": flight["id"],
+        "rows": flight["rows"],
+        "seats_in_row": flight["seats_in_row"],
+        "version": version,
+    }
+    if request.GET.get("mode") == "grid":
+        data["seats"] = build_seat_grid(
+            flight["rows"], flight["seats_in_row"], occupied
+        )
+    else:
+        data["encoding"] = "base64"
+        data["bitmap"] = encode_seat_bitmap(
+            build_seat_bitmap(flight["rows"], flight["seats_in_row"], occupied)
+        )
+    return JsonResponse(data)
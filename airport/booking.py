@@ -0,0 +1,414 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from airport.models import Airplane, Flight, SeatHold, Ticket
+from airport.versions import bump_table_version_on_commit
+
+ROW_LOCK = "row"
+ADVISORY_LOCK = "advisory"
+LOCK_STRATEGIES = (ROW_LOCK, ADVISORY_LOCK)
+
+# First key of the two-key pg_advisory_xact_lock, keeps flight locks apart
+# from any other advisory locks taken on the same database
+ADVISORY_LOCK_NAMESPACE = 7301
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Requested seats are not available."
+    default_code = "seat_conflict"
+
+
+def seat_key(ticket_data):
+    return ticket_data["flight"].id, ticket_data["row"], ticket_data["seat"]
+
+
+def load_flights(flight_ids):
+    """Fetches flights with their airplanes in one query, keyed by id"""
+
+    ids = set()
+    for flight_id in flight_ids:
+        try:
+            ids.add(int(flight_id))
+        except (TypeError, ValueError):
+            continue
+    return Flight.objects.select_related("airplane").in_bulk(ids)
+
+
+def find_taken_seats(tickets_data):
+    """Returns requested (flight_id, row, seat) keys that are already booked"""
+
+    requested = {seat_key(ticket_data) for ticket_data in tickets_data}
+    if not requested:
+        return set()
+
+    flight_ids, rows, seats = (set(values) for values in zip(*requested))
+    existing = Ticket.objects.filter(
+        flight_id__in=flight_ids, row__in=rows, seat__in=seats
+    ).values_list("flight_id", "row", "seat")
+    return requested.intersection(existing)
+
+
+def active_holds():
+    return SeatHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def occupied_seats(flight_id):
+    """(row, seat) pairs of the flight that are sold or held right now"""
+
+    return (
+        Ticket.objects.filter(flight_id=flight_id)
+        .order_by()
+        .values_list("row", "seat")
+        .union(
+            active_holds().filter(flight_id=flight_id).order_by().values_list(
+                "row", "seat"
+            ),
+            all=True,
+        )
+    )
+
+
+def find_held_seats(tickets_data, user_id):
+    """Returns requested seat keys held by anyone except the given user"""
+
+    requested = {seat_key(ticket_data) for ticket_data in tickets_data}
+    if not requested:
+        return set()
+
+    flight_ids, rows, seats = (set(values) for values in zip(*requested))
+    held = (
+        active_holds()
+        .exclude(user_id=user_id)
+        .filter(flight_id__in=flight_ids, row__in=rows, seat__in=seats)
+        .values_list("flight_id", "row", "seat")
+    )
+    return requested.intersection(held)
+
+
+def seat_conflicts(keys, detail="This seat is already taken."):
+    return [
+        {"flight": flight_id, "row": row, "seat": seat, "detail": detail}
+        for flight_id, row, seat in sorted(keys)
+    ]
+
+
+def validate_seats(tickets_data):
+    """Rejects requests that ask for the same seat more than once"""
+
+    seen = set()
+    duplicates = set()
+    for ticket_data in tickets_data:
+        key = seat_key(ticket_data)
+        if key in seen:
+            duplicates.add(key)
+        seen.add(key)
+
+    if duplicates:
+        raise ValidationError(
+            seat_conflicts(duplicates, "This seat is requested more than once.")
+        )
+    return tickets_data
+
+
+def lock_flights(flight_ids, strategy=None):
+    """Serializes bookings per flight until the surrounding transaction ends.
+
+    Flights are locked in id order so that orders spanning several flights
+    can not deadlock each other.
+    """
+
+    strategy = strategy or getattr(settings, "BOOKING_LOCK_STRATEGY", ROW_LOCK)
+    if strategy not in LOCK_STRATEGIES:
+        raise ValueError(f"Unknown booking lock strategy: {strategy}")
+
+    flight_ids = sorted(set(flight_ids))
+    if strategy == ADVISORY_LOCK and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for flight_id in flight_ids:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s, %s)",
+                    [ADVISORY_LOCK_NAMESPACE, flight_id],
+                )
+        return
+
+    list(
+        Flight.objects.select_for_update()
+        .filter(id__in=flight_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def count_per_flight(queryset, flight_ids):
+    return dict(
+        queryset.filter(flight_id__in=flight_ids)
+        .order_by()
+        .values("flight_id")
+        .annotate(count=Count("id"))
+        .values_list("flight_id", "count")
+    )
+
+
+def requested_per_flight(tickets_data):
+    requested = {}
+    for ticket_data in tickets_data:
+        flight_id = ticket_data["flight"].id
+        requested[flight_id] = requested.get(flight_id, 0) + 1
+    return requested
+
+
+def flight_full(flight_id):
+    return {"flight": flight_id, "detail": "Flight has not enough free seats."}
+
+
+def check_capacity(tickets_data, user_id):
+    """Rejects requests that do not fit next to sold and held seats"""
+
+    requested = requested_per_flight(tickets_data)
+    held = count_per_flight(active_holds().exclude(user_id=user_id), requested)
+    counters = Flight.objects.filter(id__in=requested).values_list(
+        "id", "capacity", "seats_sold"
+    )
+    full = [
+        flight_full(flight_id)
+        for flight_id, capacity, seats_sold in counters
+        if seats_sold + held.get(flight_id, 0) + requested[flight_id] > capacity
+    ]
+    if full:
+        raise SeatConflict({"tickets": full})
+
+
+def reserve_capacity(tickets_data, user_id):
+    """Adds requested tickets to the flights' sold counters.
+
+    Each counter is raised by a single conditional UPDATE that only matches
+    while the flight still has room next to seats held by other users, so
+    the capacity check and the increment can not be split by another booking.
+    Must run inside the booking transaction, which undoes the increments if
+    the tickets are not inserted.
+    """
+
+    requested = requested_per_flight(tickets_data)
+    held = count_per_flight(active_holds().exclude(user_id=user_id), requested)
+    full = [
+        flight_full(flight_id)
+        for flight_id, count in sorted(requested.items())
+        if not Flight.objects.filter(
+            id=flight_id,
+            seats_sold__lte=F("capacity") - held.get(flight_id, 0) - count,
+        ).update(seats_sold=F("seats_sold") + count)
+    ]
+    if full:
+        raise SeatConflict({"tickets": full})
+
+
+def release_capacity(flight_id, count=1):
+    return Flight.objects.filter(id=flight_id, seats_sold__gte=count).update(
+        seats_sold=F("seats_sold") - count
+    )
+
+
+def with_counted_seats(flights):
+    """Annotates flights with capacity and sold seats counted from scratch"""
+
+    return flights.annotate(
+        counted_capacity=Subquery(
+            Airplane.objects.filter(pk=OuterRef("airplane_id")).values(
+                capacity=F("row") * F("seats_in_row")
+            )
+        ),
+        counted_sold=Coalesce(
+            Subquery(
+                Ticket.objects.filter(flight=OuterRef("pk"))
+                .order_by()
+                .values("flight")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        ),
+    )
+
+
+def find_drifted_flights():
+    """Returns flights whose stored counters disagree with their tickets"""
+
+    return (
+        with_counted_seats(Flight.objects.all())
+        .exclude(capacity=F("counted_capacity"), seats_sold=F("counted_sold"))
+        .order_by("id")
+    )
+
+
+def repair_seat_counters(flight_id, strategy=None):
+    """Recounts the flight's counters while holding its booking lock"""
+
+    with transaction.atomic():
+        lock_flights([flight_id], strategy)
+        return (
+            with_counted_seats(Flight.objects.filter(id=flight_id))
+            .exclude(capacity=F("counted_capacity"), seats_sold=F("counted_sold"))
+            .update(capacity=F("counted_capacity"), seats_sold=F("counted_sold"))
+        )
+
+
+def check_seats_free(tickets_data, user_id):
+    """Raises SeatConflict for seats sold or held by other users"""
+
+    taken = find_taken_seats(tickets_data)
+    if taken:
+        raise SeatConflict({"tickets": seat_conflicts(taken)})
+
+    held = find_held_seats(tickets_data, user_id)
+    if held:
+        raise SeatConflict(
+            {"tickets": seat_conflicts(held, "This seat is held by another customer.")}
+        )
+
+
+def book_tickets(order, tickets_data, strategy=None):
+    """Inserts validated tickets under a per-flight lock.
+
+    Seats held by the order's user are converted into tickets and the
+    user's remaining holds on those flights are released.
+    """
+
+    if not tickets_data:
+        return []
+
+    tickets = [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+    with transaction.atomic():
+        lock_flights((ticket.flight_id for ticket in tickets), strategy)
+
+        check_seats_free(tickets_data, order.user_id)
+        reserve_capacity(tickets_data, order.user_id)
+
+        try:
+            with transaction.atomic():
+                tickets = Ticket.objects.bulk_create(tickets)
+        except IntegrityError:
+            raise SeatConflict(
+                {"tickets": seat_conflicts(find_taken_seats(tickets_data))}
+            )
+
+        bump_table_version_on_commit(Ticket._meta.db_table)
+        delete_holds(
+            SeatHold.objects.filter(
+                user_id=order.user_id,
+                flight_id__in={ticket.flight_id for ticket in tickets},
+            )
+        )
+        return tickets
+
+
+def move_ticket(ticket, ticket_data, strategy=None):
+    """Moves a booked ticket to another seat, possibly on another flight.
+
+    Takes the booking locks of both flights and checks the new seat like a
+    new booking. The row is updated directly, so the seats_sold counters of
+    the flights are moved here rather than by the ticket signals.
+    """
+
+    flight = ticket_data.get("flight", ticket.flight)
+    row = ticket_data.get("row", ticket.row)
+    seat = ticket_data.get("seat", ticket.seat)
+    requested = [{"flight": flight, "row": row, "seat": seat}]
+    user_id = ticket.order.user_id
+
+    with transaction.atomic():
+        lock_flights([ticket.flight_id, flight.id], strategy)
+        if (flight.id, row, seat) == (ticket.flight_id, ticket.row, ticket.seat):
+            return ticket
+
+        check_seats_free(requested, user_id)
+        if flight.id != ticket.flight_id:
+            reserve_capacity(requested, user_id)
+            release_capacity(ticket.flight_id)
+
+        try:
+            with transaction.atomic():
+                Ticket.objects.filter(pk=ticket.pk).update(
+                    flight=flight, row=row, seat=seat
+                )
+        except IntegrityError:
+            raise SeatConflict({"tickets": seat_conflicts([seat_key(requested[0])])})
+
+        bump_table_version_on_commit(Ticket._meta.db_table)
+        ticket.flight, ticket.row, ticket.seat = flight, row, seat
+        return ticket
+
+
+def seat_hold_ttl():
+    return getattr(settings, "SEAT_HOLD_TTL", timedelta(minutes=10))
+
+
+def hold_seats(user, flight, seats, strategy=None):
+    """Replaces the user's holds on the flight with holds on the given seats.
+
+    Expired holds of the flight are dropped on the way. Returns expiry time.
+    """
+
+    tickets_data = validate_seats(
+        [{"flight": flight, "row": row, "seat": seat} for row, seat in seats]
+    )
+    now = timezone.now()
+    expires_at = now + seat_hold_ttl()
+
+    with transaction.atomic():
+        lock_flights([flight.id], strategy)
+        SeatHold.objects.filter(flight=flight).filter(
+            Q(expires_at__lte=now) | Q(user=user)
+        ).delete()
+
+        check_seats_free(tickets_data, user.id)
+        check_capacity(tickets_data, user.id)
+
+        holds = [
+            SeatHold(
+                flight=flight,
+                user=user,
+                row=ticket_data["row"],
+                seat=ticket_data["seat"],
+                expires_at=expires_at,
+            )
+            for ticket_data in tickets_data
+        ]
+        try:
+            with transaction.atomic():
+                SeatHold.objects.bulk_create(holds)
+        except IntegrityError:
+            raise SeatConflict(
+                {
+                    "tickets": seat_conflicts(
+                        find_held_seats(tickets_data, user.id),
+                        "This seat is held by another customer.",
+                    )
+                }
+            )
+        bump_table_version_on_commit(SeatHold._meta.db_table)
+    return expires_at
+
+
+def delete_holds(holds):
+    """Deletes the holds, bumping their table version only if any existed"""
+
+    deleted = holds.delete()[0]
+    if deleted:
+        bump_table_version_on_commit(SeatHold._meta.db_table)
+    return deleted
+
+
+def release_holds(user, flight):
+    return delete_holds(SeatHold.objects.filter(user=user, flight=flight))
+
+
+def purge_expired_holds():
+    return delete_holds(SeatHold.objects.filter(expires_at__lte=timezone.now()))
@@ -0,0 +1,112 @@
+"""Conditional GET support for the read actions of viewsets.
+
+Validators come from the shared TableVersion counters of the tables a
+response is built from, so a request is answered with 304 Not Modified
+after a single small query, before the response body is built. Views can
+leave tables that change all the time out of the ETag and put what they
+return of them into it instead, see get_etag_tables.
+"""
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport.versions import table_state
+
+SAFE_CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+class NotModified(Exception):
+    pass
+
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class ConditionalGetMixin:
+    """Adds ETag and Last-Modified to read actions and answers 304.
+
+    version_tables lists the tables the response depends on. Responses of
+    user_scoped views differ per user, so the user is part of their ETag.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    version_tables = ()
+    user_scoped = False
+
+    def get_validators(self, request):
+        versions, last_modified = table_state(self.version_tables)
+        parts = [
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+            getattr(request, "accepted_media_type", ""),
+            ",".join(
+                f"{name}:{versions[name]}" for name in sorted(self.get_etag_tables())
+            ),
+        ]
+        if self.user_scoped:
+            parts.append(str(request.user.pk))
+        extra_parts, extra_modified = self.get_extra_validators(request)
+        parts.extend(extra_parts)
+        if extra_modified and (last_modified is None or extra_modified > last_modified):
+            last_modified = extra_modified
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return f'W/"{digest}"', last_modified
+
+    def get_etag_tables(self):
+        """Tables whose versions are part of the ETag, all version_tables by
+        default. The others only move Last-Modified."""
+
+        return self.version_tables
+
+    def get_extra_validators(self, request):
+        """ETag parts and a Last-Modified candidate besides the table versions"""
+
+        return [], None
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or strip_weak(etag) in map(strip_weak, etags)
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+        )
+        return bool(
+            if_modified_since
+            and last_modified
+            and int(last_modified.timestamp()) <= if_modified_since
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        if (
+            request.method in SAFE_CONDITIONAL_METHODS
+            and self.action in self.conditional_actions
+            and self.version_tables
+        ):
+            self.conditional_validators = self.get_validators(request)
+            if self.is_not_modified(request, *self.conditional_validators):
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "conditional_validators", None)
+        if validators and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
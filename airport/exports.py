@@ -0,0 +1,94 @@
+"""Streaming NDJSON and CSV dumps of whole tables.
+
+Rows are fetched with queryset.iterator(), which uses a server-side cursor on
+PostgreSQL, and encoded one at a time into a StreamingHttpResponse, so a
+worker holds one chunk of rows in memory however large the table is.
+"""
+
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders a list as one JSON document per line, anything else as one line"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        items = data if isinstance(data, list) else [data]
+        return "".join(
+            json.dumps(item, cls=DjangoJSONEncoder) + "\n" for item in items
+        ).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Renders a dict or a list of dicts with a header row"""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        items = data if isinstance(data, list) else [data]
+        if not items:
+            return b""
+        buffer = Echo()
+        writer = csv.writer(buffer)
+        lines = [writer.writerow(items[0].keys())]
+        lines += [writer.writerow(item.values()) for item in items]
+        return "".join(lines).encode()
+
+
+EXPORT_RENDERERS = (NDJSONRenderer, CSVRenderer)
+
+
+class Echo:
+    """File-like object handing each written CSV line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if hasattr(value, "isoformat") else value for value in row
+        )
+
+
+def export_response(request, queryset, columns, name):
+    """Streams the queryset in the negotiated format.
+
+    columns is a sequence of (output name, values_list() lookup) pairs.
+    """
+
+    rows = queryset.values_list(*(lookup for _, lookup in columns)).iterator(
+        chunk_size=chunk_size()
+    )
+    renderer = request.accepted_renderer
+    lines = csv_lines if renderer.format == "csv" else ndjson_lines
+    response = StreamingHttpResponse(
+        lines([column for column, _ in columns], rows),
+        content_type=f"{renderer.media_type}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{name}.{renderer.format}"'
+    return response
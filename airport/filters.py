@@ -0,0 +1,66 @@
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest, Upper
+from rest_framework.filters import BaseFilterBackend
+
+
+class TrigramSearchFilter(BaseFilterBackend):
+    """Filters by ?search= over the view's search_fields.
+
+    On PostgreSQL rows are matched with the pg_trgm similarity operator and
+    ranked by similarity. Both go through the UPPER(column) trigram indexes.
+    Other databases fall back to unranked icontains matching.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, "").strip()
+        search_fields = getattr(view, "search_fields", ())
+        if not term or not search_fields:
+            return queryset
+
+        if connection.vendor != "postgresql":
+            return queryset.filter(
+                reduce(
+                    or_, (Q(**{f"{field}__icontains": term}) for field in search_fields)
+                )
+            )
+
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        term = term.upper()
+        aliases = {
+            f"search_{index}": Upper(field) for index, field in enumerate(search_fields)
+        }
+        similarities = [TrigramSimilarity(alias, term) for alias in aliases]
+        similarity = (
+            similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        )
+        return (
+            queryset.alias(**aliases)
+            .filter(
+                reduce(
+                    or_, (Q(**{f"{alias}__trigram_similar": term}) for alias in aliases)
+                )
+            )
+            .annotate(search_similarity=similarity)
+            .order_by("-search_similarity", "pk")
+        )
+
+    def get_schema_operation_parameters(self, view):
+        if not getattr(view, "search_fields", ()):
+            return []
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Fuzzy search ranked by similarity "
+                "(ex. ?search=Borispil)",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -0,0 +1,205 @@
+"""Connecting flight search over an in-memory index of the flight schedule.
+
+Departures are loaded one local day at a time with a single query and kept
+per process, grouped by source airport and sorted by departure time. Saving
+or deleting flights, routes or airports drops only the affected days, and
+every cached day also expires after ITINERARY_CACHE_TTL seconds so workers
+that did not see the change catch up. Expired and past days are dropped
+together with their flights whenever a day is loaded.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, time as day_start, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from airport.models import Airport, Flight
+
+
+@dataclass(frozen=True)
+class Leg:
+    flight_id: int
+    source_id: int
+    destination_id: int
+    departure_time: datetime
+    arrival_time: datetime
+
+
+class FlightGraph:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}
+        self._flight_days = {}
+        self._airports = None
+
+    @staticmethod
+    def ttl():
+        return getattr(settings, "ITINERARY_CACHE_TTL", 60)
+
+    def airports(self):
+        """Returns (code -> id, id -> code) maps of all airports"""
+
+        airports = self._airports
+        if airports is None or airports[2] < time.monotonic():
+            codes = dict(Airport.objects.values_list("code", "id"))
+            airports = (
+                codes,
+                {airport_id: code for code, airport_id in codes.items()},
+                time.monotonic() + self.ttl(),
+            )
+            self._airports = airports
+        return airports[0], airports[1]
+
+    def departures(self, day):
+        """Returns {source_id: (departure_times, legs)} for the local day"""
+
+        cached = self._days.get(day)
+        if cached is not None and cached[1] >= time.monotonic():
+            return cached[0]
+
+        start = timezone.make_aware(
+            datetime.combine(day, day_start.min), timezone.get_current_timezone()
+        )
+        rows = (
+            Flight.objects.filter(
+                departure_time__gte=start,
+                departure_time__lt=start + timedelta(days=1),
+            )
+            .order_by("departure_time", "id")
+            .values_list(
+                "id",
+                "route__source_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+            )
+        )
+
+        by_source = {}
+        for row in rows:
+            leg = Leg(*row)
+            times, legs = by_source.setdefault(leg.source_id, ([], []))
+            times.append(leg.departure_time)
+            legs.append(leg)
+
+        with self._lock:
+            now = time.monotonic()
+            today = timezone.localdate()
+            for cached_day, (_, expires_at) in list(self._days.items()):
+                if expires_at < now or cached_day < today:
+                    self._drop_day(cached_day)
+            self._days[day] = (by_source, now + self.ttl())
+            for times, legs in by_source.values():
+                for leg in legs:
+                    self._flight_days[leg.flight_id] = day
+        return by_source
+
+    def departures_after(self, airport_id, earliest, latest):
+        """Yields legs leaving the airport between earliest and latest"""
+
+        day = timezone.localdate(earliest)
+        last_day = timezone.localdate(latest)
+        while day <= last_day:
+            times, legs = self.departures(day).get(airport_id, ((), ()))
+            for index in range(bisect_left(times, earliest), len(times)):
+                if times[index] > latest:
+                    return
+                yield legs[index]
+            day += timedelta(days=1)
+
+    def invalidate_flight(self, flight_id, departure_time=None):
+        with self._lock:
+            days = {self._flight_days.pop(flight_id, None)}
+            if isinstance(departure_time, datetime):
+                if timezone.is_naive(departure_time):
+                    departure_time = timezone.make_aware(departure_time)
+                days.add(timezone.localdate(departure_time))
+            for day in days:
+                self._drop_day(day)
+
+    def _drop_day(self, day):
+        """Forgets a cached day and its flights, the caller holds the lock"""
+
+        cached = self._days.pop(day, None)
+        if cached is None:
+            return
+        for times, legs in cached[0].values():
+            for leg in legs:
+                if self._flight_days.get(leg.flight_id) == day:
+                    del self._flight_days[leg.flight_id]
+
+    def invalidate_airports(self):
+        self._airports = None
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._flight_days.clear()
+            self._airports = None
+
+
+flight_graph = FlightGraph()
+
+
+def find_itineraries(
+    source_id,
+    destination_id,
+    day,
+    min_connection=timedelta(minutes=45),
+    max_connection=timedelta(hours=24),
+    max_legs=3,
+    limit=5,
+    graph=flight_graph,
+):
+    """Returns up to `limit` itineraries ordered by arrival time.
+
+    Best-first search over the time-expanded graph, where a state is an
+    arrival at an airport. The first leg departs on the given local day,
+    every next one at least min_connection and at most max_connection after
+    the previous arrival. Each (airport, legs) pair is expanded at most
+    `limit` times, which bounds the search like k-shortest-path Dijkstra.
+    """
+
+    results = []
+    expansions = {}
+    queue = []
+    counter = 0
+
+    start = timezone.make_aware(
+        datetime.combine(day, day_start.min), timezone.get_current_timezone()
+    )
+    for leg in graph.departures_after(
+        source_id, start, start + timedelta(days=1) - timedelta(microseconds=1)
+    ):
+        heapq.heappush(queue, (leg.arrival_time, counter, (leg,)))
+        counter += 1
+
+    while queue and len(results) < limit:
+        arrival_time, _, path = heapq.heappop(queue)
+        airport_id = path[-1].destination_id
+
+        if airport_id == destination_id:
+            results.append(path)
+            continue
+        if len(path) >= max_legs:
+            continue
+
+        state = (airport_id, len(path))
+        expansions[state] = expansions.get(state, 0) + 1
+        if expansions[state] > limit:
+            continue
+
+        visited = {leg.source_id for leg in path}
+        for leg in graph.departures_after(
+            airport_id, arrival_time + min_connection, arrival_time + max_connection
+        ):
+            if leg.destination_id in visited:
+                continue
+            heapq.heappush(queue, (leg.arrival_time, counter, path + (leg,)))
+            counter += 1
+
+    return results
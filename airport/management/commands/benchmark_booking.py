@@ -0,0 +1,101 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from airport.booking import LOCK_STRATEGIES, SeatConflict, book_tickets
+from airport.models import Flight, Order, Ticket
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Books random seats of a flight from concurrent threads with each "
+        "booking lock strategy and checks that no seat is sold twice"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flight", type=int, help="Id of the flight to book")
+        parser.add_argument("--bookings", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument(
+            "--strategy", choices=LOCK_STRATEGIES, action="append", dest="strategies"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.ERROR(
+                    "Concurrent booking needs a database with row level locking"
+                )
+            )
+            return
+        user = get_user_model().objects.order_by("id").first()
+        flight = (
+            Flight.objects.select_related("airplane")
+            .filter(pk=options["flight"])
+            .first()
+        )
+        if user is None or flight is None:
+            self.stdout.write(
+                self.style.ERROR("Create a user and the flight to book tickets")
+            )
+            return
+
+        for strategy in options["strategies"] or LOCK_STRATEGIES:
+            self.run(strategy, flight, user, options["bookings"], options["threads"])
+
+    def book_random_seat(self, strategy, flight, user):
+        ticket_data = {
+            "flight": flight,
+            "row": random.randint(1, flight.airplane.row),
+            "seat": random.randint(1, flight.airplane.seats_in_row),
+        }
+        started = time.perf_counter()
+        order = None
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(user=user)
+                book_tickets(order, [ticket_data], strategy)
+        except SeatConflict:
+            order = None
+        finally:
+            connection.close()
+        return order, time.perf_counter() - started
+
+    def run(self, strategy, flight, user, bookings, threads):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(
+                executor.map(
+                    lambda _: self.book_random_seat(strategy, flight, user),
+                    range(bookings),
+                )
+            )
+        elapsed = time.perf_counter() - started
+
+        orders = [order.id for order, _ in results if order is not None]
+        tickets = Ticket.objects.filter(flight=flight)
+        sold_twice = tickets.count() - tickets.values("row", "seat").distinct().count()
+        latencies = [latency for _, latency in results]
+        self.stdout.write(
+            f"{strategy} lock: {bookings / elapsed:.0f} bookings/s, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+            f"{len(orders)} booked, {bookings - len(orders)} conflicts"
+        )
+        if sold_twice or tickets.count() > flight.capacity:
+            self.stdout.write(
+                self.style.ERROR(f"Oversold, {sold_twice} seats sold twice")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("No seat oversold"))
+
+        # The bookings are committed by their threads, delete them again
+        Order.objects.filter(id__in=orders).delete()
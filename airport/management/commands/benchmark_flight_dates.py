@@ -0,0 +1,130 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport.models import Airplane, Flight, Route
+from airport.views import local_day_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares flight date filters that cast the column with plain "
+        "timestamp ranges on a generated flight table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=2_000_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        routes = list(Route.objects.values_list("id", flat=True))
+        airplane = Airplane.objects.order_by("id").first()
+        if not routes or airplane is None:
+            self.stdout.write(
+                self.style.ERROR("Create a route and an airplane to generate flights")
+            )
+            return
+
+        with transaction.atomic():
+            start = local_day_start(timezone.localdate())
+            self.generate_flights(
+                routes,
+                airplane,
+                start,
+                options["days"],
+                options["flights"],
+                options["batch_size"],
+            )
+
+            day = (start + timedelta(days=options["days"] // 2)).date()
+            next_day = day + timedelta(days=1)
+            route = random.choice(routes)
+            cases = (
+                (
+                    "departure date, __date cast",
+                    Flight.objects.filter(
+                        departure_time__date__gte=day, departure_time__date__lt=next_day
+                    ),
+                ),
+                (
+                    "departure date, timestamp range",
+                    Flight.objects.filter(
+                        departure_time__gte=local_day_start(day),
+                        departure_time__lt=local_day_start(next_day),
+                    ),
+                ),
+                (
+                    "route and departure date, __date cast",
+                    Flight.objects.filter(
+                        route_id=route,
+                        departure_time__date__gte=day,
+                        departure_time__date__lt=next_day,
+                    ),
+                ),
+                (
+                    "route and departure date, timestamp range",
+                    Flight.objects.filter(
+                        route_id=route,
+                        departure_time__gte=local_day_start(day),
+                        departure_time__lt=local_day_start(next_day),
+                    ),
+                ),
+            )
+            for title, queryset in cases:
+                self.report(title, queryset.values_list("id", flat=True), options)
+
+            transaction.set_rollback(True)
+
+    def generate_flights(self, routes, airplane, start, days, count, batch_size):
+        started = time.perf_counter()
+        span = days * 24 * 60
+        for offset in range(0, count, batch_size):
+            flights = []
+            for _ in range(min(batch_size, count - offset)):
+                departure_time = start + timedelta(minutes=random.randrange(span))
+                flights.append(
+                    Flight(
+                        route_id=random.choice(routes),
+                        airplane=airplane,
+                        departure_time=departure_time,
+                        arrival_time=departure_time + timedelta(hours=3),
+                        capacity=airplane.capacity,
+                    )
+                )
+            Flight.objects.bulk_create(flights)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE airport_flight")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Generated {count} flights in {elapsed:.1f}s (rolled back at the end)"
+        )
+
+    def report(self, title, queryset, options):
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            rows = len(list(queryset.all()))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        if connection.vendor == "postgresql":
+            plan = queryset.explain(analyze=True, buffers=True)
+        else:
+            plan = queryset.explain()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(plan)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{rows} rows, median {statistics.median(timings):.2f} ms, "
+                f"max {max(timings):.2f} ms over {len(timings)} runs"
+            )
+        )
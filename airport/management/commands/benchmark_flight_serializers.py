@@ -0,0 +1,91 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from airport.models import Airplane, Flight, Route
+from airport.serializers import FlatFlightSerializer, FlightSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serializes the same in-memory flights with FlightSerializer and "
+        "FlatFlightSerializer and reports the time per row"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        routes = list(Route.objects.all())
+        airplanes = list(Airplane.objects.all())
+        if not routes or not airplanes:
+            self.stdout.write(
+                self.style.ERROR("Create a route and an airplane to build flights")
+            )
+            return
+
+        start = timezone.now().replace(second=0, microsecond=0)
+        flights = []
+        rows = []
+        for index in range(options["rows"]):
+            route = random.choice(routes)
+            airplane = random.choice(airplanes)
+            departure_time = start + timedelta(minutes=15 * index)
+            flight = Flight(
+                id=index + 1,
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=3),
+            )
+            flight.tickets_available = random.randrange(airplane.capacity + 1)
+            flights.append(flight)
+            rows.append(
+                {
+                    "id": flight.id,
+                    "route_id": route.id,
+                    "airplane__airplane_type_id": airplane.airplane_type_id,
+                    "departure_time": flight.departure_time,
+                    "arrival_time": flight.arrival_time,
+                    "tickets_available": flight.tickets_available,
+                }
+            )
+
+        serializer_data = FlightSerializer(flights, many=True).data
+        flat_data = FlatFlightSerializer(rows).data
+        renderer = JSONRenderer()
+        if renderer.render(serializer_data) != renderer.render(flat_data):
+            self.stdout.write(self.style.ERROR("Outputs differ"))
+            return
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-identical"))
+
+        serializer_time = self.best_time(
+            lambda: FlightSerializer(flights, many=True).data, options["repeat"]
+        )
+        flat_time = self.best_time(
+            lambda: FlatFlightSerializer(rows).data, options["repeat"]
+        )
+        count = options["rows"]
+        self.stdout.write(
+            f"FlightSerializer:     {serializer_time / count * 1_000_000:.2f} us/row"
+        )
+        self.stdout.write(
+            f"FlatFlightSerializer: {flat_time / count * 1_000_000:.2f} us/row"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {serializer_time / flat_time:.1f}x")
+        )
+
+    @staticmethod
+    def best_time(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,75 @@
+import time
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from airport.models import Order
+from airport.order_numbers import (
+    format_order_number,
+    next_sequence_value,
+    permute,
+    permutation_key,
+)
+
+
+class Command(BaseCommand):
+    help = "Allocates order numbers in bulk and checks that none of them repeat"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000)
+        parser.add_argument(
+            "--insert",
+            action="store_true",
+            help="Also insert the orders (rolled back at the end)",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        key = permutation_key()
+        start = next_sequence_value()
+
+        started = time.perf_counter()
+        values = array("q", (permute(start + index, key) for index in range(count)))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Allocated {count} order numbers in {elapsed:.2f}s "
+            f"({elapsed / count * 1_000_000:.2f} us each)"
+        )
+
+        ordered = sorted(values)
+        collisions = sum(
+            1 for previous, current in zip(ordered, ordered[1:]) if previous == current
+        )
+        if collisions:
+            self.stdout.write(self.style.ERROR(f"{collisions} collisions"))
+            return
+        self.stdout.write(self.style.SUCCESS("No collisions"))
+
+        if options["insert"]:
+            self.insert_orders(values, options["batch_size"])
+
+    def insert_orders(self, values, batch_size):
+        user = get_user_model().objects.order_by("id").first()
+        if user is None:
+            self.stdout.write(self.style.ERROR("Create a user to insert orders"))
+            return
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            for offset in range(0, len(values), batch_size):
+                Order.objects.bulk_create(
+                    Order(user=user, order_number=format_order_number(value))
+                    for value in values[offset:offset + batch_size]
+                )
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {len(values)} orders in {elapsed:.2f}s "
+                f"({len(values) / elapsed:.0f} orders/s), rolled back"
+            )
+        )
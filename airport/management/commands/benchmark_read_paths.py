@@ -0,0 +1,152 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+HOST = "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares throughput of the synchronous flight list served by WSGI "
+        "worker threads with the async flight list served by the ASGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Clients in flight at once"
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="WSGI worker threads"
+        )
+        parser.add_argument(
+            "--slow-client-ms",
+            type=float,
+            default=50,
+            help="Time each client takes to read its response",
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_active=True).order_by("id").first()
+        if user is None:
+            self.stdout.write(self.style.ERROR("Create a user to authenticate with"))
+            return
+        token = f"Bearer {AccessToken.for_user(user)}"
+        query = f"page_size={options['page_size']}"
+
+        # Throttling would reject most of the benchmark requests
+        with mock.patch.object(APIView, "throttle_classes", ()):
+            self.report(
+                "WSGI, sync DRF view",
+                self.run_wsgi(reverse("airport:flight-list"), query, token, options),
+                options,
+            )
+            self.report(
+                "ASGI, async view",
+                asyncio.run(
+                    self.run_asgi(
+                        reverse("airport:async-flight-list"), query, token, options
+                    )
+                ),
+                options,
+            )
+
+    def run_wsgi(self, path, query, token, options):
+        handler = WSGIHandler()
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=path,
+            QUERY_STRING=query,
+            HTTP_HOST=HOST,
+            HTTP_AUTHORIZATION=token,
+        )
+        slow_client = options["slow_client_ms"] / 1000
+
+        def call(submitted):
+            statuses = []
+            body = handler(
+                dict(environ), lambda status, headers: statuses.append(status)
+            )
+            b"".join(body)
+            body.close()
+            # The worker thread stays busy until the client has read everything
+            time.sleep(slow_client)
+            return statuses[0].startswith("200"), time.perf_counter() - submitted
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            results = list(
+                executor.map(
+                    lambda _: call(time.perf_counter()), range(options["requests"])
+                )
+            )
+            executor.submit(connections.close_all).result()
+        return results, time.perf_counter() - started
+
+    async def run_asgi(self, path, query, token, options):
+        handler = ASGIHandler()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": query.encode(),
+            "server": (HOST, 80),
+            "client": ("127.0.0.1", 0),
+            "headers": [
+                (b"host", HOST.encode()),
+                (b"authorization", token.encode()),
+            ],
+        }
+        slow_client = options["slow_client_ms"] / 1000
+        limit = asyncio.Semaphore(options["concurrency"])
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def call():
+            async with limit:
+                submitted = time.perf_counter()
+                statuses = []
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        statuses.append(message["status"])
+                    elif not message.get("more_body"):
+                        # Only this request waits for its slow client
+                        await asyncio.sleep(slow_client)
+
+                await handler(dict(scope), receive, send)
+                return statuses[0] == 200, time.perf_counter() - submitted
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call() for _ in range(options["requests"])))
+        return results, time.perf_counter() - started
+
+    def report(self, title, run, options):
+        results, elapsed = run
+        latencies = sorted(latency * 1000 for _, latency in results)
+        failed = sum(1 for ok, _ in results if not ok)
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f"{len(results)} requests in {elapsed:.2f}s, "
+            f"{len(results) / elapsed:.0f} req/s, "
+            f"p50 {statistics.median(latencies):.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms"
+        )
+        if failed:
+            self.stdout.write(self.style.ERROR(f"{failed} requests failed"))
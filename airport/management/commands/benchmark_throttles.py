@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.throttling import UserRateThrottle
+
+from airport.throttling import BucketLimiter, UserBucketThrottle
+
+
+class FakeUser:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class Command(BaseCommand):
+    help = (
+        "Times throttle decisions of the REST framework UserRateThrottle "
+        "and the token bucket throttle against the configured store"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20_000)
+        parser.add_argument("--clients", type=int, default=100)
+        parser.add_argument("--rate", default="1000000/min")
+        parser.add_argument(
+            "--store",
+            default=None,
+            help="Store class path, THROTTLE_STORE by default",
+        )
+
+    def handle(self, *args, **options):
+        rates = {"user": options["rate"]}
+        factory = RequestFactory()
+        requests = []
+        for index in range(options["requests"]):
+            request = Request(factory.get("/"))
+            request._user = FakeUser(index % options["clients"])
+            requests.append(request)
+
+        store = import_string(options["store"]) if options["store"] else None
+        limiter = BucketLimiter(store() if store else None)
+        self.stdout.write(f"Store: {type(limiter.store).__name__}")
+
+        class DrfThrottle(UserRateThrottle):
+            THROTTLE_RATES = rates
+
+        class BucketThrottle(UserBucketThrottle):
+            THROTTLE_RATES = rates
+
+        BucketThrottle.limiter = limiter
+
+        for name, throttle_class in (
+            ("UserRateThrottle", DrfThrottle),
+            ("UserBucketThrottle", BucketThrottle),
+        ):
+            elapsed, allowed = self.run(throttle_class, requests)
+            self.stdout.write(
+                f"{name + ':':20} {elapsed / len(requests) * 1_000_000:.2f} "
+                f"us/decision, {allowed} allowed"
+            )
+
+    @staticmethod
+    def run(throttle_class, requests):
+        allowed = 0
+        started = time.perf_counter()
+        for request in requests:
+            allowed += throttle_class().allow_request(request, None)
+        return time.perf_counter() - started, allowed
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = "Generates the OpenAPI schema into the file served by /api/schema/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", help="Write to this path instead of OPENAPI_SCHEMA_FILE"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path, schema = write_schema(options["output"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(schema.get('paths', {}))} paths to {path} "
+                f"in {elapsed * 1000:.0f} ms"
+            )
+        )
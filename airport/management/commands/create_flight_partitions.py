@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from airport.partitions import (
+    FLIGHT_TABLE,
+    add_months,
+    create_flight_partitions,
+    is_partitioned,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of the flight table for the coming "
+        "months and moves their flights out of the default partition. Run it "
+        "at least monthly, flights beyond the created months are stored in "
+        "the default partition, which every open-ended query scans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=getattr(settings, "FLIGHT_PARTITION_MONTHS_AHEAD", 3),
+            help="Months after the current one to create partitions for",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection, FLIGHT_TABLE):
+            self.stdout.write(
+                f"{FLIGHT_TABLE} is not partitioned, "
+                "partitions are only used on PostgreSQL"
+            )
+            return
+
+        this_month = month_start(timezone.now())
+        with connection.schema_editor() as schema_editor:
+            created = create_flight_partitions(
+                schema_editor, this_month, add_months(this_month, options["months"])
+            )
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(created)} flight partitions created")
+        )
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.schedule_import import ImportRowError, ScheduleImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports airports, routes and flights from CSV or JSONL files in "
+        "batches. Airports are referenced by code, flights by source and "
+        "destination airport codes and airplane id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", help="Columns: code, name, closest_big_city")
+        parser.add_argument("--routes", help="Columns: source, destination, distance")
+        parser.add_argument(
+            "--flights",
+            help="Columns: source, destination, airplane, departure_time, "
+            "arrival_time (ISO 8601, local time when without offset)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Write flights with COPY on PostgreSQL",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Report invalid rows and go on instead of stopping",
+        )
+
+    def handle(self, *args, **options):
+        if not any(options[name] for name in ("airports", "routes", "flights")):
+            raise CommandError("Pass at least one of --airports, --routes, --flights")
+
+        importer = ScheduleImporter(
+            batch_size=options["batch_size"],
+            use_copy=options["copy"],
+            skip_invalid=options["skip_invalid"],
+            log=lambda message: self.stderr.write(message),
+        )
+        steps = (
+            ("airports", importer.import_airports),
+            ("routes", importer.import_routes),
+            ("flights", importer.import_flights),
+        )
+        for name, run in steps:
+            path = options[name]
+            if not path:
+                continue
+            started = time.perf_counter()
+            try:
+                created, skipped = run(path)
+            except (ImportRowError, OSError, ValueError) as error:
+                raise CommandError(str(error))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name.capitalize()}: {created} created, {skipped} already "
+                    f"existed, {elapsed:.1f}s ({created / max(elapsed, 1e-9):.0f}/s)"
+                )
+            )
+
+        if importer.skipped_invalid:
+            self.stdout.write(
+                self.style.WARNING(f"{importer.skipped_invalid} invalid rows skipped")
+            )
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from airport.models import FlightSchedule
+from airport.schedules import materialize_schedule
+
+
+def date_argument(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date "{value}"')
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the flights of recurring schedules. Flights that already "
+        "have sold tickets are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schedule",
+            type=int,
+            action="append",
+            help="Schedule id, may be repeated (all schedules by default)",
+        )
+        parser.add_argument(
+            "--start", help="First date to regenerate, YYYY-MM-DD (default today)"
+        )
+        parser.add_argument("--end", help="Last date to regenerate, YYYY-MM-DD")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            start = date_argument(options["start"]) if options["start"] else None
+            end = date_argument(options["end"]) if options["end"] else None
+        except ValueError as error:
+            raise CommandError(str(error))
+        start = start or timezone.localdate()
+
+        schedules = FlightSchedule.objects.select_related("airplane").order_by("id")
+        if options["schedule"]:
+            schedules = schedules.filter(id__in=options["schedule"])
+
+        for schedule in schedules:
+            started = time.perf_counter()
+            result = materialize_schedule(
+                schedule, start, end, batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                f"Schedule {schedule.id}: {result.created} created, "
+                f"{result.updated} updated, {result.deleted} deleted, "
+                f"{result.kept} kept with tickets "
+                f"({time.perf_counter() - started:.2f}s)"
+            )
+        self.stdout.write(self.style.SUCCESS("Schedules materialized"))
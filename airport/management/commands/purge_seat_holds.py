@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from airport.booking import purge_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Deletes expired seat holds"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired seat holds"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from airport.booking import find_drifted_flights, repair_seat_counters
+
+
+class Command(BaseCommand):
+    help = "Compares flight seat counters with booked tickets and repairs drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite drifted counters instead of only reporting them",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            find_drifted_flights().values_list(
+                "id", "capacity", "counted_capacity", "seats_sold", "counted_sold"
+            )
+        )
+        for flight_id, capacity, counted_capacity, sold, counted_sold in drifted:
+            self.stdout.write(
+                f"Flight {flight_id}: capacity {capacity} (expected "
+                f"{counted_capacity}), seats sold {sold} (expected {counted_sold})"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All seat counters match"))
+            return
+        if not options["fix"]:
+            self.stdout.write(
+                self.style.WARNING(f"{len(drifted)} flights drifted, run with --fix")
+            )
+            return
+
+        repaired = sum(repair_seat_counters(flight_id) for flight_id, *_ in drifted)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} flights"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from airport.models import SlowQuery
+from airport.slow_queries import flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the slowest queries recorded with SLOW_QUERY_LOG by total time, "
+        "with the route that ran them and their last EXPLAIN plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--no-plans", action="store_true", help="Leave out the EXPLAIN plans"
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the log after the report"
+        )
+
+    def handle(self, *args, **options):
+        flush()
+        queries = SlowQuery.objects.all()[: options["limit"]]
+        if not queries:
+            self.stdout.write("No slow queries recorded")
+        for query in queries:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{query.total_time:.1f} ms in {query.calls} calls "
+                    f"(max {query.max_time:.1f} ms) from {query.view}"
+                )
+            )
+            self.stdout.write(query.sql)
+            if query.plan and not options["no_plans"]:
+                self.stdout.write(query.plan)
+            self.stdout.write("")
+        if options["clear"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"{deleted} slow queries cleared"))
@@ -0,0 +1,103 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Imports the entry point and the URLconf the way a worker does before and
+# on its first request, then prints both durations in seconds
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import {module}
+loaded = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(loaded - started, time.perf_counter() - loaded)
+"""
+
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Traces imports of a fresh worker process and reports where its "
+        "startup time goes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="airport_api.wsgi")
+        parser.add_argument("--limit", type=int, default=15)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Keep the fastest of several runs to reduce noise",
+        )
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            help="Fail when startup takes longer, for use in CI",
+        )
+
+    def handle(self, *args, **options):
+        runs = [self.trace(options["module"]) for _ in range(options["repeat"])]
+        setup, urlconf, imports = min(runs, key=lambda run: run[0] + run[1])
+        total_ms = (setup + urlconf) * 1000
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{options['module']} startup"))
+        self.stdout.write(f"Import and setup: {setup * 1000:.0f} ms")
+        self.stdout.write(f"URLconf on first request: {urlconf * 1000:.0f} ms")
+        self.stdout.write(f"Total: {total_ms:.0f} ms")
+
+        packages = {}
+        for name, self_us, _ in imports:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_us
+        self.stdout.write(self.style.MIGRATE_HEADING("Import time by package"))
+        for package, self_us in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[: options["limit"]]:
+            self.stdout.write(f"{self_us / 1000:8.1f} ms  {package}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Slowest modules (self time)"))
+        for name, self_us, cumulative_us in sorted(
+            imports, key=lambda item: item[1], reverse=True
+        )[: options["limit"]]:
+            self.stdout.write(
+                f"{self_us / 1000:8.1f} ms  {name} "
+                f"(with imports {cumulative_us / 1000:.1f} ms)"
+            )
+
+        budget = options["budget_ms"]
+        if budget is not None and total_ms > budget:
+            raise CommandError(
+                f"Startup took {total_ms:.0f} ms, over the {budget:.0f} ms budget"
+            )
+
+    @staticmethod
+    def trace(module):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                STARTUP_SCRIPT.format(module=module),
+            ],
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {module} failed:\n{result.stderr}")
+
+        imports = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME.match(line)
+            if match:
+                self_us, cumulative_us, _, name = match.groups()
+                imports.append((name, int(self_us), int(cumulative_us)))
+        setup, urlconf = (float(value) for value in result.stdout.split()[-2:])
+        return setup, urlconf, imports
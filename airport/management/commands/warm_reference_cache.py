@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.reference_cache import reference_cache
+
+
+class Command(BaseCommand):
+    help = "Loads reference tables into the process cache and reports their size"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        sizes = reference_cache.warm()
+        elapsed = time.perf_counter() - started
+
+        for model, size in sizes.items():
+            self.stdout.write(f"{model._meta.db_table}: {size} rows")
+        self.stdout.write(
+            self.style.SUCCESS(f"Reference cache warmed in {elapsed * 1000:.1f} ms")
+        )
@@ -0,0 +1,382 @@
+"""Per-route request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and files it under its route name
+(for example "airport:flight-list"): request counts per status code, a
+latency histogram, ORM query counts and the time spent in the database
+("db"), in the view outside the database ("view": filtering, permissions
+and mostly serialization) and in rendering the response ("render").
+/metrics is only served to staff users and METRICS_TOKEN bearers unless
+METRICS_PUBLIC is on.
+
+Recording takes no locks: every thread adds to its own shard of plain
+dicts and only reading the metrics walks all shards. With METRICS_DIR set,
+each process writes its totals to METRICS_DIR/<pid>.json at most every
+METRICS_FLUSH_INTERVAL seconds, and /metrics adds up the files of all
+workers. Files of stopped workers are kept, so their counts stay in the
+totals; clear the directory when deploying.
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework.exceptions import AuthenticationFailed
+
+from user.authentication import CachedJWTAuthentication
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNMATCHED_ROUTE = "unmatched"
+
+current_request = contextvars.ContextVar("metrics_request", default=None)
+
+
+class RequestStats:
+    __slots__ = (
+        "request",
+        "started",
+        "queries",
+        "db_time",
+        "view_started",
+        "view_ended",
+        "db_before_view",
+        "db_in_view",
+        "render_ended",
+    )
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_started = None
+        self.view_ended = None
+        self.db_before_view = 0.0
+        self.db_in_view = 0.0
+        self.render_ended = None
+
+    def start_view(self):
+        self.view_started = time.perf_counter()
+        self.db_before_view = self.db_time
+
+    def end_view(self):
+        if self.view_ended is None and self.view_started is not None:
+            self.view_ended = time.perf_counter()
+            self.db_in_view = self.db_time - self.db_before_view
+
+    def end_render(self, response):
+        self.render_ended = time.perf_counter()
+
+    def phases(self):
+        self.end_view()
+        view = render = 0.0
+        if self.view_ended is not None:
+            view = max(self.view_ended - self.view_started - self.db_in_view, 0)
+            if self.render_ended is not None:
+                render = self.render_ended - self.view_ended
+        return {"db": self.db_time, "view": view, "render": render}
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper counting the queries of the current request"""
+
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+class Shard:
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.latency = {}
+        self.queries = defaultdict(int)
+        self.phases = defaultdict(float)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, route, method, status, duration, stats):
+        shard = self.shard()
+        shard.requests[route, method, status] += 1
+
+        latency = shard.latency.get((route, method))
+        if latency is None:
+            # Count per bucket, then the total count and the sum
+            latency = [0] * len(LATENCY_BUCKETS) + [0, 0.0]
+            shard.latency[route, method] = latency
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                latency[index] += 1
+                break
+        latency[-2] += 1
+        latency[-1] += duration
+
+        shard.queries[route] += stats.queries
+        for phase, seconds in stats.phases().items():
+            shard.phases[route, phase] += seconds
+
+        self.maybe_flush()
+
+    def snapshot(self):
+        """Totals of this process as JSON-friendly lists of labels + value"""
+
+        requests = defaultdict(int)
+        latency = {}
+        queries = defaultdict(int)
+        phases = defaultdict(float)
+        for shard in list(self._shards):
+            for key, count in list(shard.requests.items()):
+                requests[key] += count
+            for key, values in list(shard.latency.items()):
+                total = latency.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+            for key, count in list(shard.queries.items()):
+                queries[key] += count
+            for key, seconds in list(shard.phases.items()):
+                phases[key] += seconds
+        return {
+            "requests": [[*key, value] for key, value in requests.items()],
+            "latency": [[*key, value] for key, value in latency.items()],
+            "queries": [[key, value] for key, value in queries.items()],
+            "phases": [[*key, value] for key, value in phases.items()],
+        }
+
+    @staticmethod
+    def directory():
+        path = getattr(settings, "METRICS_DIR", None)
+        return Path(path) if path else None
+
+    def maybe_flush(self):
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        if self.directory() and time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def flush(self):
+        """Writes the totals of this process to METRICS_DIR/<pid>.json"""
+
+        directory = self.directory()
+        if directory is None:
+            return
+        self._flushed_at = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(self.snapshot(), file)
+        os.replace(file.name, directory / f"{os.getpid()}.json")
+
+    def collect(self):
+        """Snapshots of all processes writing to METRICS_DIR, or of this one"""
+
+        directory = self.directory()
+        if directory is None:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in sorted(directory.glob("*.json")):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def clear(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.__init__()
+
+
+registry = MetricsRegistry()
+
+
+def label_string(**labels):
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_metrics(snapshots):
+    requests = defaultdict(int)
+    latency = {}
+    queries = defaultdict(int)
+    phases = defaultdict(float)
+    for snapshot in snapshots:
+        for route, method, status, count in snapshot["requests"]:
+            requests[route, method, status] += count
+        for route, method, values in snapshot["latency"]:
+            total = latency.setdefault((route, method), [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        for route, count in snapshot["queries"]:
+            queries[route] += count
+        for route, phase, seconds in snapshot["phases"]:
+            phases[route, phase] += seconds
+
+    lines = [
+        "# HELP http_requests_total Requests by route, method and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method, status), count in sorted(requests.items()):
+        labels = label_string(route=route, method=method, status=status)
+        lines.append(f"http_requests_total{labels} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency by route and method.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (route, method), values in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            cumulative += count
+            labels = label_string(route=route, method=method, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = label_string(route=route, method=method, le="+Inf")
+        lines.append(f"http_request_duration_seconds_bucket{labels} {values[-2]}")
+        labels = label_string(route=route, method=method)
+        lines.append(f"http_request_duration_seconds_count{labels} {values[-2]}")
+        lines.append(f"http_request_duration_seconds_sum{labels} {values[-1]}")
+
+    lines += [
+        "# HELP http_request_db_queries_total ORM queries run by route.",
+        "# TYPE http_request_db_queries_total counter",
+    ]
+    for route, count in sorted(queries.items()):
+        lines.append(
+            f"http_request_db_queries_total{label_string(route=route)} {count}"
+        )
+
+    lines += [
+        "# HELP http_request_phase_seconds_total Time by route in the database, "
+        "the rest of the view and rendering.",
+        "# TYPE http_request_phase_seconds_total counter",
+    ]
+    for (route, phase), seconds in sorted(phases.items()):
+        labels = label_string(route=route, phase=phase)
+        lines.append(f"http_request_phase_seconds_total{labels} {seconds}")
+    return "\n".join(lines) + "\n"
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.view_name:
+        return UNMATCHED_ROUTE
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """Records the metrics of every request, put it first in MIDDLEWARE"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats(request)
+        token = current_request.set(stats)
+        request._metrics = stats
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats(request)
+        token = current_request.set(stats)
+        request._metrics = stats
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics.start_view()
+
+    def process_template_response(self, request, response):
+        stats = request._metrics
+        stats.end_view()
+        response.add_post_render_callback(stats.end_render)
+        return response
+
+    @staticmethod
+    def record(request, response, stats):
+        registry.record(
+            route_name(request),
+            request.method,
+            str(response.status_code),
+            time.perf_counter() - stats.started,
+            stats,
+        )
+
+
+def may_scrape(request):
+    """Staff users, METRICS_TOKEN bearers, or anyone with METRICS_PUBLIC"""
+
+    if getattr(settings, "METRICS_PUBLIC", False):
+        return True
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return True
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        # The API authenticates with JWT access tokens rather than sessions
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        if authenticated is None:
+            return False
+        user = authenticated[0]
+    return user.is_staff
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, closed to the public by default"""
+
+    if not may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# UPPER(column::text) matches the expression Django generates for icontains
+# and for the Upper() based similarity search on PostgreSQL
+TRIGRAM_INDEXES = (
+    ("airport_airport", "name"),
+    ("airport_airport", "code"),
+    ("airport_airport", "closest_big_city"),
+    ("airport_crew", "first_name"),
+    ("airport_crew", "last_name"),
+    ("airport_crewposition", "position"),
+    ("airport_airplanetype", "brand"),
+    ("airport_airplanetype", "model"),
+)
+
+
+def index_name(table, column):
+    return f"{table}_{column}_trgm"
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(table, column)} "
+            f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(table, column)}"
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("airport", "0011_order_number_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:49
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seat_counters(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Airplane = apps.get_model("airport", "Airplane")
+    Ticket = apps.get_model("airport", "Ticket")
+
+    Flight.objects.update(
+        capacity=Subquery(
+            Airplane.objects.filter(pk=OuterRef("airplane_id")).values(
+                capacity=F("row") * F("seats_in_row")
+            )
+        ),
+        seats_sold=Coalesce(
+            Subquery(
+                Ticket.objects.filter(flight_id=OuterRef("pk"))
+                .order_by()
+                .values("flight_id")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0014_tableversion_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="capacity",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_seat_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+FLIGHT_INDEXES = (
+    models.Index(fields=["route", "departure_time"], name="flight_route_departure_idx"),
+    models.Index(fields=["departure_time"], name="flight_departure_idx"),
+    models.Index(fields=["arrival_time"], name="flight_arrival_idx"),
+)
+
+
+def create_flight_indexes(apps, schema_editor):
+    # The flight table is large and written to by bookings, so PostgreSQL
+    # builds the indexes without blocking writes
+    Flight = apps.get_model("airport", "Flight")
+    for index in FLIGHT_INDEXES:
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.add_index(Flight, index, concurrently=True)
+        else:
+            schema_editor.add_index(Flight, index)
+
+
+def drop_flight_indexes(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    for index in FLIGHT_INDEXES:
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.remove_index(Flight, index, concurrently=True)
+        else:
+            schema_editor.remove_index(Flight, index)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("airport", "0015_flight_seats_sold"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="flight", index=index)
+                for index in FLIGHT_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(create_flight_indexes, drop_flight_indexes),
+            ],
+        ),
+    ]
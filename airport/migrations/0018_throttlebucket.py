@@ -0,0 +1,33 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0017_flightschedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                ("tokens", models.FloatField()),
+                (
+                    "updated_at",
+                    models.FloatField(help_text="Unix time of the last refill"),
+                ),
+            ],
+        ),
+    ]
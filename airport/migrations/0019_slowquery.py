@@ -0,0 +1,49 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0018_throttlebucket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40, unique=True)),
+                (
+                    "sql",
+                    models.TextField(help_text="Statement with literals replaced by ?"),
+                ),
+                (
+                    "view",
+                    models.CharField(
+                        help_text="Route of the last call", max_length=255
+                    ),
+                ),
+                ("calls", models.PositiveIntegerField(default=0)),
+                ("total_time", models.FloatField(default=0, help_text="Milliseconds")),
+                ("max_time", models.FloatField(default=0, help_text="Milliseconds")),
+                ("plan", models.TextField(blank=True)),
+                ("first_seen", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_seen", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "ordering": ["-total_time"],
+            },
+        ),
+    ]
@@ -0,0 +1,211 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:39
+
+import datetime
+
+from django.conf import settings
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Declarative partitioning is PostgreSQL only, other databases keep plain
+# tables. The statements are spelled out, with the names Django gave the
+# indexes and constraints, so later changes to the app do not change them.
+# Foreign keys can only reference a unique key of a partitioned table, and
+# the one of airport_flight has to include departure_time, so the foreign
+# keys to flights lose their database constraint on every database first.
+
+TICKET_PARTITIONS = 16
+
+FLIGHT_INDEXES = (
+    'CREATE INDEX "airport_flight_airplane_id_33640e2f" '
+    'ON "airport_flight" ("airplane_id")',
+    'CREATE INDEX "airport_flight_route_id_843e2a13" ON "airport_flight" ("route_id")',
+    'CREATE INDEX "airport_flight_schedule_id_dfc099a9" '
+    'ON "airport_flight" ("schedule_id")',
+    'CREATE INDEX "flight_route_departure_idx" '
+    'ON "airport_flight" ("route_id", "departure_time")',
+    'CREATE INDEX "flight_departure_idx" ON "airport_flight" ("departure_time")',
+    'CREATE INDEX "flight_arrival_idx" ON "airport_flight" ("arrival_time")',
+    'ALTER TABLE "airport_flight" '
+    'ADD CONSTRAINT "airport_flight_airplane_id_33640e2f_fk_airport_airplane_id" '
+    'FOREIGN KEY ("airplane_id") REFERENCES "airport_airplane" ("id") '
+    "DEFERRABLE INITIALLY DEFERRED",
+    'ALTER TABLE "airport_flight" '
+    'ADD CONSTRAINT "airport_flight_route_id_843e2a13_fk_airport_route_id" '
+    'FOREIGN KEY ("route_id") REFERENCES "airport_route" ("id") '
+    "DEFERRABLE INITIALLY DEFERRED",
+    'ALTER TABLE "airport_flight" '
+    'ADD CONSTRAINT "airport_flight_schedule_id_dfc099a9_fk_airport_f" '
+    'FOREIGN KEY ("schedule_id") REFERENCES "airport_flightschedule" ("id") '
+    "DEFERRABLE INITIALLY DEFERRED",
+)
+
+TICKET_INDEXES = (
+    'ALTER TABLE "airport_ticket" '
+    'ADD CONSTRAINT "airport_ticket_flight_id_row_seat_b3357985_uniq" '
+    'UNIQUE ("flight_id", "row", "seat")',
+    'CREATE INDEX "airport_ticket_flight_id_4206f7bf" '
+    'ON "airport_ticket" ("flight_id")',
+    'CREATE INDEX "airport_ticket_order_id_4057332b" ON "airport_ticket" ("order_id")',
+    'ALTER TABLE "airport_ticket" '
+    'ADD CONSTRAINT "airport_ticket_order_id_4057332b_fk_order_id" '
+    'FOREIGN KEY ("order_id") REFERENCES "order" ("id") '
+    "DEFERRABLE INITIALLY DEFERRED",
+)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def utc_midnight(day):
+    return datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc)
+
+
+def create_flight_partitions(schema_editor, source):
+    """Monthly partitions from the first flight to the months ahead, and the
+    default partition for flights outside them"""
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("departure_time") FROM "{source}"')
+        (first_departure,) = cursor.fetchone()
+    this_month = month_start(timezone.now())
+    month = this_month
+    if first_departure is not None:
+        month = min(month_start(first_departure), this_month)
+    last_month = add_months(
+        this_month, getattr(settings, "FLIGHT_PARTITION_MONTHS_AHEAD", 3)
+    )
+
+    schema_editor.execute(
+        'CREATE TABLE "airport_flight_default" PARTITION OF "airport_flight" DEFAULT'
+    )
+    while month <= last_month:
+        schema_editor.execute(
+            f'CREATE TABLE "airport_flight_y{month.year}m{month.month:02d}" '
+            'PARTITION OF "airport_flight" FOR VALUES FROM (%s) TO (%s)',
+            [
+                utc_midnight(month).isoformat(),
+                utc_midnight(add_months(month, 1)).isoformat(),
+            ],
+        )
+        month = add_months(month, 1)
+
+
+def create_ticket_partitions(schema_editor, source):
+    for remainder in range(TICKET_PARTITIONS):
+        schema_editor.execute(
+            f'CREATE TABLE "airport_ticket_p{remainder}" PARTITION OF "airport_ticket" '
+            f"FOR VALUES WITH (MODULUS {TICKET_PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def rebuild(schema_editor, table, primary_key, statements, partition_by=None):
+    """Copies the table into a new one, partitioned if partition_by, a pair
+    of the PARTITION BY clause and a function creating the partitions, is
+    given. statements recreate the indexes and constraints.
+
+    Partitioned tables can not have identity columns before PostgreSQL 17,
+    so their ids come from a sequence owned by the column. Plain tables get
+    an identity column back.
+    """
+
+    source = f"{table}_rebuilt_from"
+    sequence = f"{table}_id_seq"
+    schema_editor.execute(f'ALTER TABLE "{table}" RENAME TO "{source}"')
+    if partition_by is None:
+        schema_editor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{source}" INCLUDING CONSTRAINTS)'
+        )
+    else:
+        method, create_partitions = partition_by
+        schema_editor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{source}" INCLUDING CONSTRAINTS) '
+            f"PARTITION BY {method}"
+        )
+        create_partitions(schema_editor, source)
+    schema_editor.execute(f'INSERT INTO "{table}" SELECT * FROM "{source}"')
+    schema_editor.execute(f'DROP TABLE "{source}"')
+
+    if partition_by is None:
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN "id" '
+            "ADD GENERATED BY DEFAULT AS IDENTITY"
+        )
+    else:
+        schema_editor.execute(f'CREATE SEQUENCE "{sequence}"')
+        schema_editor.execute(f'ALTER SEQUENCE "{sequence}" OWNED BY "{table}"."id"')
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN "id" '
+            f"SET DEFAULT nextval('\"{sequence}\"')"
+        )
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), MAX(\"id\")) "
+        f'FROM "{table}"'
+    )
+    columns = ", ".join(f'"{column}"' for column in primary_key)
+    schema_editor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY ({columns})')
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    rebuild(
+        schema_editor,
+        "airport_flight",
+        ("id", "departure_time"),
+        FLIGHT_INDEXES,
+        partition_by=('RANGE ("departure_time")', create_flight_partitions),
+    )
+    rebuild(
+        schema_editor,
+        "airport_ticket",
+        ("id", "flight_id"),
+        TICKET_INDEXES,
+        partition_by=('HASH ("flight_id")', create_ticket_partitions),
+    )
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    rebuild(schema_editor, "airport_ticket", ("id",), TICKET_INDEXES)
+    rebuild(schema_editor, "airport_flight", ("id",), FLIGHT_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0019_slowquery"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticket",
+            name="flight",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tickets",
+                to="airport.flight",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="seathold",
+            name="flight",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="holds",
+                to="airport.flight",
+            ),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -1,10 +1,8 @@
-import random
-import string
-
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from airport.order_numbers import allocate_order_number
 from user.models import User
 
 
@@ -75,16 +73,71 @@ class Airplane(models.Model):
         return self.name
 
 
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class FlightSchedule(models.Model):
+    """Recurring departures of a route, expanded into flights by airport.schedules"""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="schedules"
+    )
+    weekdays = models.PositiveSmallIntegerField(
+        help_text="Bit mask of departure days, Monday is the lowest bit"
+    )
+    departure_time = models.TimeField(help_text="Local departure time")
+    duration = models.DurationField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    @property
+    def days(self):
+        return [day for day in range(len(WEEKDAYS)) if self.weekdays & (1 << day)]
+
+    def __str__(self):
+        days = "/".join(WEEKDAYS[day].capitalize() for day in self.days)
+        return (
+            f"{self.route} every {days} at {self.departure_time:%H:%M} "
+            f"from {self.start_date} to {self.end_date}"
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flight")
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
     departure_time = models.DateTimeField(null=False, blank=False)
     arrival_time = models.DateTimeField(null=False, blank=False)
+    capacity = models.PositiveIntegerField(default=0)
+    seats_sold = models.PositiveIntegerField(default=0)
 
     @property
     def available_tickets(self):
+        if hasattr(self, "tickets_available"):
+            return self.tickets_available
         booked_tickets_count = self.tickets.count()
-        return self.airplane.capacity - booked_tickets_count
+        held_seats_count = self.holds.filter(expires_at__gt=timezone.now()).count()
+        return self.airplane.capacity - booked_tickets_count - held_seats_count
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"], name="flight_route_departure_idx"
+            ),
+            models.Index(fields=["departure_time"], name="flight_departure_idx"),
+            models.Index(fields=["arrival_time"], name="flight_arrival_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.capacity = self.airplane.capacity
+        super().save(*args, **kwargs)
 
     def __str__(self):
         departure_time_formatted = timezone.localtime(self.departure_time).strftime(
@@ -109,27 +162,86 @@ class Order(models.Model):
         db_table = "order"
 
     def generate_order_number(self):
-        """Generates random order number from 3 letters upper case and 5 digits"""
+        """Generates unique order number from 3 letters upper case and 5 digits"""
 
-        letters = string.ascii_uppercase
-        digits = string.digits[0:10]
-        random_letters = "".join(random.choices(letters, k=3))
-        random_digits = "".join(random.choices(digits, k=5))
-        return f"{random_letters}{random_digits}"
+        return allocate_order_number()
 
     def save(self, *args, **kwargs):
-        if not self.pk:
+        if self.pk:
+            return super().save(*args, **kwargs)
+
+        # Allocated numbers never repeat, but may hit one of the random
+        # numbers given to orders before the allocator existed
+        while True:
             self.order_number = self.generate_order_number()
-        super().save(*args, **kwargs)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not Order.objects.filter(order_number=self.order_number).exists():
+                    raise
 
     def __str__(self):
         return f"Order No. {self.order_number} created at {self.created_at}"
 
 
+class TableVersion(models.Model):
+    """Counter bumped on every change of a table, shared by all processes"""
+
+    name = models.CharField(max_length=63, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ThrottleBucket(models.Model):
+    """Token bucket of a throttled client, see airport.throttling"""
+
+    key = models.CharField(max_length=255, unique=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField(help_text="Unix time of the last refill")
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f} tokens"
+
+
+class SlowQuery(models.Model):
+    """Queries slower than SLOW_QUERY_THRESHOLD_MS, one row per fingerprint"""
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField(help_text="Statement with literals replaced by ?")
+    view = models.CharField(max_length=255, help_text="Route of the last call")
+    calls = models.PositiveIntegerField(default=0)
+    total_time = models.FloatField(default=0, help_text="Milliseconds")
+    max_time = models.FloatField(default=0, help_text="Milliseconds")
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-total_time"]
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.calls} x {self.sql[:80]}"
+
+
+class OrderNumberSequence(models.Model):
+    """Order number counter for databases without native sequences"""
+
+    value = models.BigIntegerField(default=0)
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
-    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="tickets")
+    # No database constraint: PostgreSQL can not reference the partitioned
+    # airport_flight by id alone. Django still cascades deletes.
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="tickets", db_constraint=False
+    )
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tickets")
 
     @staticmethod
@@ -172,3 +284,23 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("flight", "row", "seat")
         ordering = ["row", "seat"]
+
+
+class SeatHold(models.Model):
+    """Seat reserved for a user while the order is being completed"""
+
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    # No database constraint, like Ticket.flight
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="holds", db_constraint=False
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="seat_holds")
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Hold row: {self.row} seat: {self.seat} until {self.expires_at}"
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["row", "seat"]
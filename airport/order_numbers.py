@@ -0,0 +1,90 @@
+"""Order number allocation.
+
+Order numbers look like ``AAA99999``. Each number is a keyed permutation of
+the next value of a database sequence, so numbers never repeat and do not
+reveal how many orders exist, without looking up or retrying on the table.
+"""
+import hashlib
+import string
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+LETTERS = string.ascii_uppercase
+LETTERS_SPACE = len(LETTERS) ** 3
+DIGITS_SPACE = 10**5
+ORDER_NUMBER_SPACE = LETTERS_SPACE * DIGITS_SPACE
+FEISTEL_ROUNDS = 6
+
+SEQUENCE_NAME = "airport_order_number_seq"
+
+
+class OrderNumbersExhausted(Exception):
+    pass
+
+
+def permutation_key():
+    # Changing the key after launch would let new numbers collide with old ones
+    key = getattr(settings, "ORDER_NUMBER_KEY", "airport-order-number")
+    return hashlib.blake2b(key.encode(), digest_size=32).digest()
+
+
+def round_value(key, round_number, value):
+    digest = hashlib.blake2b(
+        f"{round_number}:{value}".encode(), key=key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+def permute(index, key=None):
+    """Maps 0 <= index < ORDER_NUMBER_SPACE onto the same range one-to-one.
+
+    Unbalanced Feistel network over the letters and digits halves: every
+    round adds a keyed hash of one half to the other, which is reversible,
+    so distinct indexes always give distinct results.
+    """
+
+    if not 0 <= index < ORDER_NUMBER_SPACE:
+        raise OrderNumbersExhausted(f"No order number for index {index}")
+
+    key = key or permutation_key()
+    letters, digits = divmod(index, DIGITS_SPACE)
+    for round_number in range(FEISTEL_ROUNDS):
+        if round_number % 2:
+            digits = (digits + round_value(key, round_number, letters)) % DIGITS_SPACE
+        else:
+            letters = (
+                letters + round_value(key, round_number, digits)
+            ) % LETTERS_SPACE
+    return letters * DIGITS_SPACE + digits
+
+
+def format_order_number(value):
+    letters, digits = divmod(value, DIGITS_SPACE)
+    prefix = ""
+    for _ in range(3):
+        letters, letter = divmod(letters, len(LETTERS))
+        prefix = LETTERS[letter] + prefix
+    return f"{prefix}{digits:05d}"
+
+
+def next_sequence_value():
+    """Returns next value of the order number sequence, starting from 1"""
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [SEQUENCE_NAME])
+            return cursor.fetchone()[0]
+
+    from airport.models import OrderNumberSequence
+
+    with transaction.atomic():
+        sequence = OrderNumberSequence.objects.filter(pk=1)
+        if not sequence.update(value=F("value") + 1):
+            OrderNumberSequence.objects.create(pk=1, value=1)
+        return sequence.values_list("value", flat=True).get()
+
+
+def allocate_order_number():
+    return format_order_number(permute(next_sequence_value() - 1))
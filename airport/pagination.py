@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AirportCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class FlightCursorPagination(AirportCursorPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderCursorPagination(AirportCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class TicketCursorPagination(AirportCursorPagination):
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,114 @@
+"""PostgreSQL partitioning of the flight and ticket tables.
+
+Migration 0020 turns airport_flight into a table partitioned by the month
+of departure_time, and airport_ticket into one hash partitioned by
+flight_id so that all tickets of a flight, and their seat constraint, live
+in one partition. Queries bounded by departure time, like the date filter
+of the flight list, then only scan the months they cover.
+
+PostgreSQL wants the partition key in every unique constraint, so the
+primary keys become (id, departure_time) and (id, flight_id) while ids
+keep coming from one sequence. A foreign key can not reference flights by
+id alone any more, so Ticket.flight and SeatHold.flight have no database
+constraint, on any database; Django still cascades deletes. Other
+databases keep plain tables.
+
+Lookups by id alone can not be pruned: getting a flight by id, as the
+detail views and the joins from tickets and holds do, probes the primary
+key index of every monthly partition, so it slows down as months pile up,
+and a ticket by id probes all 16 hash partitions. Filter by
+departure_time or flight_id as well where they are known.
+
+Flights outside the created months go to a default partition, the
+create_flight_partitions command adds months ahead of time and moves
+their flights out of it. The partitions are first created by migration
+0020, which spells out its own statements and has to stay in step with
+the names used here.
+"""
+
+import datetime
+
+FLIGHT_TABLE = "airport_flight"
+FLIGHT_DEFAULT_PARTITION = f"{FLIGHT_TABLE}_default"
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """UTC range of departure times stored in the partition of the month"""
+
+    start = datetime.datetime(month.year, month.month, 1, tzinfo=datetime.timezone.utc)
+    end = add_months(month, 1)
+    return start, datetime.datetime(
+        end.year, end.month, 1, tzinfo=datetime.timezone.utc
+    )
+
+
+def flight_partition_name(month):
+    return f"{FLIGHT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_names(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.oid = to_regclass(%s)",
+            [table],
+        )
+        return {name for (name,) in cursor.fetchall()}
+
+
+def create_flight_partition(schema_editor, month):
+    """Adds the partition of a month, with its flights from the default one"""
+
+    name = schema_editor.quote_name(flight_partition_name(month))
+    table = schema_editor.quote_name(FLIGHT_TABLE)
+    default = schema_editor.quote_name(FLIGHT_DEFAULT_PARTITION)
+    start, end = month_bounds(month)
+
+    # ATTACH refuses a range the default partition still has rows for
+    schema_editor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING CONSTRAINTS)")
+    schema_editor.execute(
+        f"WITH moved AS (DELETE FROM {default} "
+        f"WHERE departure_time >= %s AND departure_time < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [start, end],
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [start.isoformat(), end.isoformat()],
+    )
+
+
+def create_flight_partitions(schema_editor, first_month, last_month):
+    """Creates the missing partitions from first_month to last_month"""
+
+    existing = partition_names(schema_editor.connection, FLIGHT_TABLE)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if flight_partition_name(month) not in existing:
+            create_flight_partition(schema_editor, month)
+            created.append(flight_partition_name(month))
+        month = add_months(month, 1)
+    return created
@@ -0,0 +1,138 @@
+"""Process-local cache of rarely changing reference tables.
+
+Each table is kept as an id -> row map of named tuples. Saving or deleting a
+row drops the table in the current process right away, and its shared
+TableVersion is bumped when the transaction commits. Other processes compare
+table versions at most once every REFERENCE_CACHE_CHECK_INTERVAL seconds and
+reload the tables that changed.
+Queryset.update() and bulk_create() do not send signals, so code using them
+on these tables has to call invalidate() itself.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import Http404
+
+from airport.models import Airport, AirplaneType, CrewPosition, Route
+from airport.versions import bump_table_version_on_commit, table_versions
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_FIELDS = {
+    Airport: ("id", "name", "code", "closest_big_city"),
+    AirplaneType: ("id", "brand", "model", "default_row", "default_seats_in_row"),
+    CrewPosition: ("id", "position"),
+    Route: ("id", "source_id", "destination_id", "distance"),
+}
+
+
+class ReferenceCache:
+    def __init__(self, fields=None):
+        self.fields = fields or REFERENCE_FIELDS
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._versions = {}
+        self._checked_at = 0.0
+
+    @staticmethod
+    def table_name(model):
+        return model._meta.db_table
+
+    @staticmethod
+    def check_interval():
+        return getattr(settings, "REFERENCE_CACHE_CHECK_INTERVAL", 1.0)
+
+    def _check_versions(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval():
+            return
+        self._checked_at = now
+
+        versions = table_versions([self.table_name(model) for model in self.fields])
+        with self._lock:
+            for model in self.fields:
+                name = self.table_name(model)
+                if self._versions.get(name) != versions[name]:
+                    self._tables.pop(model, None)
+            self._versions = versions
+
+    def _load(self, model):
+        name = self.table_name(model)
+        version = table_versions([name])[name]
+        rows = model.objects.order_by().values_list(*self.fields[model], named=True)
+        table = {row.id: row for row in rows}
+        with self._lock:
+            self._tables[model] = table
+            self._versions[name] = version
+        return table
+
+    def table(self, model):
+        """Returns id -> row map of the whole table"""
+
+        self._check_versions()
+        table = self._tables.get(model)
+        if table is None:
+            table = self._load(model)
+        return table
+
+    def get(self, model, pk):
+        """Returns the row with the given id, Http404 when there is none.
+
+        A miss fetches only that row, it is usually one just created by a
+        bulk insert that did not send signals.
+        """
+
+        table = self.table(model)
+        row = table.get(pk)
+        if row is None:
+            row = (
+                model.objects.filter(pk=pk)
+                .values_list(*self.fields[model], named=True)
+                .first()
+            )
+            if row is None:
+                raise Http404(f"No {model._meta.object_name} matches the given query.")
+            with self._lock:
+                table[pk] = row
+        return row
+
+    def drop(self, model):
+        """Forgets the table in this process only"""
+
+        with self._lock:
+            self._tables.pop(model, None)
+
+    def invalidate(self, model):
+        """Forgets the table here and in other processes after commit"""
+
+        self.drop(model)
+        bump_table_version_on_commit(self.table_name(model))
+
+    def warm(self):
+        """Loads every table, returns {model: number of rows}"""
+
+        self._checked_at = time.monotonic()
+        return {model: len(self._load(model)) for model in self.fields}
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._versions.clear()
+            self._checked_at = 0.0
+
+
+reference_cache = ReferenceCache()
+
+
+def warm_on_start():
+    """Warms the cache of a starting worker when REFERENCE_CACHE_WARM_ON_START"""
+
+    if not getattr(settings, "REFERENCE_CACHE_WARM_ON_START", False):
+        return
+    try:
+        reference_cache.warm()
+    except DatabaseError:
+        logger.warning("Reference cache was not warmed, database is unavailable")
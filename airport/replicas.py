@@ -0,0 +1,238 @@
+"""Routing of safe reads to read replicas.
+
+ReplicaRouter sends every write, and every read by default, to the primary
+database. The list and retrieve actions of viewsets with ReplicaReadMixin,
+and the async read views, choose a replica from DATABASE_REPLICAS for the
+rest of the request, which the router then uses for reads outside
+transactions and until the request writes something.
+
+Replicas lag behind the primary, so a user who just changed something is
+pinned to the primary for REPLICA_PIN_SECONDS after the write: the
+ReplicaRoutingMiddleware notices requests that wrote and records the user
+in the default cache. The next request of the user may reach any worker,
+so with replicas configured the cache has to be a shared one (REDIS_URL),
+and check_pin_cache() fails manage.py check on a per-process cache. A
+replica whose connection fails is left out for REPLICA_RETRY_SECONDS by
+the worker that saw it fail and the reads go to the primary meanwhile.
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = DEFAULT_DB_ALIAS
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Bookkeeping rows written while serving reads, they do not pin the user
+UNTRACKED_WRITES = ("airport.throttlebucket", "airport.slowquery")
+
+# Cache backends every process keeps to itself
+LOCAL_CACHES = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+class RoutingState:
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+current_routing = contextvars.ContextVar("db_routing", default=None)
+
+
+def replica_aliases():
+    """DATABASE_REPLICAS, or every database but the primary when unset"""
+
+    aliases = getattr(settings, "DATABASE_REPLICAS", None)
+    if aliases is None:
+        aliases = [alias for alias in settings.DATABASES if alias != PRIMARY]
+    return list(aliases)
+
+
+def pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    if user is not None and user.is_authenticated:
+        cache.set(pin_key(user.pk), True, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(pin_key(user.pk)) is not None
+
+
+def check_pin_cache(app_configs, **kwargs):
+    """Replicas need the pins in a cache every worker sees"""
+
+    if not replica_aliases():
+        return []
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND")
+    if backend not in LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            "Read replicas are configured but the default cache is local to "
+            "each process, so users are not kept on the primary after writes.",
+            hint="Set REDIS_URL, or configure another shared default cache.",
+            obj=backend,
+            id="airport.E001",
+        )
+    ]
+
+
+class ReplicaPool:
+    """Round robin over the replicas this worker last found reachable"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._down_until = {}
+
+    def choose(self):
+        aliases = replica_aliases()
+        if not aliases:
+            return None
+        start = next(self._counter)
+        for offset in range(len(aliases)):
+            alias = aliases[(start + offset) % len(aliases)]
+            if self.is_available(alias):
+                return alias
+        return None
+
+    def is_available(self, alias):
+        with self._lock:
+            if self._down_until.get(alias, 0) > time.monotonic():
+                return False
+        try:
+            # A no-op for an open connection, CONN_HEALTH_CHECKS has checked
+            # it at the start of the request
+            connections[alias].ensure_connection()
+        except DatabaseError as error:
+            self.mark_down(alias)
+            logger.warning("Replica %s is unavailable: %s", alias, error)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        retry = getattr(settings, "REPLICA_RETRY_SECONDS", 30)
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + retry
+
+    def clear(self):
+        with self._lock:
+            self._down_until.clear()
+
+
+replicas = ReplicaPool()
+
+
+def replica_for(request):
+    """Replica the reads of the request may use, None to stay on the primary"""
+
+    if request.method not in SAFE_METHODS or not replica_aliases():
+        return None
+    if is_pinned(request.user):
+        return None
+    return replicas.choose()
+
+
+def read_from(alias):
+    """Sends the following reads of the current request to the alias"""
+
+    state = current_routing.get()
+    if state is not None:
+        state.replica = alias
+
+
+def in_transaction():
+    """Whether the primary is in a transaction, other than the one of a test"""
+
+    return any(
+        not getattr(block, "_from_testcase", False)
+        for block in connections[PRIMARY].atomic_blocks
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        if state is None or state.replica is None or state.wrote:
+            return PRIMARY
+        if in_transaction():
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None and model._meta.label_lower not in UNTRACKED_WRITES:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaReadMixin:
+    """Serves replica_actions of a viewset from a replica when possible"""
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.replica_actions:
+            read_from(replica_for(request))
+        super().initial(request, *args, **kwargs)
+
+
+class ReplicaRoutingMiddleware:
+    """Tracks the writes of every request and pins users who wrote"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = current_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.pin_writer(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = current_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.pin_writer(request, state)
+        return response
+
+    @staticmethod
+    def pin_writer(request, state):
+        if state.wrote and replica_aliases():
+            pin_to_primary(getattr(request, "user", None))
@@ -0,0 +1,302 @@
+"""Streaming import of airports, routes and flights from CSV or JSONL files.
+
+Rows are read lazily and written in batches, so memory use is bounded by the
+batch size plus the code -> id maps of airports, routes and airplanes.
+Airports are matched by code and routes by their airports, so existing rows
+are skipped, and a new airport reusing the name of another one is an invalid
+row; flights are skipped when the same airplane already flies the
+route at that time. Values are checked against the model fields while
+parsing, so a value the database would refuse is an invalid row too.
+bulk_create() sends no signals, so the table versions, the reference cache
+and the itinerary graph are invalidated here.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.itineraries import flight_graph
+from airport.models import Airplane, Airport, Flight, Route
+from airport.reference_cache import reference_cache
+from airport.versions import bump_table_version_on_commit
+
+FLIGHT_COPY_COLUMNS = (
+    "route_id",
+    "airplane_id",
+    "departure_time",
+    "arrival_time",
+    "capacity",
+    "seats_sold",
+)
+
+
+class ImportRowError(ValueError):
+    def __init__(self, path, line, message):
+        super().__init__(f"{path}:{line}: {message}")
+
+
+def read_rows(path):
+    """Yields (line number, row dict) from a .csv or .jsonl/.ndjson file"""
+
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        elif path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as error:
+                    raise ImportRowError(path, line_number, error.msg)
+                if not isinstance(row, dict):
+                    raise ImportRowError(path, line_number, "Expected an object")
+                yield line_number, row
+        else:
+            raise ValueError(f"{path}: expected a .csv, .jsonl or .ndjson file")
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def field(row, name):
+    value = row.get(name)
+    if value is None or str(value).strip() == "":
+        raise ValueError(f'Missing "{name}"')
+    return str(value).strip()
+
+
+def parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date and time "{value}"')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def validate(instance, related=()):
+    """Checks the values against the model fields, like max_length, so that
+    they fail as a row of the file rather than in the batch insert. The
+    related fields are resolved from the maps of the importer already."""
+
+    try:
+        instance.full_clean(
+            exclude=["id", *related], validate_unique=False, validate_constraints=False
+        )
+    except ValidationError as error:
+        raise ValueError(
+            "; ".join(
+                f"{name}: {' '.join(messages)}"
+                for name, messages in error.message_dict.items()
+            )
+        )
+    return instance
+
+
+class ScheduleImporter:
+    def __init__(self, batch_size=5000, use_copy=False, skip_invalid=False, log=None):
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.skip_invalid = skip_invalid
+        self.log = log or (lambda message: None)
+        self.skipped_invalid = 0
+
+    def parsed(self, path, parse):
+        """Parses rows lazily, reporting or skipping the invalid ones"""
+
+        for line_number, row in read_rows(path):
+            try:
+                yield parse(row)
+            except (KeyError, TypeError, ValueError) as error:
+                if not self.skip_invalid:
+                    raise ImportRowError(path, line_number, error)
+                self.skipped_invalid += 1
+                self.log(str(ImportRowError(path, line_number, error)))
+
+    @staticmethod
+    def airport_ids():
+        return {row.code: row.id for row in reference_cache.table(Airport).values()}
+
+    @staticmethod
+    def route_ids():
+        return {
+            (row.source_id, row.destination_id): row.id
+            for row in reference_cache.table(Route).values()
+        }
+
+    def import_airports(self, path):
+        """Returns (created, skipped) counts"""
+
+        codes = self.airport_ids()
+        names = {row.name: row.code for row in reference_cache.table(Airport).values()}
+        created = skipped = 0
+
+        def parse(row):
+            airport = Airport(
+                code=field(row, "code").upper(),
+                name=field(row, "name"),
+                closest_big_city=field(row, "closest_big_city"),
+            )
+            validate(airport)
+            if airport.code in codes:
+                return None
+            if airport.name in names:
+                raise ValueError(
+                    f'Airport "{airport.name}" already exists '
+                    f'with code "{names[airport.name]}"'
+                )
+            codes[airport.code] = None
+            names[airport.name] = airport.code
+            return airport
+
+        for batch in batches(self.parsed(path, parse), self.batch_size):
+            new = [airport for airport in batch if airport is not None]
+            skipped += len(batch) - len(new)
+            with transaction.atomic():
+                Airport.objects.bulk_create(new)
+                reference_cache.invalidate(Airport)
+            created += len(new)
+
+        flight_graph.invalidate_airports()
+        return created, skipped
+
+    def import_routes(self, path):
+        codes = self.airport_ids()
+        routes = self.route_ids()
+        created = skipped = 0
+
+        def parse(row):
+            source = field(row, "source").upper()
+            destination = field(row, "destination").upper()
+            for code in (source, destination):
+                if code not in codes:
+                    raise ValueError(f'Unknown airport "{code}"')
+            return validate(
+                Route(
+                    source_id=codes[source],
+                    destination_id=codes[destination],
+                    distance=float(field(row, "distance")),
+                ),
+                related=("source", "destination"),
+            )
+
+        for batch in batches(self.parsed(path, parse), self.batch_size):
+            new = []
+            for route in batch:
+                key = (route.source_id, route.destination_id)
+                if key in routes:
+                    skipped += 1
+                    continue
+                routes[key] = None
+                new.append(route)
+            with transaction.atomic():
+                Route.objects.bulk_create(new)
+                reference_cache.invalidate(Route)
+            created += len(new)
+
+        flight_graph.clear()
+        return created, skipped
+
+    def import_flights(self, path):
+        codes = self.airport_ids()
+        routes = self.route_ids()
+        capacities = {
+            airplane_id: row * seats_in_row
+            for airplane_id, row, seats_in_row in Airplane.objects.values_list(
+                "id", "row", "seats_in_row"
+            )
+        }
+        created = skipped = 0
+
+        def parse(row):
+            source = field(row, "source").upper()
+            destination = field(row, "destination").upper()
+            route_id = routes.get((codes.get(source), codes.get(destination)))
+            if route_id is None:
+                raise ValueError(f"No route from {source} to {destination}")
+            airplane_id = int(field(row, "airplane"))
+            if airplane_id not in capacities:
+                raise ValueError(f"Unknown airplane {airplane_id}")
+            departure_time = parse_time(field(row, "departure_time"))
+            arrival_time = parse_time(field(row, "arrival_time"))
+            if arrival_time <= departure_time:
+                raise ValueError("Arrival must be after departure")
+            return validate(
+                Flight(
+                    route_id=route_id,
+                    airplane_id=airplane_id,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                    capacity=capacities[airplane_id],
+                ),
+                related=("route", "airplane", "schedule"),
+            )
+
+        for batch in batches(self.parsed(path, parse), self.batch_size):
+            new = self.new_flights(batch)
+            skipped += len(batch) - len(new)
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy_flights(new)
+                else:
+                    Flight.objects.bulk_create(new)
+                bump_table_version_on_commit(Flight._meta.db_table)
+            created += len(new)
+
+        flight_graph.clear()
+        return created, skipped
+
+    @staticmethod
+    def new_flights(batch):
+        """Drops flights that already exist or repeat within the batch"""
+
+        existing = set(
+            Flight.objects.filter(
+                route_id__in={flight.route_id for flight in batch},
+                departure_time__in={flight.departure_time for flight in batch},
+            ).values_list("route_id", "airplane_id", "departure_time")
+        )
+        new = []
+        for flight in batch:
+            key = (flight.route_id, flight.airplane_id, flight.departure_time)
+            if key not in existing:
+                existing.add(key)
+                new.append(flight)
+        return new
+
+    @staticmethod
+    def copy_flights(flights):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for flight in flights:
+            writer.writerow(
+                [
+                    flight.route_id,
+                    flight.airplane_id,
+                    flight.departure_time.isoformat(),
+                    flight.arrival_time.isoformat(),
+                    flight.capacity,
+                    0,
+                ]
+            )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f"COPY {Flight._meta.db_table} ({', '.join(FLIGHT_COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
@@ -0,0 +1,159 @@
+"""Expansion of recurring flight schedules into Flight rows.
+
+A schedule owns the flights generated from it (Flight.schedule). Running
+materialize_schedule() over a window of dates makes the generated flights
+match the schedule again: missing departures are bulk inserted, changed
+ones are updated and ones the schedule no longer has are deleted. Flights
+that already have sold tickets or held seats are never touched, so editing
+a schedule can not move or cancel a flight under a passenger.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from airport.booking import active_holds, lock_flights
+from airport.itineraries import flight_graph
+from airport.models import Flight, Ticket
+from airport.schedule_import import batches
+from airport.versions import bump_table_version_on_commit
+
+UPDATED_FIELDS = ("route", "airplane", "arrival_time", "capacity")
+
+
+@dataclass
+class MaterializeResult:
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    kept: int = 0
+
+
+def schedule_batch_size():
+    return getattr(settings, "SCHEDULE_BATCH_SIZE", 1000)
+
+
+def schedule_window(schedule, start=None, end=None):
+    """Dates of the schedule within [start, end], either bound may be None"""
+
+    first = max(schedule.start_date, start) if start else schedule.start_date
+    last = min(schedule.end_date, end) if end else schedule.end_date
+    return first, last
+
+
+def schedule_departures(schedule, start=None, end=None):
+    """Yields aware departure times of the schedule in the window, in order"""
+
+    days = set(schedule.days)
+    date, last = schedule_window(schedule, start, end)
+    while date <= last:
+        if date.weekday() in days:
+            yield timezone.make_aware(datetime.combine(date, schedule.departure_time))
+        date += timedelta(days=1)
+
+
+def window_bounds(start=None, end=None):
+    """Departure time lookups for whole local days from start to end"""
+
+    lookups = {}
+    if start:
+        lookups["departure_time__gte"] = timezone.make_aware(
+            datetime.combine(start, datetime.min.time())
+        )
+    if end:
+        lookups["departure_time__lt"] = timezone.make_aware(
+            datetime.combine(end + timedelta(days=1), datetime.min.time())
+        )
+    return lookups
+
+
+def materialize_schedule(schedule, start=None, end=None, batch_size=None):
+    """Brings the flights of the schedule in [start, end] in line with it.
+
+    Only flights generated from this schedule inside the window are looked
+    at, so a window starting today regenerates the future without rewriting
+    history. New flights are written with one bulk_create() per batch.
+    """
+
+    batch_size = batch_size or schedule_batch_size()
+    airplane = schedule.airplane
+    capacity = airplane.capacity
+    result = MaterializeResult()
+
+    with transaction.atomic():
+        generated = Flight.objects.filter(
+            schedule=schedule, **window_bounds(start, end)
+        )
+        lock_flights(generated.values_list("id", flat=True))
+        existing = {}
+        in_use = set()
+        for flight in generated.annotate(
+            has_tickets=Exists(Ticket.objects.filter(flight=OuterRef("pk"))),
+            has_holds=Exists(active_holds().filter(flight=OuterRef("pk"))),
+        ):
+            existing.setdefault(flight.departure_time, []).append(flight)
+            if flight.has_tickets or flight.has_holds or flight.seats_sold:
+                in_use.add(flight.id)
+
+        changed = []
+        matched = set()
+
+        def new_flights():
+            for departure_time in schedule_departures(schedule, start, end):
+                flights = existing.get(departure_time)
+                if not flights:
+                    yield Flight(
+                        route_id=schedule.route_id,
+                        airplane=airplane,
+                        schedule=schedule,
+                        departure_time=departure_time,
+                        arrival_time=departure_time + schedule.duration,
+                        capacity=capacity,
+                    )
+                    continue
+                flight = flights[0]
+                matched.add(flight.id)
+                if flight.id in in_use:
+                    continue
+                wanted = {
+                    "route_id": schedule.route_id,
+                    "airplane_id": airplane.id,
+                    "arrival_time": departure_time + schedule.duration,
+                    "capacity": capacity,
+                }
+                if any(
+                    getattr(flight, name) != value for name, value in wanted.items()
+                ):
+                    for name, value in wanted.items():
+                        setattr(flight, name, value)
+                    changed.append(flight)
+
+        for batch in batches(new_flights(), batch_size):
+            Flight.objects.bulk_create(batch)
+            result.created += len(batch)
+
+        if changed:
+            Flight.objects.bulk_update(changed, UPDATED_FIELDS, batch_size=batch_size)
+            result.updated = len(changed)
+
+        stale = [
+            flight.id
+            for flights in existing.values()
+            for flight in flights
+            if flight.id not in matched and flight.id not in in_use
+        ]
+        if stale:
+            Flight.objects.filter(id__in=stale).delete()
+            result.deleted = len(stale)
+        result.kept = len(in_use)
+
+        if result.created or result.updated or result.deleted:
+            bump_table_version_on_commit(Flight._meta.db_table)
+
+    if result.created or result.updated or result.deleted:
+        flight_graph.clear()
+    return result
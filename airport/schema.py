@@ -0,0 +1,131 @@
+"""OpenAPI schema built ahead of time and served from memory.
+
+drf-spectacular introspects every view on each schema request, although the
+schema only changes with the code. build_openapi_schema writes it to
+OPENAPI_SCHEMA_FILE at deploy time, and SchemaView serves it rendered once
+per format with an ETag. The generator only runs when the file is missing,
+then once per process.
+
+This saves the introspection, not imports. The schema modules of REST
+framework and drf-spectacular are loaded with the views anyway, by
+rest_framework.views and by every extend_schema decorator.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import (
+    OpenApiJsonRenderer,
+    OpenApiJsonRenderer2,
+    OpenApiYamlRenderer,
+    OpenApiYamlRenderer2,
+)
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+
+def schema_file():
+    return Path(settings.OPENAPI_SCHEMA_FILE)
+
+
+def generate_schema():
+    """Introspects the API the way drf-spectacular's schema view does"""
+
+    generator_class = spectacular_settings.DEFAULT_GENERATOR_CLASS
+    generator = generator_class(urlconf=spectacular_settings.SERVE_URLCONF)
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema(path=None):
+    path = Path(path or schema_file())
+    schema = generate_schema()
+    path.write_text(json.dumps(schema, indent=2, ensure_ascii=False))
+    return path, schema
+
+
+class SchemaCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schema = None
+        self._rendered = {}
+
+    def schema(self):
+        if self._schema is None:
+            with self._lock:
+                if self._schema is None:
+                    self._schema = self.load()
+        return self._schema
+
+    @staticmethod
+    def load():
+        path = schema_file()
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            logger.warning(
+                "%s is missing, generating the OpenAPI schema in process. "
+                "Run build_openapi_schema when deploying.",
+                path,
+            )
+            return generate_schema()
+
+    def rendered(self, renderer, media_type):
+        """Returns (content, etag) of the schema rendered for the media type"""
+
+        cached = self._rendered.get(media_type)
+        if cached is None:
+            content = renderer.render(self.schema(), media_type, {})
+            cached = (content, f'"{hashlib.sha1(content).hexdigest()}"')
+            self._rendered[media_type] = cached
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._schema = None
+            self._rendered = {}
+
+
+schema_cache = SchemaCache()
+
+
+class SchemaView(APIView):
+    """
+    OpenApi3 schema for this API. Format can be selected via content negotiation.
+
+    - YAML: application/vnd.oai.openapi
+    - JSON: application/vnd.oai.openapi+json
+    """
+
+    renderer_classes = [
+        OpenApiYamlRenderer,
+        OpenApiYamlRenderer2,
+        OpenApiJsonRenderer,
+        OpenApiJsonRenderer2,
+    ]
+    permission_classes = spectacular_settings.SERVE_PERMISSIONS
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        content, etag = schema_cache.rendered(
+            request.accepted_renderer, request.accepted_media_type
+        )
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=request.accepted_media_type)
+            response["Content-Disposition"] = (
+                f'inline; filename="{spectacular_settings.TITLE or "schema"}.'
+                f'{request.accepted_renderer.format}"'
+            )
+        response["ETag"] = etag
+        return response
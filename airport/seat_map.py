@@ -0,0 +1,33 @@
+import base64
+
+
+def seat_index(row, seat, seats_in_row):
+    """Returns zero-based position of the seat in row-major order"""
+
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def build_seat_bitmap(rows, seats_in_row, occupied):
+    """Packs occupied (row, seat) pairs into a bytearray, one bit per seat,
+    most significant bit first"""
+
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in occupied:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = seat_index(row, seat, seats_in_row)
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+    return bitmap
+
+
+def encode_seat_bitmap(bitmap):
+    return base64.b64encode(bytes(bitmap)).decode("ascii")
+
+
+def build_seat_grid(rows, seats_in_row, occupied):
+    """Returns list of rows where each seat is 1 if taken and 0 if free"""
+
+    grid = [[0] * seats_in_row for _ in range(rows)]
+    for row, seat in occupied:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            grid[row - 1][seat - 1] = 1
+    return grid
@@ -3,6 +3,8 @@ from django.utils import timezone
 
 from rest_framework import serializers
 
+from airport.booking import book_tickets, load_flights, move_ticket, validate_seats
+from airport.reference_cache import reference_cache
 from airport.models import (
     CrewPosition,
     Crew,
@@ -12,7 +14,10 @@ from airport.models import (
     Ticket,
     Order,
     Flight,
+    FlightSchedule,
     Route,
+    SlowQuery,
+    WEEKDAYS,
 )
 
 
@@ -62,8 +67,10 @@ class RouteSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation["source"] = instance.source.name
-        representation["destination"] = instance.destination.name
+        representation["source"] = reference_cache.get(Airport, instance.source_id).name
+        representation["destination"] = reference_cache.get(
+            Airport, instance.destination_id
+        ).name
         representation["distance"] = f"{instance.distance} miles."
         return representation
 
@@ -113,11 +120,11 @@ class AirplaneSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation[
-            "airplane_type"
-        ] = f"{instance.airplane_type.brand} {instance.airplane_type.model}"
+        airplane_type = reference_cache.get(AirplaneType, instance.airplane_type_id)
+        representation["airplane_type"] = f"{airplane_type.brand} {airplane_type.model}"
         crew_representation = [
-            f"{crew.position}: {crew.first_name} {crew.last_name}"
+            f"{reference_cache.get(CrewPosition, crew.position_id).position}: "
+            f"{crew.first_name} {crew.last_name}"
             for crew in instance.crew.all()
         ]
         representation["crew"] = crew_representation
@@ -141,12 +148,14 @@ class FlightSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation[
-            "route"
-        ] = f"{instance.route.source} - {instance.route.destination}"
-        representation[
-            "airplane"
-        ] = f"{instance.airplane.airplane_type.brand} {instance.airplane.airplane_type.model}"
+        route = reference_cache.get(Route, instance.route_id)
+        source = reference_cache.get(Airport, route.source_id)
+        destination = reference_cache.get(Airport, route.destination_id)
+        representation["route"] = f"{source.name} - {destination.name}"
+        airplane_type = reference_cache.get(
+            AirplaneType, instance.airplane.airplane_type_id
+        )
+        representation["airplane"] = f"{airplane_type.brand} {airplane_type.model}"
 
         departure_time_formatted = timezone.localtime(instance.departure_time).strftime(
             "%d-%m-%Y %H:%M"
@@ -159,6 +168,150 @@ class FlightSerializer(serializers.ModelSerializer):
         return representation
 
 
+class WeekdaysField(serializers.Field):
+    """List of day names ("mon" ... "sun") stored as a bit mask"""
+
+    default_error_messages = {
+        "invalid": "Expected a list of days: " + ", ".join(WEEKDAYS) + ".",
+        "empty": "Pick at least one day.",
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.split(",")
+        if not isinstance(data, (list, tuple)):
+            self.fail("invalid")
+        mask = 0
+        for day in data:
+            day = str(day).strip().lower()[:3]
+            if day not in WEEKDAYS:
+                self.fail("invalid")
+            mask |= 1 << WEEKDAYS.index(day)
+        if not mask:
+            self.fail("empty")
+        return mask
+
+    def to_representation(self, value):
+        return [day for index, day in enumerate(WEEKDAYS) if value & (1 << index)]
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    weekdays = WeekdaysField()
+
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "weekdays",
+            "departure_time",
+            "duration",
+            "start_date",
+            "end_date",
+        )
+
+    def validate_duration(self, value):
+        if value.total_seconds() <= 0:
+            raise serializers.ValidationError("Duration must be positive.")
+        return value
+
+    def validate(self, attrs):
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError(
+                {"end_date": "End date can not be before the start date."}
+            )
+        return attrs
+
+
+class MaterializeScheduleSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    created = serializers.IntegerField(read_only=True)
+    updated = serializers.IntegerField(read_only=True)
+    deleted = serializers.IntegerField(read_only=True)
+    kept = serializers.IntegerField(read_only=True)
+
+
+class FlatFlightSerializer:
+    """Builds FlightSerializer output straight from .values() rows.
+
+    Skips the DRF field machinery: route and airplane labels are looked up
+    once per route and airplane type, and every distinct timestamp of the
+    page is converted to local time once.
+    """
+
+    values = (
+        "id",
+        "route_id",
+        "airplane__airplane_type_id",
+        "departure_time",
+        "arrival_time",
+        "tickets_available",
+    )
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @staticmethod
+    def route_labels(route_ids):
+        labels = {}
+        for route_id in route_ids:
+            route = reference_cache.get(Route, route_id)
+            source = reference_cache.get(Airport, route.source_id)
+            destination = reference_cache.get(Airport, route.destination_id)
+            labels[route_id] = f"{source.name} - {destination.name}"
+        return labels
+
+    @staticmethod
+    def airplane_labels(airplane_type_ids):
+        labels = {}
+        for airplane_type_id in airplane_type_ids:
+            airplane_type = reference_cache.get(AirplaneType, airplane_type_id)
+            labels[airplane_type_id] = f"{airplane_type.brand} {airplane_type.model}"
+        return labels
+
+    @staticmethod
+    def local_times(values):
+        """Formats datetimes as timezone.localtime().strftime("%d-%m-%Y %H:%M")"""
+
+        zone = timezone.get_current_timezone()
+        formatted = {}
+        for value in values:
+            if value not in formatted:
+                local = value.astimezone(zone)
+                formatted[value] = (
+                    f"{local.day:02d}-{local.month:02d}-{local.year} "
+                    f"{local.hour:02d}:{local.minute:02d}"
+                )
+        return formatted
+
+    @property
+    def data(self):
+        rows = self.rows
+        routes = self.route_labels({row["route_id"] for row in rows})
+        airplanes = self.airplane_labels(
+            {row["airplane__airplane_type_id"] for row in rows}
+        )
+        times = self.local_times(
+            [row["departure_time"] for row in rows]
+            + [row["arrival_time"] for row in rows]
+        )
+        return [
+            {
+                "id": row["id"],
+                "route": routes[row["route_id"]],
+                "airplane": airplanes[row["airplane__airplane_type_id"]],
+                "departure_time": times[row["departure_time"]],
+                "arrival_time": times[row["arrival_time"]],
+                "available_tickets": row["tickets_available"],
+            }
+            for row in rows
+        ]
+
+
 class FlightDetailSerializer(serializers.ModelSerializer):
     route = RouteSerializer()
     airplane = AirplaneSerializer()
@@ -175,31 +328,47 @@ class FlightDetailSerializer(serializers.ModelSerializer):
         )
 
 
+class FlightRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights preloaded into the serializer context before querying"""
+
+    def to_internal_value(self, data):
+        flights = self.context.get("flights")
+        if flights:
+            try:
+                return flights[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    flight = FlightRelatedField(queryset=Flight.objects.select_related("airplane"))
+
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        validators = []
 
     def validate(self, data):
-        flight = data["flight"]
-        row = data["row"]
-        seat = data["seat"]
-
-        existing_ticket = Ticket.objects.filter(
-            flight=flight, row=row, seat=seat
-        ).first()
-        if existing_ticket:
-            raise serializers.ValidationError(
-                "A ticket with the same row and seat on this flight already exists."
-            )
+        # Partial updates keep the flight, row or seat they leave out
+        flight = data.get("flight", getattr(self.instance, "flight", None))
+        row = data.get("row", getattr(self.instance, "row", None))
+        seat = data.get("seat", getattr(self.instance, "seat", None))
+
+        Ticket.validate_ticket(row, seat, flight, serializers.ValidationError)
 
         return data
 
     def create(self, validated_data):
         user = self.context["request"].user
 
-        validated_data["order"] = Order.objects.create(user=user)
-        return super().create(validated_data)
+        with transaction.atomic():
+            order = Order.objects.create(user=user)
+            (ticket,) = book_tickets(order, [validated_data])
+            return ticket
+
+    def update(self, instance, validated_data):
+        return move_ticket(instance, validated_data)
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -210,20 +379,108 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ("id", "created_at", "user", "order_number", "tickets")
         read_only_fields = ("order_number", "user")
 
+    def to_internal_value(self, data):
+        tickets_data = data.get("tickets")
+        if isinstance(tickets_data, list):
+            self.context["flights"] = load_flights(
+                ticket_data.get("flight")
+                for ticket_data in tickets_data
+                if isinstance(ticket_data, dict)
+            )
+        return super().to_internal_value(data)
+
+    def validate_tickets(self, tickets):
+        return validate_seats(tickets)
+
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            book_tickets(order, tickets_data)
             return order
 
     def update(self, instance, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets", [])
             instance = super().update(instance, validated_data)
+            book_tickets(instance, tickets_data)
+            return instance
 
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=instance, **ticket_data)
 
-            return instance
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        flight = self.context["flight"]
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["row"], seat["seat"], flight, serializers.ValidationError
+            )
+        return seats
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.SlugRelatedField(
+        slug_field="code", queryset=Airport.objects.all()
+    )
+    destination = serializers.SlugRelatedField(
+        slug_field="code", queryset=Airport.objects.all()
+    )
+    date = serializers.DateField()
+    min_connection = serializers.IntegerField(min_value=0, default=45)
+    max_connection = serializers.IntegerField(min_value=1, default=24 * 60)
+    max_legs = serializers.IntegerField(min_value=1, max_value=4, default=3)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+
+class ItinerarySerializer(serializers.Serializer):
+    """Serializes a tuple of itinerary legs"""
+
+    def to_representation(self, instance):
+        codes = self.context["airport_codes"]
+
+        def formatted(value):
+            return timezone.localtime(value).strftime("%d-%m-%Y %H:%M")
+
+        first, last = instance[0], instance[-1]
+        return {
+            "departure_time": formatted(first.departure_time),
+            "arrival_time": formatted(last.arrival_time),
+            "duration_minutes": int(
+                (last.arrival_time - first.departure_time).total_seconds() // 60
+            ),
+            "connections": len(instance) - 1,
+            "legs": [
+                {
+                    "flight": leg.flight_id,
+                    "source": codes.get(leg.source_id),
+                    "destination": codes.get(leg.destination_id),
+                    "departure_time": formatted(leg.departure_time),
+                    "arrival_time": formatted(leg.arrival_time),
+                }
+                for leg in instance
+            ],
+        }
+
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlowQuery
+        fields = (
+            "id",
+            "fingerprint",
+            "sql",
+            "view",
+            "calls",
+            "total_time",
+            "max_time",
+            "plan",
+            "first_seen",
+            "last_seen",
+        )
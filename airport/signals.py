@@ -0,0 +1,126 @@
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from airport.booking import release_capacity
+from airport.itineraries import flight_graph
+from airport.metrics import record_query
+from airport.models import (
+    CrewPosition,
+    Crew,
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    FlightSchedule,
+    Order,
+    Ticket,
+)
+from airport.reference_cache import REFERENCE_FIELDS, reference_cache
+from airport.slow_queries import flush_when_idle, log_slow_query
+from airport.versions import bump_table_version_on_commit
+
+# SeatHold rows are written in bulk by airport.booking, which bumps them itself
+VERSIONED_MODELS = (
+    CrewPosition,
+    Crew,
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    FlightSchedule,
+    Order,
+    Ticket,
+)
+
+
+def bump_model_version(sender, **kwargs):
+    bump_table_version_on_commit(sender._meta.db_table)
+
+
+def drop_reference_table(sender, **kwargs):
+    reference_cache.drop(sender)
+
+
+def bump_airplane_crew_version(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_table_version_on_commit(sender._meta.db_table)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+for model in REFERENCE_FIELDS:
+    post_save.connect(drop_reference_table, sender=model)
+    post_delete.connect(drop_reference_table, sender=model)
+
+m2m_changed.connect(bump_airplane_crew_version, sender=Airplane.crew.through)
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def invalidate_flight_itineraries(sender, instance, **kwargs):
+    flight_graph.invalidate_flight(instance.id, instance.departure_time)
+
+
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_route_itineraries(sender, instance, **kwargs):
+    flight_graph.clear()
+
+
+@receiver([post_save, post_delete], sender=Airport)
+def invalidate_airport_itineraries(sender, instance, **kwargs):
+    flight_graph.invalidate_airports()
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_flight(sender, instance, raw=False, **kwargs):
+    instance._saved_flight_id = None
+    if instance.pk is not None and not raw:
+        instance._saved_flight_id = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("flight_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def count_sold_seat(sender, instance, created, **kwargs):
+    # Tickets booked or moved through airport.booking are counted there
+    saved_flight_id = getattr(instance, "_saved_flight_id", None)
+    if not created:
+        if saved_flight_id is None or saved_flight_id == instance.flight_id:
+            return
+        release_capacity(saved_flight_id)
+    Flight.objects.filter(id=instance.flight_id).update(
+        seats_sold=F("seats_sold") + 1
+    )
+
+
+@receiver(post_delete, sender=Ticket)
+def release_sold_seat(sender, instance, **kwargs):
+    release_capacity(instance.flight_id)
+
+
+@receiver(post_save, sender=Airplane)
+def update_flight_capacity(sender, instance, **kwargs):
+    Flight.objects.filter(airplane=instance).exclude(
+        capacity=instance.capacity
+    ).update(capacity=instance.capacity)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    # Fired again whenever the same connection object reconnects
+    for wrapper in (record_query, log_slow_query):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+
+@receiver(request_finished)
+def save_slow_queries(sender, **kwargs):
+    flush_when_idle()
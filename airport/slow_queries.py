@@ -0,0 +1,260 @@
+"""Opt-in log of slow queries with sampled EXPLAIN plans.
+
+With SLOW_QUERY_LOG on, every query goes through log_slow_query(), a
+connection execute wrapper. Queries slower than SLOW_QUERY_THRESHOLD_MS
+are fingerprinted (literals and IN lists collapsed, so calls differing
+only in values share one entry) and buffered with the route of the
+request that ran them. A SELECT whose fingerprint has not been explained
+by this process in SLOW_QUERY_EXPLAIN_INTERVAL seconds is explained, inside
+a savepoint so a failing EXPLAIN can not break the transaction of the
+request. On PostgreSQL a pure read is run once more under EXPLAIN (ANALYZE,
+BUFFERS); a SELECT that locks rows or calls functions outside PURE_CALLS,
+like nextval() or pg_advisory_xact_lock(), only gets a plain EXPLAIN.
+
+The buffer is written to the SlowQuery table when the request finishes,
+outside its transaction, and read by the slow_query_report command and
+the staff-only slow_queries endpoint.
+"""
+
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from airport.metrics import current_request, route_name
+from airport.models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+NO_REQUEST = "-"
+
+# Set while the log runs its own queries, which are not logged
+_paused = contextvars.ContextVar("slow_query_log_paused", default=False)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE
+)
+CALL = re.compile(r"\b([A-Za-z_][A-Za-z0-9_.]*)\s*\(")
+
+# Keywords followed by parentheses and functions without side effects
+PURE_CALLS = frozenset(
+    {
+        "ALL",
+        "AND",
+        "ANY",
+        "AS",
+        "EXISTS",
+        "FILTER",
+        "FROM",
+        "IN",
+        "JOIN",
+        "NOT",
+        "ON",
+        "OR",
+        "OVER",
+        "SELECT",
+        "USING",
+        "VALUES",
+        "WHERE",
+        "ABS",
+        "ARRAY_AGG",
+        "AVG",
+        "CAST",
+        "COALESCE",
+        "COUNT",
+        "DATE_TRUNC",
+        "EXTRACT",
+        "GREATEST",
+        "LEAST",
+        "LENGTH",
+        "LOWER",
+        "MAX",
+        "MIN",
+        "NULLIF",
+        "ROUND",
+        "ROW_NUMBER",
+        "STRING_AGG",
+        "SUM",
+        "UPPER",
+    }
+)
+
+
+def normalize(sql):
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER.sub("?", sql.replace("%s", "?"))
+    sql = VALUE_LIST.sub("(...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    """Returns (normalized statement, sha1 of it)"""
+
+    normalized = normalize(sql)
+    return normalized, hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def is_pure_read(sql):
+    """Whether running the SELECT again does nothing but read"""
+
+    sql = STRING_LITERAL.sub("?", sql)
+    if LOCKING_CLAUSE.search(sql):
+        return False
+    return all(name.upper() in PURE_CALLS for name in CALL.findall(sql))
+
+
+def enabled():
+    return getattr(settings, "SLOW_QUERY_LOG", False)
+
+
+def threshold():
+    return getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 200) / 1000
+
+
+class SlowQueryBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._explained_at = {}
+
+    def add(self, key, sql, view, duration, plan):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    "sql": sql,
+                    "view": view,
+                    "calls": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "plan": "",
+                }
+            entry["view"] = view
+            entry["calls"] += 1
+            entry["total_time"] += duration * 1000
+            entry["max_time"] = max(entry["max_time"], duration * 1000)
+            if plan:
+                entry["plan"] = plan
+
+    def should_explain(self, key):
+        interval = getattr(settings, "SLOW_QUERY_EXPLAIN_INTERVAL", 300)
+        now = time.monotonic()
+        with self._lock:
+            explained_at = self._explained_at.get(key)
+            if explained_at is not None and now - explained_at < interval:
+                return False
+            self._explained_at[key] = now
+            return True
+
+    def take(self):
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained_at.clear()
+
+
+slow_queries = SlowQueryBuffer()
+
+
+def explain(connection, sql, params):
+    """EXPLAIN output of a SELECT, empty when it can not be explained"""
+
+    if not sql.lstrip()[:6].upper() == "SELECT":
+        return ""
+    options = {}
+    if connection.vendor == "postgresql" and is_pure_read(sql):
+        options = {"analyze": True, "buffers": True}
+    prefix = connection.ops.explain_query_prefix(**options)
+    token = _paused.set(True)
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                rows = cursor.fetchall()
+    except DatabaseError as error:
+        logger.warning("EXPLAIN of a slow query failed: %s", error)
+        return ""
+    finally:
+        _paused.reset(token)
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Connection execute wrapper buffering queries over the threshold"""
+
+    if not enabled() or _paused.get():
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration < threshold():
+        return result
+
+    stats = current_request.get()
+    view = route_name(stats.request) if stats and stats.request else NO_REQUEST
+    normalized, key = fingerprint(sql)
+    plan = ""
+    if not many and slow_queries.should_explain(key):
+        plan = explain(context["connection"], sql, params)
+    slow_queries.add(key, normalized, view, duration, plan)
+    return result
+
+
+def flush():
+    """Adds the buffered slow queries to the SlowQuery table"""
+
+    entries = slow_queries.take()
+    if not entries:
+        return 0
+    now = timezone.now()
+    token = _paused.set(True)
+    try:
+        for key, entry in entries.items():
+            changes = {
+                "view": entry["view"],
+                "calls": F("calls") + entry["calls"],
+                "total_time": F("total_time") + entry["total_time"],
+                "max_time": Greatest("max_time", entry["max_time"]),
+                "last_seen": now,
+            }
+            if entry["plan"]:
+                changes["plan"] = entry["plan"]
+            if SlowQuery.objects.filter(fingerprint=key).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=key, first_seen=now, last_seen=now, **entry
+                    )
+            except IntegrityError:
+                SlowQuery.objects.filter(fingerprint=key).update(**changes)
+    except DatabaseError as error:
+        logger.warning("Slow queries were not saved: %s", error)
+    finally:
+        _paused.reset(token)
+    return len(entries)
+
+
+def flush_when_idle():
+    """Flushes unless a transaction is open, its rollback would lose them"""
+
+    if any(connection.in_atomic_block for connection in connections.all()):
+        return
+    flush()
@@ -450,7 +450,7 @@ class AuthenticatedAirportTests(TestCase):
         res = self.client.get(FLIGHT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_flight_create_forbidden(self):
         playload = {
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.async_views import encode_cursor
+from airport.models import Airport, Flight, Order, Route, Ticket
+from airport.tests.tests_airport_api import sample_airplane, sample_route
+
+
+@override_settings(SEAT_MAP_POLL_INTERVAL=0.01)
+class AsyncReadViewTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = AsyncClient()
+        self.headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        self.route = sample_route()
+        airplane = sample_airplane()
+        self.flights = [
+            Flight.objects.create(
+                route=self.route,
+                airplane=airplane,
+                departure_time=timezone.now() + timedelta(days=index),
+                arrival_time=timezone.now() + timedelta(days=index, hours=5),
+            )
+            for index in range(5)
+        ]
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            flight=self.flights[0],
+            order=Order.objects.create(user=self.user),
+        )
+
+    async def get(self, url, data=None):
+        return await self.client.get(url, data, headers=self.headers)
+
+    @sync_to_async
+    def sync_get(self, url):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.get(url).json()
+
+    async def test_requires_authentication(self):
+        res = await AsyncClient().get(reverse("airport:async-flight-list"))
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_only_reads_are_allowed(self):
+        res = await self.client.post(
+            reverse("airport:async-flight-list"), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, 405)
+
+    async def test_flight_list_matches_sync_list(self):
+        res = await self.get(reverse("airport:async-flight-list"))
+
+        self.assertEqual(res.status_code, 200)
+        expected = await self.sync_get(reverse("airport:flight-list"))
+        self.assertEqual(res.json()["results"], expected["results"])
+
+    async def test_flight_list_pages_with_cursor(self):
+        url = reverse("airport:async-flight-list")
+
+        res = await self.get(url, {"page_size": 2})
+        ids = [flight["id"] for flight in res.json()["results"]]
+        while res.json()["next"]:
+            res = await self.get(res.json()["next"])
+            ids += [flight["id"] for flight in res.json()["results"]]
+
+        self.assertEqual(ids, [flight.id for flight in self.flights])
+
+    async def test_flight_list_pages_back_with_previous(self):
+        url = reverse("airport:async-flight-list")
+
+        first = await self.get(url, {"page_size": 2})
+        second = await self.get(first.json()["next"])
+        back = await self.get(second.json()["previous"])
+
+        self.assertIsNone(first.json()["previous"])
+        self.assertEqual(back.json()["results"], first.json()["results"])
+        self.assertIsNone(back.json()["previous"])
+        self.assertEqual(back.json()["next"], first.json()["next"])
+
+    async def test_flight_list_filters(self):
+        res = await self.get(
+            reverse("airport:async-flight-list"), {"available_tickets": 60}
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in res.json()["results"]],
+            [flight.id for flight in self.flights[1:]],
+        )
+
+    async def test_invalid_query_parameter(self):
+        res = await self.get(
+            reverse("airport:async-flight-list"), {"cursor": "not-a-cursor"}
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    async def test_cursor_with_wrong_types_is_invalid(self):
+        url = reverse("airport:async-flight-list")
+        for values in (["soon", "first"], [1, 2], [None, 1], ["2024-01-01"]):
+            res = await self.get(url, {"cursor": encode_cursor(values)})
+
+            self.assertEqual(res.status_code, 400)
+
+    async def test_flight_detail(self):
+        res = await self.get(
+            reverse("airport:async-flight-detail", args=[self.flights[0].id])
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["available_tickets"], 59)
+
+        res = await self.get(reverse("airport:async-flight-detail", args=[0]))
+        self.assertEqual(res.status_code, 404)
+
+    async def test_flight_detail_matches_sync_detail(self):
+        res = await self.get(
+            reverse("airport:async-flight-detail", args=[self.flights[0].id])
+        )
+
+        expected = await self.sync_get(
+            reverse("airport:flight-detail", args=[self.flights[0].id])
+        )
+        self.assertEqual(res.json(), expected)
+
+    async def test_airport_and_route_match_sync_views(self):
+        for name in ("airport", "route"):
+            res = await self.get(reverse(f"airport:async-{name}-list"))
+            expected = await self.sync_get(reverse(f"airport:{name}-list"))
+            self.assertEqual(res.json()["results"], expected)
+
+        airport = await Airport.objects.afirst()
+        res = await self.get(reverse("airport:async-airport-detail", args=[airport.id]))
+        self.assertEqual(res.json()["code"], airport.code)
+
+        route = await Route.objects.afirst()
+        res = await self.get(reverse("airport:async-route-detail", args=[route.id]))
+        self.assertEqual(res.json()["distance"], f"{route.distance} miles.")
+
+    async def test_seat_map_long_poll_times_out_with_same_version(self):
+        url = reverse("airport:async-flight-seats", args=[self.flights[0].id])
+        res = await self.get(url, {"mode": "grid"})
+        version = res.json()["version"]
+        self.assertEqual(res.json()["seats"][0][0], 1)
+
+        res = await self.get(url, {"since": version, "wait": 0.05})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["version"], version)
+        self.assertEqual(res.json()["encoding"], "base64")
+
+    async def test_seat_map_wait_must_be_a_number(self):
+        url = reverse("airport:async-flight-seats", args=[self.flights[0].id])
+
+        res = await self.get(url, {"since": "0.0", "wait": "nan"})
+        self.assertEqual(res.status_code, 400)
+
+        res = await self.get(url, {"since": "0.0", "wait": "-inf"})
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.tests_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+TICKETS_URL = reverse("airport:ticket-list")
+
+
+@override_settings(THROTTLE_STORE="airport.throttling.CacheBucketStore")
+class OrderBookingTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def order_payload(self, seats):
+        return {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": self.flight.id}
+                for row, seat in seats
+            ]
+        }
+
+    def test_order_query_count_does_not_grow_with_tickets(self):
+        small = self.order_payload([(1, seat) for seat in range(1, 3)])
+        large = self.order_payload(
+            [(row, seat) for row in range(2, 11) for seat in range(1, 7)]
+        )
+        Order.objects.create(user=self.user)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            res = self.client.post(ORDER_URL, small, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(len(small_queries)):
+            res = self.client.post(ORDER_URL, large, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 54)
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 56)
+
+    def test_order_reports_taken_seats(self):
+        self.client.post(ORDER_URL, self.order_payload([(1, 1)]), format="json")
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(res.data["tickets"]), 1)
+        self.assertEqual(res.data["tickets"][0]["row"], "1")
+        self.assertEqual(res.data["tickets"][0]["seat"], "1")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_order_reports_duplicate_seats(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(2, 3), (2, 3)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0]["seat"], "3")
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_rejects_seat_outside_airplane(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(11, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_rejects_tickets_over_capacity(self):
+        self.client.post(
+            ORDER_URL,
+            self.order_payload([(10, seat) for seat in range(1, 6)]),
+            format="json",
+        )
+        self.flight.airplane.row = 1
+        self.flight.airplane.save()
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ticket.objects.count(), 5)
+
+    def test_ticket_for_taken_seat_conflicts(self):
+        payload = {"row": 3, "seat": 4, "flight": self.flight.id}
+        self.client.post(TICKETS_URL, payload)
+
+        res = self.client.post(TICKETS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_moving_ticket_to_taken_seat_conflicts(self):
+        self.client.post(TICKETS_URL, {"row": 3, "seat": 4, "flight": self.flight.id})
+        res = self.client.post(
+            TICKETS_URL, {"row": 3, "seat": 5, "flight": self.flight.id}
+        )
+        url = reverse("airport:ticket-detail", args=[res.data["id"]])
+
+        res = self.client.patch(url, {"seat": 4})
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(sorted(Ticket.objects.values_list("seat", flat=True)), [4, 5])
+
+    def test_moving_ticket_to_free_seat(self):
+        res = self.client.post(
+            TICKETS_URL, {"row": 3, "seat": 4, "flight": self.flight.id}
+        )
+        url = reverse("airport:ticket-detail", args=[res.data["id"]])
+
+        res = self.client.patch(url, {"row": 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["row"], res.data["seat"]), (5, 4))
+        self.assertTrue(Ticket.objects.filter(row=5, seat=4).exists())
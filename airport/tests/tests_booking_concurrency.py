@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TransactionTestCase
+
+from airport.booking import LOCK_STRATEGIES, SeatConflict, book_tickets
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_airport_api import sample_flight
+
+THREADS = 2
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "concurrent booking needs a database with row level locking",
+)
+class BookingConcurrencyTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.flight = sample_flight()
+
+    def book_seat(self, strategy, seat, barrier):
+        flight = Flight.objects.select_related("airplane").get(pk=self.flight.pk)
+        barrier.wait()
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(user=self.user)
+                book_tickets(
+                    order, [{"flight": flight, "row": 1, "seat": seat}], strategy
+                )
+            return True
+        except SeatConflict:
+            return False
+        finally:
+            connection.close()
+
+    def test_last_seat_is_sold_once(self):
+        for strategy in LOCK_STRATEGIES:
+            Ticket.objects.all().delete()
+            Flight.objects.filter(pk=self.flight.pk).update(
+                seats_sold=F("capacity") - 1
+            )
+            barrier = threading.Barrier(THREADS)
+
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                results = list(
+                    executor.map(
+                        lambda seat: self.book_seat(strategy, seat, barrier),
+                        range(1, THREADS + 1),
+                    )
+                )
+
+            self.flight.refresh_from_db()
+            self.assertEqual(results.count(True), 1, strategy)
+            self.assertEqual(results.count(False), THREADS - 1, strategy)
+            self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 1)
+            self.assertEqual(self.flight.seats_sold, self.flight.capacity)
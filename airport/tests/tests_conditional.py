@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Flight, SeatHold
+from airport.tests.tests_airport_api import sample_flight
+
+AIRPORT_URL = reverse("airport:airport-list")
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+@override_settings(THROTTLE_STORE="airport.throttling.CacheBucketStore")
+class ConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(name="Boryspil", code="KBP", closest_big_city="Kyiv")
+
+    def test_unchanged_list_returns_not_modified(self):
+        res = self.client.get(AIRPORT_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached["ETag"], etag)
+        self.assertFalse(cached.content)
+
+    def test_change_produces_new_etag(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(
+                name="Heathrow", code="LHR", closest_big_city="London"
+            )
+
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.data), 2)
+
+    def test_query_string_is_part_of_etag(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        res = self.client.get(AIRPORT_URL, {"name": "Bory"}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        res = self.client.get(AIRPORT_URL)
+
+        cached = self.client.get(
+            AIRPORT_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+        stale = self.client.get(
+            AIRPORT_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date(
+                (timezone.now() - timedelta(days=1)).timestamp()
+            ),
+        )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_user_scoped_etag_differs_per_user(self):
+        etag = self.client.get(ORDER_URL)["ETag"]
+        other = get_user_model().objects.create_user(
+            "other@test.com", "testpass", username="other"
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_write_actions_have_no_etag(self):
+        staff = get_user_model().objects.create_user(
+            "staff@test.com", "testpass", username="staff", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+
+        res = self.client.post(
+            AIRPORT_URL,
+            {"name": "Heathrow", "code": "LHR", "closest_big_city": "London"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("ETag", res)
+
+    def test_seat_hold_expiry_changes_flight_etag(self):
+        flight = sample_flight()
+        hold = SeatHold.objects.create(
+            flight=flight,
+            user=self.user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        SeatHold.objects.filter(pk=hold.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_holds_of_other_flights_keep_flight_etag(self):
+        flight = sample_flight()
+        other = Flight.objects.create(
+            route=flight.route,
+            airplane=flight.airplane,
+            departure_time=flight.departure_time,
+            arrival_time=flight.arrival_time,
+        )
+        url = reverse("airport:flight-detail", args=[flight.id])
+        etag = self.client.get(url)["ETag"]
+
+        SeatHold.objects.bulk_create(
+            [
+                SeatHold(
+                    flight=other,
+                    user=self.user,
+                    row=1,
+                    seat=1,
+                    expires_at=timezone.now() + timedelta(minutes=5),
+                )
+            ]
+        )
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_booking_keeps_etags_of_other_flights(self):
+        flight = sample_flight()
+        other = Flight.objects.create(
+            route=flight.route,
+            airplane=flight.airplane,
+            departure_time=flight.departure_time,
+            arrival_time=flight.arrival_time,
+        )
+        url = reverse("airport:flight-detail", args=[flight.id])
+        other_url = reverse("airport:flight-detail", args=[other.id])
+        etag = self.client.get(url)["ETag"]
+        other_etag = self.client.get(other_url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                ORDER_URL,
+                {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["available_tickets"], flight.capacity - 1)
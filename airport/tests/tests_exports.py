@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_airport_api import sample_airplane, sample_route
+
+FLIGHT_EXPORT_URL = reverse("airport:flight-export")
+TICKET_EXPORT_URL = reverse("airport:ticket-export")
+
+
+def streamed(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpass",
+            username="admin",
+        )
+        self.client.force_authenticate(self.user)
+
+        route = sample_route()
+        airplane = sample_airplane()
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=timezone.now() + timedelta(days=index),
+                arrival_time=timezone.now() + timedelta(days=index, hours=5),
+            )
+            for index in range(5)
+        ]
+        order = Order.objects.create(user=self.user)
+        for seat in range(1, 4):
+            Ticket.objects.create(row=1, seat=seat, flight=self.flights[0], order=order)
+
+    def test_flight_export_streams_ndjson_by_default(self):
+        res = self.client.get(FLIGHT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in streamed(res).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [f.id for f in self.flights])
+        self.assertEqual(rows[0]["seats_sold"], 3)
+        self.assertEqual(rows[0]["available_tickets"], 57)
+        self.assertEqual(rows[0]["source"], self.flights[0].route.source.code)
+
+    def test_flight_export_csv_applies_filters(self):
+        res = self.client.get(
+            FLIGHT_EXPORT_URL, {"format": "csv", "available_tickets": 60}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="flights.csv"', res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(streamed(res))))
+        self.assertEqual(
+            [int(row["id"]) for row in rows], [f.id for f in self.flights[1:]]
+        )
+        self.assertEqual(
+            rows[0]["departure_time"], self.flights[1].departure_time.isoformat()
+        )
+
+    def test_ticket_export_is_staff_only(self):
+        res = self.client.get(TICKET_EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.admin)
+        res = self.client.get(TICKET_EXPORT_URL, {"format": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(streamed(res))))
+        self.assertEqual([row["seat"] for row in rows], ["1", "2", "3"])
+        self.assertEqual(rows[0]["email"], self.user.email)
+
+    def test_ticket_export_filters_by_flight(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(TICKET_EXPORT_URL, {"flight": self.flights[1].id})
+        self.assertEqual(streamed(res), "")
+
+        res = self.client.get(TICKET_EXPORT_URL, {"flight": "x"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", json.loads(res.content))
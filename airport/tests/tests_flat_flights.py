@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, AirplaneType, Airport, Flight, Order, Route, Ticket
+from airport.tests.tests_airport_api import sample_airplane, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+FLAT_FLIGHT_URL = reverse("airport:flight-flat")
+
+
+class FlatFlightListTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        routes = [
+            sample_route(),
+            Route.objects.create(
+                source=Airport.objects.create(
+                    name="Heathrow", code="LHR", closest_big_city="London"
+                ),
+                destination=Airport.objects.create(
+                    name="Schiphol", code="AMS", closest_big_city="Amsterdam"
+                ),
+                distance=230,
+            ),
+        ]
+        airplanes = [
+            sample_airplane(),
+            Airplane.objects.create(
+                name="Second",
+                row=20,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(brand="Embraer", model="E195"),
+            ),
+        ]
+        start = datetime(2030, 3, 30, 21, 45, 30, tzinfo=dt_timezone.utc)
+        self.flights = [
+            Flight.objects.create(
+                route=routes[index % 2],
+                airplane=airplanes[index // 2 % 2],
+                departure_time=start + timedelta(hours=index * 7),
+                arrival_time=start + timedelta(hours=index * 7 + 3, minutes=5),
+            )
+            for index in range(7)
+        ]
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            flight=self.flights[2],
+            order=Order.objects.create(user=self.user),
+        )
+
+    def rendered_pages(self, url, params):
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            pages.append(JSONRenderer().render(res.data["results"]))
+            if not res.data["next"]:
+                return pages
+            res = self.client.get(res.data["next"])
+
+    def assert_identical(self, params=None):
+        params = params or {}
+        self.assertEqual(
+            self.rendered_pages(FLAT_FLIGHT_URL, params),
+            self.rendered_pages(FLIGHT_URL, params),
+        )
+
+    def test_output_is_identical_to_flight_list(self):
+        self.assert_identical()
+        self.assert_identical({"page_size": 3})
+
+    def test_filters_apply(self):
+        self.assert_identical({"departure_time": "2030-03-31"})
+        self.assert_identical({"available_tickets": 60})
+
+    def test_local_times_match_across_dst_change(self):
+        with timezone.override("Europe/London"):
+            self.assert_identical()
+        with timezone.override("Asia/Kolkata"):
+            self.assert_identical()
+
+    def test_labels(self):
+        res = self.client.get(FLAT_FLIGHT_URL)
+
+        first, second = res.data["results"][:2]
+        self.assertEqual(second["route"], "Heathrow - Schiphol")
+        self.assertEqual(first["departure_time"], "30-03-2030 21:45")
+        self.assertNotEqual(first["airplane"], "Embraer E195")
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight, Ticket
+from airport.reference_cache import reference_cache
+from airport.tests.tests_airport_api import (
+    sample_airplane,
+    sample_crew_position,
+    sample_order,
+    sample_route,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+@override_settings(
+    REFERENCE_CACHE_CHECK_INTERVAL=3600,
+    THROTTLE_STORE="airport.throttling.CacheBucketStore",
+)
+class FlightQueryBudgetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        route = sample_route()
+        airplane = sample_airplane()
+        for index in range(2):
+            airplane.crew.add(
+                Crew.objects.create(
+                    first_name=f"Name{index}",
+                    last_name="Doe",
+                    position=sample_crew_position(position=f"Position{index}"),
+                )
+            )
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=timezone.now() + timedelta(days=index),
+                arrival_time=timezone.now() + timedelta(days=index, hours=5),
+            )
+            for index in range(5)
+        ]
+        Ticket.objects.create(
+            row=1, seat=1, flight=self.flights[0], order=sample_order()
+        )
+        reference_cache.warm()
+
+    def test_flight_list_query_count_is_constant(self):
+        # Conditional GET validators and the flights themselves
+        with self.assertNumQueries(3):
+            res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 5)
+        available = {
+            flight["id"]: flight["available_tickets"]
+            for flight in res.data["results"]
+        }
+        self.assertEqual(available[self.flights[0].id], 59)
+        self.assertEqual(available[self.flights[1].id], 60)
+
+    def test_flight_detail_query_count_is_constant(self):
+        url = reverse("airport:flight-detail", args=[self.flights[0].id])
+
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["available_tickets"], 59)
+        self.assertEqual(len(res.data["airplane"]["crew"]), 2)
+
+
+class FlightDateFilterTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        route = sample_route()
+        airplane = sample_airplane()
+        self.late = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2030, 5, 1, 22, 30, tzinfo=dt_timezone.utc),
+            arrival_time=datetime(2030, 5, 2, 3, 30, tzinfo=dt_timezone.utc),
+        )
+        self.early = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2030, 5, 2, 0, 30, tzinfo=dt_timezone.utc),
+            arrival_time=datetime(2030, 5, 2, 5, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def departing(self, date):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(FLIGHT_URL, {"departure_time": date})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn("cast_date", query["sql"])
+            self.assertNotIn("::date", query["sql"])
+        return {flight["id"] for flight in res.data["results"]}
+
+    def test_departure_date_is_a_day_in_utc(self):
+        self.assertEqual(self.departing("2030-05-01"), {self.late.id})
+        self.assertEqual(self.departing("2030-05-02"), {self.early.id})
+
+    def test_departure_date_follows_active_timezone(self):
+        with timezone.override("Europe/Kyiv"):
+            self.assertEqual(self.departing("2030-05-01"), set())
+            self.assertEqual(
+                self.departing("2030-05-02"), {self.late.id, self.early.id}
+            )
+
+    def test_departure_date_in_requested_timezone(self):
+        res = self.client.get(
+            FLIGHT_URL, {"departure_time": "2030-05-02", "tz": "Europe/Kyiv"}
+        )
+
+        self.assertEqual(
+            {flight["id"] for flight in res.data["results"]},
+            {self.late.id, self.early.id},
+        )
+
+    def test_unknown_timezone_is_rejected(self):
+        res = self.client.get(
+            FLIGHT_URL, {"departure_time": "2030-05-02", "tz": "Mars/Olympus"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tz", res.data)
+
+    def test_arrival_date_is_lower_bound(self):
+        res = self.client.get(FLIGHT_URL, {"arrival_time": "2030-05-02"})
+
+        self.assertEqual(
+            {flight["id"] for flight in res.data["results"]},
+            {self.late.id, self.early.id},
+        )
@@ -0,0 +1,170 @@
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from airport.models import Airport, Flight, Route, TableVersion
+from airport.reference_cache import reference_cache
+from airport.tests.tests_airport_api import sample_airplane
+
+
+class ImportScheduleTests(TestCase):
+    def setUp(self) -> None:
+        reference_cache.clear()
+        self.addCleanup(reference_cache.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.airplane = sample_airplane()
+
+        self.airports = self.write(
+            "airports.csv",
+            "code,name,closest_big_city\n"
+            "KBP,Boryspil,Kyiv\n"
+            "LHR,Heathrow,London\n"
+            "AMS,Schiphol,Amsterdam\n",
+        )
+        self.routes = self.write_jsonl(
+            "routes.jsonl",
+            [
+                {"source": "KBP", "destination": "LHR", "distance": 1340},
+                {"source": "lhr", "destination": "AMS", "distance": 230},
+            ],
+        )
+        self.flights = self.write(
+            "flights.csv",
+            "source,destination,airplane,departure_time,arrival_time\n"
+            + "".join(
+                f"KBP,LHR,{self.airplane.id},2030-05-{day:02d}T08:00:00+00:00,"
+                f"2030-05-{day:02d}T11:30:00+00:00\n"
+                for day in range(1, 8)
+            )
+            + f"LHR,AMS,{self.airplane.id},2030-05-01T13:00,2030-05-01T14:10\n",
+        )
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content)
+        return str(path)
+
+    def write_jsonl(self, name, rows):
+        return self.write(name, "".join(json.dumps(row) + "\n" for row in rows))
+
+    def run_import(self, **options):
+        out = StringIO()
+        call_command(
+            "import_schedule", stdout=out, stderr=StringIO(), batch_size=3, **options
+        )
+        return out.getvalue()
+
+    def test_imports_airports_routes_and_flights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            out = self.run_import(
+                airports=self.airports, routes=self.routes, flights=self.flights
+            )
+
+        self.assertIn("Airports: 3 created", out)
+        self.assertIn("Routes: 2 created", out)
+        self.assertIn("Flights: 8 created", out)
+        route = Route.objects.get(source__code="LHR", destination__code="AMS")
+        flight = Flight.objects.get(route=route)
+        self.assertEqual(
+            flight.departure_time, datetime(2030, 5, 1, 13, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(flight.capacity, self.airplane.capacity)
+        self.assertEqual(flight.seats_sold, 0)
+        self.assertEqual(
+            TableVersion.objects.filter(
+                name__in=("airport_airport", "airport_route", "airport_flight")
+            ).count(),
+            3,
+        )
+
+    def test_rerun_skips_existing_rows(self):
+        options = {
+            "airports": self.airports,
+            "routes": self.routes,
+            "flights": self.flights,
+        }
+        self.run_import(**options)
+
+        out = self.run_import(**options)
+
+        self.assertIn("Airports: 0 created, 3 already existed", out)
+        self.assertIn("Routes: 0 created, 2 already existed", out)
+        self.assertIn("Flights: 0 created, 8 already existed", out)
+        self.assertEqual(Flight.objects.count(), 8)
+
+    def test_invalid_row_stops_with_location(self):
+        self.run_import(airports=self.airports)
+        routes = self.write(
+            "routes.csv",
+            "source,destination,distance\nKBP,LHR,1340\nKBP,XXX,10\n",
+        )
+
+        with self.assertRaisesMessage(
+            CommandError, 'routes.csv:3: Unknown airport "XXX"'
+        ):
+            self.run_import(routes=routes)
+
+    def test_invalid_rows_can_be_skipped(self):
+        self.run_import(airports=self.airports)
+        routes = self.write(
+            "routes.csv",
+            "source,destination,distance\nKBP,LHR,1340\nKBP,XXX,10\nLHR,AMS,\n",
+        )
+
+        out = self.run_import(routes=routes, skip_invalid=True)
+
+        self.assertIn("Routes: 1 created", out)
+        self.assertIn("2 invalid rows skipped", out)
+        self.assertEqual(Airport.objects.count(), 3)
+        self.assertEqual(Route.objects.count(), 1)
+
+    def test_airport_name_of_another_code_is_invalid(self):
+        self.run_import(airports=self.airports)
+        airports = self.write(
+            "more_airports.csv",
+            "code,name,closest_big_city\n"
+            "KBP,Boryspil,Kyiv\n"
+            "CDG,Heathrow,Paris\n"
+            "ORY,Orly,Paris\n"
+            "XOR,Orly,Paris\n",
+        )
+
+        with self.assertRaisesMessage(
+            CommandError,
+            'more_airports.csv:3: Airport "Heathrow" already exists with code "LHR"',
+        ):
+            self.run_import(airports=airports)
+
+        out = self.run_import(airports=airports, skip_invalid=True)
+
+        self.assertIn("Airports: 1 created, 1 already existed", out)
+        self.assertIn("2 invalid rows skipped", out)
+        self.assertEqual(Airport.objects.get(name="Orly").code, "ORY")
+
+    def test_values_too_long_for_the_model_are_invalid(self):
+        airports = self.write(
+            "airports.csv",
+            "code,name,closest_big_city\n"
+            "KBP,Boryspil,Kyiv\n"
+            "LHRX,Heathrow,London\n"
+            f"AMS,{'S' * 300},Amsterdam\n",
+        )
+
+        with self.assertRaisesMessage(
+            CommandError,
+            "airports.csv:3: code: Ensure this value has at most 3 characters",
+        ):
+            self.run_import(airports=airports)
+
+        out = self.run_import(airports=airports, skip_invalid=True)
+
+        self.assertIn("Airports: 1 created", out)
+        self.assertIn("2 invalid rows skipped", out)
+        self.assertEqual(list(Airport.objects.values_list("code", flat=True)), ["KBP"])
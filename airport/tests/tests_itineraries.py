@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.itineraries import flight_graph
+from airport.models import Airport, Flight, Route
+from airport.tests.tests_airport_api import sample_airplane
+
+ITINERARIES_URL = reverse("airport:itineraries")
+DAY = datetime(2030, 5, 1).date()
+
+
+def at(hour, minute=0, days=0):
+    return timezone.make_aware(
+        datetime.combine(DAY, datetime.min.time())
+        + timedelta(days=days, hours=hour, minutes=minute)
+    )
+
+
+@override_settings(THROTTLE_STORE="airport.throttling.CacheBucketStore")
+class ItineraryTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        flight_graph.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane = sample_airplane()
+        self.airports = {
+            code: Airport.objects.create(
+                name=f"Airport {code}", code=code, closest_big_city=code
+            )
+            for code in ("KBP", "WAW", "FRA", "JFK")
+        }
+        self.routes = {}
+
+    def flight(self, source, destination, departure_time, arrival_time):
+        key = (source, destination)
+        if key not in self.routes:
+            self.routes[key] = Route.objects.create(
+                source=self.airports[source],
+                destination=self.airports[destination],
+                distance=100,
+            )
+        return Flight.objects.create(
+            route=self.routes[key],
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
+
+    def search(self, **params):
+        defaults = {"from": "KBP", "to": "JFK", "date": DAY.isoformat()}
+        defaults.update(params)
+        return self.client.get(ITINERARIES_URL, defaults)
+
+    def legs(self, itinerary):
+        return [leg["flight"] for leg in itinerary["legs"]]
+
+    def test_connecting_itineraries_ordered_by_arrival(self):
+        direct = self.flight("KBP", "JFK", at(10), at(20))
+        first = self.flight("KBP", "WAW", at(6), at(8))
+        second = self.flight("WAW", "JFK", at(9), at(17))
+
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [self.legs(itinerary) for itinerary in res.data],
+            [[first.id, second.id], [direct.id]],
+        )
+        self.assertEqual(res.data[0]["connections"], 1)
+        self.assertEqual(res.data[0]["legs"][0]["destination"], "WAW")
+
+    def test_min_connection_time_is_respected(self):
+        self.flight("KBP", "WAW", at(6), at(8))
+        self.flight("WAW", "JFK", at(8, 30), at(17))
+
+        self.assertEqual(self.search(min_connection=60).data, [])
+        self.assertEqual(len(self.search(min_connection=15).data), 1)
+
+    def test_max_legs_is_respected(self):
+        self.flight("KBP", "WAW", at(6), at(7))
+        self.flight("WAW", "FRA", at(8), at(9))
+        self.flight("FRA", "JFK", at(10), at(18))
+
+        self.assertEqual(self.search(max_legs=2).data, [])
+        self.assertEqual(len(self.search(max_legs=3).data), 1)
+
+    def test_connection_on_next_day(self):
+        self.flight("KBP", "WAW", at(22), at(23))
+        self.flight("WAW", "JFK", at(7, days=1), at(15, days=1))
+
+        self.assertEqual(len(self.search().data), 1)
+
+    def test_new_flight_invalidates_cached_day(self):
+        self.assertEqual(self.search().data, [])
+
+        self.flight("KBP", "JFK", at(10), at(20))
+
+        self.assertEqual(len(self.search().data), 1)
+
+    def test_search_reuses_cached_schedule(self):
+        self.flight("KBP", "WAW", at(6), at(8))
+        self.flight("WAW", "JFK", at(9), at(17))
+        self.search()
+
+        with self.assertNumQueries(2):
+            res = self.search()
+        self.assertEqual(len(res.data), 1)
+
+    def test_unknown_airport(self):
+        res = self.search(to="XXX")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_past_days_are_dropped_with_their_flights(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        flight = self.flight(
+            "KBP",
+            "WAW",
+            timezone.make_aware(datetime.combine(yesterday, datetime.min.time())),
+            timezone.make_aware(datetime.combine(yesterday, datetime.max.time())),
+        )
+        flight_graph.departures(yesterday)
+        self.assertIn(flight.id, flight_graph._flight_days)
+
+        flight_graph.departures(DAY)
+
+        self.assertNotIn(yesterday, flight_graph._days)
+        self.assertNotIn(flight.id, flight_graph._flight_days)
@@ -0,0 +1,175 @@
+import json
+import re
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.metrics import registry
+
+METRICS_URL = reverse("metrics")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def metric(text, name, **labels):
+    """Value of the sample with exactly these labels"""
+
+    wanted = ",".join(f'{label}="{value}"' for label, value in labels.items())
+    match = re.search(
+        rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.MULTILINE
+    )
+    return float(match.group(1)) if match else None
+
+
+@override_settings(METRICS_PUBLIC=True)
+class MetricsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def scrape(self, **headers):
+        res = APIClient().get(METRICS_URL, **headers)
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.content.decode()
+
+    def test_requests_are_recorded_per_route(self):
+        for _ in range(2):
+            self.client.get(FLIGHT_URL)
+        self.client.get(reverse("airport:flight-detail", args=[1000]))
+
+        text = self.scrape()
+
+        route = "airport:flight-list"
+        self.assertEqual(
+            metric(
+                text, "http_requests_total", route=route, method="GET", status="200"
+            ),
+            2,
+        )
+        self.assertEqual(
+            metric(
+                text,
+                "http_requests_total",
+                route="airport:flight-detail",
+                method="GET",
+                status="404",
+            ),
+            1,
+        )
+        self.assertEqual(
+            metric(
+                text,
+                "http_request_duration_seconds_bucket",
+                route=route,
+                method="GET",
+                le="+Inf",
+            ),
+            2,
+        )
+        self.assertGreater(
+            metric(text, "http_request_db_queries_total", route=route), 0
+        )
+        for phase in ("db", "view", "render"):
+            self.assertGreater(
+                metric(
+                    text, "http_request_phase_seconds_total", route=route, phase=phase
+                ),
+                0,
+            )
+
+    async def test_async_views_are_recorded(self):
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        res = await AsyncClient().get(
+            reverse("airport:async-flight-list"), headers=headers
+        )
+        self.assertEqual(res.status_code, 200)
+
+        text = await sync_to_async(self.scrape)()
+        route = "airport:async-flight-list"
+        self.assertEqual(
+            metric(
+                text, "http_requests_total", route=route, method="GET", status="200"
+            ),
+            1,
+        )
+        self.assertGreater(
+            metric(text, "http_request_db_queries_total", route=route), 0
+        )
+
+    def test_workers_are_added_up_through_the_metrics_dir(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other_worker = {
+            "requests": [["airport:flight-list", "GET", "200", 5]],
+            "latency": [["airport:flight-list", "GET", [5] + [0] * 10 + [5, 0.01]]],
+            "queries": [["airport:flight-list", 15]],
+            "phases": [["airport:flight-list", "db", 0.002]],
+        }
+        Path(directory.name, "1.json").write_text(json.dumps(other_worker))
+
+        with override_settings(METRICS_DIR=directory.name):
+            self.client.get(FLIGHT_URL)
+            text = self.scrape()
+
+        self.assertEqual(
+            metric(
+                text,
+                "http_requests_total",
+                route="airport:flight-list",
+                method="GET",
+                status="200",
+            ),
+            6,
+        )
+        self.assertEqual(
+            metric(
+                text,
+                "http_request_duration_seconds_count",
+                route="airport:flight-list",
+                method="GET",
+            ),
+            6,
+        )
+
+    @override_settings(METRICS_PUBLIC=False, METRICS_TOKEN="secret")
+    def test_token_guards_the_endpoint(self):
+        self.assertEqual(APIClient().get(METRICS_URL).status_code, 403)
+        self.scrape(HTTP_AUTHORIZATION="Bearer secret")
+
+    @override_settings(METRICS_PUBLIC=False, METRICS_TOKEN="")
+    def test_only_staff_scrape_without_token(self):
+        self.assertEqual(APIClient().get(METRICS_URL).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+    @override_settings(METRICS_PUBLIC=False, METRICS_TOKEN="secret")
+    def test_staff_scrape_with_access_token(self):
+        token = AccessToken.for_user(self.user)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.assertEqual(APIClient().get(METRICS_URL, **headers).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.scrape(**headers)
+        res = APIClient().get(METRICS_URL, HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(res.status_code, 403)
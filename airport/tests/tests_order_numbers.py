@@ -0,0 +1,78 @@
+import re
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from airport.models import Order
+from airport.order_numbers import (
+    ORDER_NUMBER_SPACE,
+    OrderNumbersExhausted,
+    format_order_number,
+    permute,
+)
+
+
+class OrderNumberTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+
+    def test_permutation_has_no_collisions(self):
+        values = {permute(index) for index in range(50_000)}
+
+        self.assertEqual(len(values), 50_000)
+        self.assertTrue(all(0 <= value < ORDER_NUMBER_SPACE for value in values))
+
+    def test_permutation_covers_range_edges(self):
+        self.assertLess(permute(ORDER_NUMBER_SPACE - 1), ORDER_NUMBER_SPACE)
+        with self.assertRaises(OrderNumbersExhausted):
+            permute(ORDER_NUMBER_SPACE)
+
+    def test_format_order_number(self):
+        self.assertEqual(format_order_number(0), "AAA00000")
+        self.assertEqual(format_order_number(ORDER_NUMBER_SPACE - 1), "ZZZ99999")
+        self.assertEqual(format_order_number(100_000 + 42), "AAB00042")
+
+    def test_orders_get_distinct_numbers(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(20)]
+
+        numbers = {order.order_number for order in orders}
+        self.assertEqual(len(numbers), 20)
+        for number in numbers:
+            self.assertRegex(number, re.compile(r"^[A-Z]{3}\d{5}$"))
+
+    def test_order_skips_number_taken_by_legacy_order(self):
+        first = Order.objects.create(user=self.user)
+        legacy_number = format_order_number(permute(1))
+        Order.objects.filter(pk=first.pk).update(order_number="LEG00001")
+        Order.objects.bulk_create(
+            [Order(user=self.user, order_number=legacy_number)]
+        )
+
+        order = Order.objects.create(user=self.user)
+
+        self.assertNotEqual(order.order_number, legacy_number)
+
+    def test_order_number_is_kept_on_update(self):
+        order = Order.objects.create(user=self.user)
+        number = order.order_number
+
+        order.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.order_number, number)
+
+    def test_benchmark_order_numbers_command(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_order_numbers", "--count", "2000", "--insert", stdout=out
+        )
+
+        self.assertIn("No collisions", out.getvalue())
+        self.assertIn("Inserted 2000 orders", out.getvalue())
+        self.assertEqual(Order.objects.count(), 0)
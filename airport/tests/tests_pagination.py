@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order
+from airport.pagination import AirportCursorPagination
+from airport.tests.tests_airport_api import sample_airplane, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_flights(self, count):
+        route = sample_route()
+        airplane = sample_airplane()
+        departure_time = timezone.now()
+        return [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time + timedelta(hours=index // 2),
+                arrival_time=departure_time + timedelta(hours=index // 2 + 5),
+            )
+            for index in range(count)
+        ]
+
+    def test_flight_pages_follow_departure_time(self):
+        flights = self.create_flights(5)
+
+        ids = []
+        url = FLIGHT_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            ids.extend(flight["id"] for flight in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(ids, [flight.id for flight in flights])
+
+    def test_flight_previous_cursor(self):
+        self.create_flights(4)
+
+        first = self.client.get(FLIGHT_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_page_size_is_capped(self):
+        self.create_flights(3)
+
+        with mock.patch.object(AirportCursorPagination, "max_page_size", 2):
+            res = self.client.get(FLIGHT_URL, {"page_size": 10_000})
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_orders_newest_first(self):
+        first = Order.objects.create(user=self.user)
+        second = Order.objects.create(user=self.user)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [order["id"] for order in res.data["results"]], [second.id, first.id]
+        )
@@ -0,0 +1,109 @@
+import datetime
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from airport.models import Flight, Ticket
+from airport.partitions import (
+    FLIGHT_DEFAULT_PARTITION,
+    add_months,
+    flight_partition_name,
+    month_bounds,
+    month_start,
+)
+from airport.tests.tests_airport_api import sample_flight, sample_order
+
+
+def partition_of(model, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT tableoid::regclass::text FROM {model._meta.db_table} "
+            f"WHERE id = %s",
+            [pk],
+        )
+        return cursor.fetchone()[0]
+
+
+class PartitionMonthTests(SimpleTestCase):
+    def test_months_roll_over_years(self):
+        self.assertEqual(
+            add_months(datetime.date(2026, 11, 1), 3), datetime.date(2027, 2, 1)
+        )
+        self.assertEqual(
+            add_months(datetime.date(2026, 1, 1), -1), datetime.date(2025, 12, 1)
+        )
+
+    def test_bounds_cover_the_month_in_utc(self):
+        start, end = month_bounds(datetime.date(2026, 12, 1))
+
+        self.assertEqual(
+            start, datetime.datetime(2026, 12, 1, tzinfo=datetime.timezone.utc)
+        )
+        self.assertEqual(
+            end, datetime.datetime(2027, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        self.assertEqual(
+            flight_partition_name(datetime.date(2026, 2, 1)), "airport_flight_y2026m02"
+        )
+
+
+@skipUnless(connection.vendor != "postgresql", "tables are partitioned")
+class UnpartitionedTests(TestCase):
+    def test_command_leaves_plain_tables_alone(self):
+        out = StringIO()
+
+        call_command("create_flight_partitions", stdout=out)
+
+        self.assertIn("not partitioned", out.getvalue())
+
+
+@skipUnless(connection.vendor == "postgresql", "partitioning is PostgreSQL only")
+class PartitionTests(TestCase):
+    def test_flights_are_stored_in_their_month(self):
+        flight = sample_flight(departure_time=timezone.now())
+
+        self.assertEqual(
+            partition_of(Flight, flight.id),
+            flight_partition_name(month_start(flight.departure_time)),
+        )
+
+    def test_day_filter_scans_one_partition(self):
+        start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        plan = Flight.objects.filter(
+            departure_time__gte=start,
+            departure_time__lt=start + datetime.timedelta(days=1),
+        ).explain()
+
+        self.assertIn(flight_partition_name(month_start(start)), plan)
+        self.assertNotIn(FLIGHT_DEFAULT_PARTITION, plan)
+        self.assertNotIn(flight_partition_name(add_months(month_start(start), 1)), plan)
+
+    def test_tickets_of_a_flight_share_a_partition(self):
+        flight = sample_flight()
+        order = sample_order()
+        tickets = [
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+            for seat in range(1, 5)
+        ]
+
+        partitions = {partition_of(Ticket, ticket.id) for ticket in tickets}
+
+        self.assertEqual(len(partitions), 1)
+
+    def test_command_moves_flights_out_of_the_default_partition(self):
+        month = add_months(month_start(timezone.now()), 24)
+        departure, _ = month_bounds(month)
+        flight = sample_flight(
+            departure_time=departure,
+            arrival_time=departure + datetime.timedelta(hours=5),
+        )
+        self.assertEqual(partition_of(Flight, flight.id), FLIGHT_DEFAULT_PARTITION)
+
+        call_command("create_flight_partitions", "--months", "24", stdout=StringIO())
+
+        self.assertEqual(partition_of(Flight, flight.id), flight_partition_name(month))
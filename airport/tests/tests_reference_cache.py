@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from airport.models import Airport, Route
+from airport.reference_cache import reference_cache
+from airport.versions import bump_table_version, table_versions
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self) -> None:
+        reference_cache.clear()
+        self.airport = Airport.objects.create(
+            name="Boryspil", code="KBP", closest_big_city="Kyiv"
+        )
+
+    def test_get_returns_cached_row(self):
+        reference_cache.warm()
+
+        with self.assertNumQueries(0):
+            row = reference_cache.get(Airport, self.airport.id)
+
+        self.assertEqual(row.name, "Boryspil")
+        self.assertEqual(row.code, "KBP")
+
+    def test_save_invalidates_table(self):
+        reference_cache.warm()
+
+        self.airport.name = "Kyiv Boryspil"
+        self.airport.save()
+
+        self.assertEqual(
+            reference_cache.get(Airport, self.airport.id).name, "Kyiv Boryspil"
+        )
+
+    def test_save_bumps_shared_version(self):
+        before = table_versions(["airport_airport"])["airport_airport"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.airport.delete()
+
+        self.assertEqual(
+            table_versions(["airport_airport"])["airport_airport"], before + 1
+        )
+
+    @override_settings(REFERENCE_CACHE_CHECK_INTERVAL=0)
+    def test_change_from_other_process_is_picked_up(self):
+        reference_cache.warm()
+        Airport.objects.filter(pk=self.airport.pk).update(name="Renamed")
+
+        self.assertEqual(reference_cache.get(Airport, self.airport.id).name, "Boryspil")
+
+        bump_table_version("airport_airport")
+
+        self.assertEqual(reference_cache.get(Airport, self.airport.id).name, "Renamed")
+
+    def test_missing_row_reloads_table(self):
+        reference_cache.warm()
+        other = Airport.objects.create(
+            name="Heathrow", code="LHR", closest_big_city="London"
+        )
+        route = Route.objects.create(
+            source=self.airport, destination=other, distance=1500
+        )
+
+        self.assertEqual(reference_cache.get(Route, route.id).destination_id, other.id)
+
+    def test_missing_row_is_fetched_alone(self):
+        reference_cache.warm()
+        (other,) = Airport.objects.bulk_create(
+            [Airport(name="Heathrow", code="LHR", closest_big_city="London")]
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(reference_cache.get(Airport, other.id).code, "LHR")
+        with self.assertNumQueries(0):
+            reference_cache.get(Airport, other.id)
+
+    def test_unknown_row_raises_not_found(self):
+        reference_cache.warm()
+
+        with self.assertRaises(Http404):
+            reference_cache.get(Airport, self.airport.id + 1000)
+
+    def test_warm_reference_cache_command(self):
+        out = StringIO()
+
+        call_command("warm_reference_cache", stdout=out)
+
+        self.assertIn("airport_airport: 1 rows", out.getvalue())
@@ -0,0 +1,138 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connections, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Flight, Order, ThrottleBucket
+from airport.replicas import (
+    PRIMARY,
+    ReplicaRouter,
+    RoutingState,
+    check_pin_cache,
+    current_routing,
+    pin_key,
+    read_from,
+    replicas,
+)
+from airport.tests.tests_airport_api import sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self) -> None:
+        token = current_routing.set(RoutingState())
+        self.addCleanup(current_routing.reset, token)
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_the_chosen_replica(self):
+        self.assertEqual(self.router.db_for_read(Flight), PRIMARY)
+
+        read_from("replica_1")
+
+        self.assertEqual(self.router.db_for_read(Flight), "replica_1")
+        self.assertEqual(self.router.db_for_write(Flight), PRIMARY)
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        read_from("replica_1")
+
+        self.router.db_for_write(Order)
+
+        self.assertEqual(self.router.db_for_read(Flight), PRIMARY)
+
+    def test_bookkeeping_writes_are_ignored(self):
+        read_from("replica_1")
+
+        self.router.db_for_write(ThrottleBucket)
+
+        self.assertEqual(self.router.db_for_read(Flight), "replica_1")
+
+    def test_reads_in_transactions_stay_on_the_primary(self):
+        read_from("replica_1")
+
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Flight), PRIMARY)
+
+
+# The primary stands in for a replica, the test database has no other
+@override_settings(DATABASE_REPLICAS=[PRIMARY])
+class ReplicaReadTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        replicas.clear()
+        self.addCleanup(replicas.clear)
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def routed_to(self, url, client=None):
+        with mock.patch("airport.replicas.read_from", wraps=read_from) as spy:
+            res = (client or self.client).get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return spy.call_args.args[0]
+
+    def test_list_and_retrieve_read_from_a_replica(self):
+        self.assertEqual(self.routed_to(FLIGHT_URL), PRIMARY)
+        self.assertEqual(
+            self.routed_to(reverse("airport:flight-detail", args=[self.flight.id])),
+            PRIMARY,
+        )
+
+    def test_writer_is_pinned_to_the_primary(self):
+        self.assertIsNone(cache.get(pin_key(self.user.pk)))
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.data)
+
+        self.assertTrue(cache.get(pin_key(self.user.pk)))
+        self.assertIsNone(self.routed_to(FLIGHT_URL))
+
+    def test_reads_do_not_pin(self):
+        self.routed_to(FLIGHT_URL)
+
+        self.assertIsNone(cache.get(pin_key(self.user.pk)))
+
+    def test_check_requires_a_shared_cache(self):
+        errors = check_pin_cache(None)
+        self.assertEqual([error.id for error in errors], ["airport.E001"])
+
+        redis = {"BACKEND": "django.core.cache.backends.redis.RedisCache"}
+        with override_settings(CACHES={"default": redis}):
+            self.assertEqual(check_pin_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_pin_cache(None), [])
+
+    def test_unreachable_replica_is_skipped_for_a_while(self):
+        with mock.patch.object(
+            connections[PRIMARY], "ensure_connection", side_effect=OperationalError
+        ) as ensure_connection, self.assertLogs("airport.replicas", "WARNING"):
+            self.assertIsNone(replicas.choose())
+            self.assertIsNone(replicas.choose())
+
+        self.assertEqual(ensure_connection.call_count, 1)
+
+    async def test_async_views_read_from_a_replica(self):
+        headers = {"authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        with mock.patch("airport.async_views.read_from", wraps=read_from) as spy:
+            res = await self.async_client.get(
+                reverse("airport:async-flight-list"), headers=headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        spy.assert_called_once_with(PRIMARY)
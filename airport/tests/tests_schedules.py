@@ -0,0 +1,191 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Flight, FlightSchedule, Ticket
+from airport.schedules import materialize_schedule, schedule_departures
+from airport.tests.tests_airport_api import (
+    sample_airplane,
+    sample_order,
+    sample_route,
+)
+
+SCHEDULE_URL = reverse("airport:flightschedule-list")
+
+MON_WED_FRI = 0b10101
+
+
+def local(day, hour=8, minute=15):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class MaterializeScheduleTests(TestCase):
+    def setUp(self) -> None:
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        # 2030-05-06 is a Monday, two weeks of Mon/Wed/Fri departures
+        self.schedule = FlightSchedule.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            weekdays=MON_WED_FRI,
+            departure_time=time(8, 15),
+            duration=timedelta(hours=3, minutes=30),
+            start_date=date(2030, 5, 6),
+            end_date=date(2030, 5, 19),
+        )
+
+    def departures(self):
+        return list(
+            Flight.objects.filter(schedule=self.schedule)
+            .order_by("departure_time")
+            .values_list("departure_time", flat=True)
+        )
+
+    def test_departures_follow_weekdays(self):
+        self.assertEqual(
+            list(schedule_departures(self.schedule)),
+            [local(date(2030, 5, day)) for day in (6, 8, 10, 13, 15, 17)],
+        )
+
+    def test_flights_are_bulk_created_in_batches(self):
+        # Savepoint, lock, existing flights, one insert per batch, release
+        with self.assertNumQueries(7):
+            result = materialize_schedule(self.schedule, batch_size=2)
+
+        self.assertEqual(result.created, 6)
+        self.assertEqual(len(self.departures()), 6)
+        flight = Flight.objects.filter(schedule=self.schedule).first()
+        self.assertEqual(flight.capacity, self.airplane.capacity)
+        self.assertEqual(
+            flight.arrival_time - flight.departure_time, timedelta(hours=3, minutes=30)
+        )
+
+    def test_materialize_is_idempotent(self):
+        materialize_schedule(self.schedule)
+        result = materialize_schedule(self.schedule)
+
+        self.assertEqual((result.created, result.updated, result.deleted), (0, 0, 0))
+        self.assertEqual(len(self.departures()), 6)
+
+    def test_regenerating_keeps_flights_with_sold_tickets(self):
+        materialize_schedule(self.schedule)
+        sold = Flight.objects.get(departure_time=local(date(2030, 5, 8)))
+        Ticket.objects.create(row=1, seat=1, flight=sold, order=sample_order())
+
+        self.schedule.weekdays = 0b00001
+        self.schedule.departure_time = time(9, 0)
+        self.schedule.save()
+        result = materialize_schedule(self.schedule)
+
+        self.assertEqual(result.kept, 1)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.deleted, 5)
+        self.assertEqual(
+            self.departures(),
+            [
+                local(date(2030, 5, 6), 9, 0),
+                local(date(2030, 5, 8)),
+                local(date(2030, 5, 13), 9, 0),
+            ],
+        )
+
+    def test_window_only_touches_its_dates(self):
+        materialize_schedule(self.schedule)
+        other = Airplane.objects.create(
+            name="Other",
+            row=20,
+            seats_in_row=4,
+            airplane_type=self.airplane.airplane_type,
+        )
+        self.schedule.airplane = other
+        self.schedule.save()
+
+        result = materialize_schedule(self.schedule, start=date(2030, 5, 13))
+
+        self.assertEqual(result.updated, 3)
+        flights = Flight.objects.filter(schedule=self.schedule)
+        self.assertEqual(flights.filter(airplane=other, capacity=80).count(), 3)
+        self.assertEqual(flights.filter(airplane=self.airplane).count(), 3)
+
+    def test_command_materializes_all_schedules(self):
+        out = StringIO()
+        call_command("materialize_schedules", start="2030-05-01", stdout=out)
+
+        self.assertIn(f"Schedule {self.schedule.id}: 6 created", out.getvalue())
+
+
+class FlightScheduleApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.admin)
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "weekdays": ["mon", "wed", "fri"],
+            "departure_time": "08:15",
+            "duration": "03:30:00",
+            "start_date": "2030-05-06",
+            "end_date": "2030-05-19",
+        }
+
+    def test_create_schedule_materializes_flights(self):
+        res = self.client.post(SCHEDULE_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["weekdays"], ["mon", "wed", "fri"])
+        schedule = FlightSchedule.objects.get(id=res.data["id"])
+        self.assertEqual(schedule.weekdays, MON_WED_FRI)
+        self.assertEqual(Flight.objects.filter(schedule=schedule).count(), 6)
+
+    def test_invalid_schedule_is_rejected(self):
+        cases = (
+            {"weekdays": []},
+            {"weekdays": ["funday"]},
+            {"duration": "00:00:00"},
+            {"end_date": "2030-05-01"},
+        )
+        for change in cases:
+            with self.subTest(change=change):
+                res = self.client.post(
+                    SCHEDULE_URL, {**self.payload, **change}, format="json"
+                )
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_materialize_action_reports_counts(self):
+        schedule_id = self.client.post(SCHEDULE_URL, self.payload, format="json").data[
+            "id"
+        ]
+        url = reverse("airport:flightschedule-materialize", args=[schedule_id])
+
+        res = self.client.post(url, {"start": "2030-05-13"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, {"created": 0, "updated": 0, "deleted": 0, "kept": 0}
+        )
+
+    def test_only_admin_can_create_schedule(self):
+        user = get_user_model().objects.create_user(
+            "test@test.com", "testpass", username="user"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.post(SCHEDULE_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
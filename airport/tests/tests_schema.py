@@ -0,0 +1,84 @@
+import json
+from contextlib import redirect_stderr
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import schema
+from airport.schema import schema_cache
+
+SCHEMA_URL = reverse("schema")
+
+
+class CachedSchemaTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+        self.client = APIClient()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "schema.json"
+        settings = override_settings(OPENAPI_SCHEMA_FILE=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def build(self):
+        out = StringIO()
+        # drf-spectacular prints its generator warnings straight to stderr
+        with redirect_stderr(StringIO()):
+            call_command("build_openapi_schema", stdout=out)
+        return out.getvalue()
+
+    def test_command_writes_schema_file(self):
+        self.assertIn(str(self.path), self.build())
+
+        written = json.loads(self.path.read_text())
+        self.assertIn("/api/airport/flight/", written["paths"])
+
+    def test_schema_is_served_from_file_without_generating(self):
+        self.build()
+
+        with mock.patch.object(schema, "generate_schema") as generate:
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+
+        generate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(json.loads(res.content), json.loads(self.path.read_text()))
+
+    def test_yaml_is_the_default_format(self):
+        self.build()
+
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res["Content-Type"], "application/vnd.oai.openapi")
+        self.assertTrue(res.content.startswith(b"openapi:"))
+
+    def test_matching_etag_returns_not_modified(self):
+        self.build()
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        other = self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+        self.assertNotEqual(other["ETag"], etag)
+
+    def test_missing_file_is_generated_once(self):
+        with mock.patch.object(
+            schema, "generate_schema", return_value={"openapi": "3.0.3", "paths": {}}
+        ) as generate, self.assertLogs("airport.schema", "WARNING"):
+            self.client.get(SCHEMA_URL)
+            self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+
+        generate.assert_called_once()
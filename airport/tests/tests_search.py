@@ -0,0 +1,99 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, AirplaneType, Route
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class SearchTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.boryspil = Airport.objects.create(
+            name="Boryspil International", code="KBP", closest_big_city="Kyiv"
+        )
+        self.zhuliany = Airport.objects.create(
+            name="Kyiv Zhuliany", code="IEV", closest_big_city="Kyiv"
+        )
+        self.heathrow = Airport.objects.create(
+            name="Heathrow", code="LHR", closest_big_city="London"
+        )
+
+    def test_search_airports(self):
+        res = self.client.get(AIRPORT_URL, {"search": "Boryspil"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([airport["id"] for airport in res.data], [self.boryspil.id])
+
+    def test_search_routes_by_airport_name(self):
+        route = Route.objects.create(
+            source=self.boryspil, destination=self.heathrow, distance=1500
+        )
+        Route.objects.create(
+            source=self.zhuliany, destination=self.boryspil, distance=50
+        )
+
+        res = self.client.get(ROUTE_URL, {"search": "Heathrow"})
+
+        self.assertEqual([item["id"] for item in res.data], [route.id])
+
+    def test_without_search_returns_everything(self):
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm is PostgreSQL only")
+    def test_search_ranks_by_similarity(self):
+        res = self.client.get(AIRPORT_URL, {"search": "Borispil Internationl"})
+
+        self.assertEqual(res.data[0]["id"], self.boryspil.id)
+
+
+@skipUnless(connection.vendor == "postgresql", "pg_trgm is PostgreSQL only")
+class TrigramIndexExplainTests(TestCase):
+    def setUp(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_airport_icontains_uses_index(self):
+        self.assertUsesIndex(
+            Airport.objects.filter(name__icontains="bory"),
+            "airport_airport_name_trgm",
+        )
+        self.assertUsesIndex(
+            Airport.objects.filter(closest_big_city__icontains="kyi"),
+            "airport_airport_closest_big_city_trgm",
+        )
+
+    def test_route_source_icontains_uses_airport_index(self):
+        self.assertUsesIndex(
+            Route.objects.filter(source__name__icontains="bory"),
+            "airport_airport_name_trgm",
+        )
+
+    def test_airplane_type_icontains_uses_index(self):
+        self.assertUsesIndex(
+            AirplaneType.objects.filter(brand__icontains="boe"),
+            "airport_airplanetype_brand_trgm",
+        )
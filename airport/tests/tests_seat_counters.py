@@ -0,0 +1,138 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def order(self, *seats):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def counters(self):
+        self.flight.refresh_from_db()
+        return self.flight.capacity, self.flight.seats_sold
+
+    def test_flight_stores_airplane_capacity(self):
+        self.assertEqual(self.counters(), (60, 0))
+
+        airplane = self.flight.airplane
+        airplane.row = 12
+        airplane.save()
+
+        self.assertEqual(self.counters(), (72, 0))
+
+    def test_order_counts_sold_seats(self):
+        res = self.order((1, 1), (1, 2), (2, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.counters(), (60, 3))
+
+    def test_deleting_tickets_releases_seats(self):
+        self.order((1, 1), (1, 2), (2, 1))
+        order = Order.objects.get()
+
+        order.tickets.first().delete()
+        self.assertEqual(self.counters(), (60, 2))
+
+        order.delete()
+        self.assertEqual(self.counters(), (60, 0))
+
+    def test_single_ticket_save_counts_seat(self):
+        Ticket.objects.create(
+            row=3, seat=3, flight=self.flight, order=Order.objects.create(user=self.user)
+        )
+
+        self.assertEqual(self.counters(), (60, 1))
+
+    def test_moving_ticket_moves_sold_seat(self):
+        other = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=self.flight.departure_time,
+            arrival_time=self.flight.arrival_time,
+        )
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(row=3, seat=3, flight=self.flight, order=order)
+
+        ticket.flight = other
+        ticket.save()
+
+        other.refresh_from_db()
+        self.assertEqual(self.counters(), (60, 0))
+        self.assertEqual(other.seats_sold, 1)
+
+    def test_moving_ticket_through_the_api_moves_sold_seat(self):
+        other = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=self.flight.departure_time,
+            arrival_time=self.flight.arrival_time,
+        )
+        self.order((1, 1))
+        ticket = Ticket.objects.get()
+
+        res = self.client.patch(
+            reverse("airport:ticket-detail", args=[ticket.id]), {"flight": other.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        other.refresh_from_db()
+        self.assertEqual(self.counters(), (60, 0))
+        self.assertEqual(other.seats_sold, 1)
+
+    def test_order_over_capacity_is_rejected(self):
+        Flight.objects.filter(id=self.flight.id).update(seats_sold=59)
+
+        res = self.order((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["tickets"][0]["flight"], str(self.flight.id))
+        self.assertEqual(self.counters(), (60, 59))
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        self.order((1, 1), (1, 2))
+        Flight.objects.filter(id=self.flight.id).update(capacity=0, seats_sold=7)
+
+        out = StringIO()
+        call_command("reconcile_seats_sold", stdout=out)
+        self.assertIn("1 flights drifted", out.getvalue())
+        self.assertEqual(self.counters(), (0, 7))
+
+        out = StringIO()
+        call_command("reconcile_seats_sold", "--fix", stdout=out)
+        self.assertIn("Repaired 1 flights", out.getvalue())
+        self.assertEqual(self.counters(), (60, 2))
+
+        out = StringIO()
+        call_command("reconcile_seats_sold", stdout=out)
+        self.assertIn("All seat counters match", out.getvalue())
@@ -0,0 +1,137 @@
+import base64
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import SeatHold, Ticket
+from airport.tests.tests_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def hold_url(flight):
+    return reverse("airport:flight-hold", args=[flight.id])
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+            username="other",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def hold(self, *seats):
+        return self.client.post(
+            hold_url(self.flight),
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats]},
+            format="json",
+        )
+
+    def order(self, *seats):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_hold_marks_seats_in_seat_map_and_availability(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(res.data["expires_at"])
+
+        seats = self.client.get(
+            reverse("airport:flight-seats", args=[self.flight.id])
+        )
+        self.assertEqual(base64.b64decode(seats.data["bitmap"])[0], 0b11000000)
+
+        detail = self.client.get(
+            reverse("airport:flight-detail", args=[self.flight.id])
+        )
+        self.assertEqual(detail.data["available_tickets"], 58)
+
+    def test_held_seat_conflicts_for_other_user(self):
+        self.hold((2, 2))
+        self.client.force_authenticate(self.other_user)
+
+        self.assertEqual(self.hold((2, 2)).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.order((2, 2)).status_code, status.HTTP_409_CONFLICT)
+
+    def test_order_converts_own_holds(self):
+        self.hold((3, 1), (3, 2))
+
+        res = self.order((3, 1), (3, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_new_hold_replaces_previous_one(self):
+        self.hold((4, 1))
+        self.hold((4, 2))
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(4, 2)]
+        )
+
+    def test_release_holds(self):
+        self.hold((4, 1))
+
+        res = self.client.delete(hold_url(self.flight))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_expired_hold_does_not_block_seat(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=5,
+            seat=5,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(self.hold((5, 5)).status_code, status.HTTP_201_CREATED)
+
+    def test_hold_rejects_seat_outside_airplane(self):
+        res = self.hold((11, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_purge_seat_holds_command(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=5,
+            seat=5,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.hold((6, 1))
+
+        call_command("purge_seat_holds", stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(6, 1)]
+        )
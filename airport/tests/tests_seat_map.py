@@ -0,0 +1,69 @@
+import base64
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Ticket
+from airport.seat_map import build_seat_bitmap, build_seat_grid
+from airport.tests.tests_airport_api import sample_flight, sample_order
+
+
+def seats_url(flight):
+    return reverse("airport:flight-seats", args=[flight.id])
+
+
+class SeatMapTests(TestCase):
+    def test_bitmap_sets_bit_per_occupied_seat(self):
+        bitmap = build_seat_bitmap(2, 3, [(1, 1), (2, 3)])
+
+        self.assertEqual(bytes(bitmap), bytes([0b10000100]))
+
+    def test_grid_marks_occupied_seats(self):
+        grid = build_seat_grid(2, 3, [(1, 2)])
+
+        self.assertEqual(grid, [[0, 1, 0], [0, 0, 0]])
+
+
+@override_settings(THROTTLE_STORE="airport.throttling.CacheBucketStore")
+class FlightSeatsApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        order = sample_order()
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+        Ticket.objects.create(row=10, seat=6, flight=self.flight, order=order)
+
+    def test_seats_bitmap(self):
+        res = self.client.get(seats_url(self.flight))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 10)
+        self.assertEqual(res.data["seats_in_row"], 6)
+        bitmap = base64.b64decode(res.data["bitmap"])
+        self.assertEqual(len(bitmap), 8)
+        self.assertEqual(bitmap[0], 0x80)
+        self.assertEqual(bitmap[7], 0x10)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 2)
+
+    def test_seats_grid(self):
+        res = self.client.get(seats_url(self.flight), {"mode": "grid"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["seats"][0][0], 1)
+        self.assertEqual(res.data["seats"][9][5], 1)
+        self.assertEqual(sum(map(sum, res.data["seats"])), 2)
+
+    def test_seats_uses_constant_queries(self):
+        # Conditional GET validators, flight with airplane, sold and held seats
+        with self.assertNumQueries(4):
+            self.client.get(seats_url(self.flight))
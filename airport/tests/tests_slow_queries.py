@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.metrics import record_query
+from airport.models import SlowQuery
+from airport.slow_queries import (
+    fingerprint,
+    flush,
+    is_pure_read,
+    log_slow_query,
+    slow_queries,
+)
+from airport.tests.tests_airport_api import sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+SLOW_QUERY_URL = reverse("airport:slowquery-list")
+
+
+@override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryLogTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        slow_queries.clear()
+        self.addCleanup(slow_queries.clear)
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_queries_are_recorded_with_their_route_and_plan(self):
+        sample_flight()
+        self.client.get(FLIGHT_URL)
+        self.client.get(FLIGHT_URL)
+        flush()
+
+        flight_queries = SlowQuery.objects.filter(sql__contains="airport_flight")
+        from_view = flight_queries.filter(view="airport:flight-list")
+        self.assertTrue(from_view.exists())
+        query = from_view.get(sql__contains='INNER JOIN "airport_route"', calls=2)
+        self.assertGreater(query.total_time, 0)
+        self.assertGreaterEqual(query.total_time, query.max_time)
+        self.assertNotEqual(query.plan, "")
+
+    def test_queries_outside_requests_are_recorded(self):
+        sample_flight()
+        flush()
+
+        self.assertTrue(SlowQuery.objects.filter(view="-").exists())
+
+    @override_settings(SLOW_QUERY_LOG=False)
+    def test_nothing_is_logged_when_off(self):
+        slow_queries.clear()
+        self.client.get(FLIGHT_URL)
+        flush()
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_fingerprint_ignores_values(self):
+        first, first_key = fingerprint(
+            "SELECT * FROM t WHERE a = 1 AND b IN (%s, %s, %s) AND c = 'x'"
+        )
+        second, second_key = fingerprint(
+            "SELECT *  FROM t WHERE a = 22 AND b IN (%s) AND c = 'it''s'"
+        )
+
+        self.assertEqual(first, "SELECT * FROM t WHERE a = ? AND b IN (...) AND c = ?")
+        self.assertEqual(first_key, second_key)
+
+    def test_only_pure_reads_are_analyzed(self):
+        for sql in (
+            'SELECT COUNT(*) FROM "airport_flight" WHERE "id" IN (%s, %s)',
+            "SELECT MAX(\"expires_at\") FILTER (WHERE \"row\" = 'nextval(x)') FROM t",
+        ):
+            self.assertTrue(is_pure_read(sql), sql)
+        for sql in (
+            "SELECT nextval('airport_flight_id_seq')",
+            "SELECT pg_advisory_xact_lock(%s)",
+            'SELECT "id" FROM "airport_throttlebucket" WHERE "key" = %s FOR UPDATE',
+            'SELECT "id" FROM "airport_ticket" FOR NO KEY UPDATE SKIP LOCKED',
+        ):
+            self.assertFalse(is_pure_read(sql), sql)
+
+    def test_reconnecting_keeps_one_wrapper_each(self):
+        connection.ensure_connection()
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+        wrappers = connection.execute_wrappers
+        self.assertEqual(wrappers.count(log_slow_query), 1)
+        self.assertEqual(wrappers.count(record_query), 1)
+
+    def test_endpoint_is_staff_only(self):
+        self.client.get(FLIGHT_URL)
+
+        res = self.client.get(SLOW_QUERY_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(SLOW_QUERY_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(any(row["view"] == "airport:flight-list" for row in res.data))
+
+    def test_report_command(self):
+        self.client.get(FLIGHT_URL)
+        out = StringIO()
+
+        call_command("slow_query_report", "--limit", "3", "--clear", stdout=out)
+
+        self.assertIn("calls", out.getvalue())
+        self.assertIn("slow queries cleared", out.getvalue())
+        self.assertFalse(SlowQuery.objects.exists())
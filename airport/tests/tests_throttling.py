@@ -0,0 +1,183 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.throttling import (
+    BucketLimiter,
+    CacheBucketStore,
+    DatabaseBucketStore,
+    FileBucketStore,
+    ScopedBucketThrottle,
+    limiter,
+)
+
+REGISTER_URL = reverse("user:create")
+
+NOW = 1_900_000_000.0
+CAPACITY = 30
+# 30/day
+RATE = CAPACITY / 86400
+
+
+class CountingStore:
+    def __init__(self, store):
+        self.store = store
+        self.calls = 0
+
+    def take(self, *args):
+        self.calls += 1
+        return self.store.take(*args)
+
+
+@override_settings(THROTTLE_LEASE_SECONDS=1.0)
+class BucketLimiterTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.stores = {
+            "cache": CacheBucketStore(),
+            "database": DatabaseBucketStore(),
+            "file": FileBucketStore(Path(directory.name) / "buckets.sqlite3"),
+        }
+
+    def allowed(self, workers, requests, now=NOW):
+        return sum(
+            workers[index % len(workers)].allow("client", CAPACITY, RATE, now)[0]
+            for index in range(requests)
+        )
+
+    def test_workers_together_never_exceed_the_bucket(self):
+        for name, store in self.stores.items():
+            with self.subTest(store=name):
+                workers = [BucketLimiter(store) for _ in range(3)]
+
+                self.assertEqual(self.allowed(workers, 100), CAPACITY)
+
+    def test_bucket_refills_at_its_rate(self):
+        for name, store in self.stores.items():
+            with self.subTest(store=name):
+                worker = BucketLimiter(store)
+                self.allowed([worker], CAPACITY)
+
+                allowed, wait = worker.allow("client", CAPACITY, RATE, NOW)
+                self.assertFalse(allowed)
+                self.assertAlmostEqual(wait, 86400 / CAPACITY)
+
+                later = NOW + 2 * 86400 / CAPACITY
+                self.assertEqual(self.allowed([worker], 5, later), 2)
+
+    def test_tokens_are_leased_in_batches(self):
+        store = CountingStore(self.stores["cache"])
+        worker = BucketLimiter(store)
+
+        self.assertEqual(self.allowed([worker], CAPACITY), CAPACITY)
+        # A tenth of the bucket per round trip
+        self.assertEqual(store.calls, 10)
+
+    def test_refusals_are_repeated_locally_until_the_lease_ends(self):
+        store = CountingStore(self.stores["cache"])
+        worker = BucketLimiter(store)
+        self.allowed([worker], CAPACITY + 1)
+        calls = store.calls
+
+        self.assertEqual(self.allowed([worker], 50, NOW + 0.5), 0)
+        self.assertEqual(store.calls, calls)
+
+        self.assertEqual(self.allowed([worker], 1, NOW + 1.5), 0)
+        self.assertEqual(store.calls, calls + 1)
+
+    def test_unused_leases_go_back_to_the_bucket(self):
+        store = self.stores["cache"]
+        first, second = BucketLimiter(store), BucketLimiter(store)
+        self.allowed([first], 1)
+        self.allowed([second], CAPACITY)
+
+        # The lease of the first worker ended with two tokens left
+        self.assertEqual(self.allowed([first], 5, NOW + 1.5), 2)
+
+    def test_locked_bucket_allows_the_request(self):
+        store = mock.Mock()
+        store.take.side_effect = TimeoutError("Throttle bucket client stays locked")
+        worker = BucketLimiter(store)
+
+        with self.assertLogs("airport.throttling", "WARNING"):
+            self.assertEqual(worker.allow("client", CAPACITY, RATE, NOW), (True, 0.0))
+
+    def test_locked_database_bucket_allows_the_request(self):
+        store = DatabaseBucketStore()
+        store.lock_timeout = 0
+        worker = BucketLimiter(store)
+
+        with mock.patch.object(
+            DatabaseBucketStore,
+            "take_locked",
+            side_effect=OperationalError("could not obtain lock on row"),
+        ):
+            with self.assertLogs("airport.throttling", "WARNING"):
+                allowed = worker.allow("client", CAPACITY, RATE, NOW)
+
+        self.assertEqual(allowed, (True, 0.0))
+
+    def test_expired_leases_are_given_back_without_traffic(self):
+        store = self.stores["database"]
+        first, second = BucketLimiter(store), BucketLimiter(store)
+        self.allowed([first], 1)
+
+        # A request for another client a lease later gives back the two
+        # tokens the first worker leased and never used
+        first.allow("other client", CAPACITY, RATE, NOW + 1.5)
+
+        self.assertEqual(self.allowed([second], 50, NOW + 1.5), CAPACITY - 1)
+
+    def test_small_buckets_store_allowed_requests_only(self):
+        capacity, rate = 10, 10 / 86400
+        store = CountingStore(self.stores["database"])
+        worker = BucketLimiter(store)
+
+        allowed = [worker.allow("client", capacity, rate, NOW)[0] for _ in range(15)]
+        self.assertEqual(allowed.count(True), capacity)
+        self.assertEqual(store.calls, capacity + 1)
+
+        # Nothing can be given back early, the refusal lasts until a refill
+        later = NOW + 86400 / capacity
+        self.assertFalse(worker.allow("client", capacity, rate, later - 60)[0])
+        self.assertEqual(store.calls, capacity + 1)
+        self.assertTrue(worker.allow("client", capacity, rate, later)[0])
+        self.assertEqual(store.calls, capacity + 2)
+
+
+class ScopedThrottleApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        limiter.clear()
+        self.addCleanup(limiter.clear)
+        self.client = APIClient()
+
+    def test_auth_scope_is_throttled(self):
+        rates = {**ScopedBucketThrottle.THROTTLE_RATES, "auth": "3/min"}
+        with mock.patch.object(ScopedBucketThrottle, "THROTTLE_RATES", rates):
+            statuses = [
+                self.client.post(
+                    REGISTER_URL,
+                    {
+                        "username": f"user{index}",
+                        "email": f"user{index}@test.com",
+                        "password": "testpass",
+                    },
+                ).status_code
+                for index in range(4)
+            ]
+            res = self.client.post(REGISTER_URL, {})
+
+        self.assertEqual(statuses[:3], [status.HTTP_201_CREATED] * 3)
+        self.assertEqual(statuses[3], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
@@ -0,0 +1,374 @@
+"""Token bucket throttles backed by a store shared by all processes.
+
+Every throttle scope ("anon", "user", "search", "booking", "auth") is a
+token bucket per client, sized and refilled from DEFAULT_THROTTLE_RATES:
+"30/day" holds up to 30 tokens and gains one every 48 minutes.
+
+Buckets live in a store shared by the workers (THROTTLE_STORE), so the
+limits hold across them: the database by default, the Django cache when it
+is a shared one (Redis, Memcached), or a local SQLite file. A worker does
+not go to the store for every request: it takes a lease of a tenth of the
+bucket at once and spends it locally, and after a refusal it keeps
+refusing locally until a token may be available again.
+Tokens only leave the store when leased, so workers together never allow
+more than the bucket holds. Leases last THROTTLE_LEASE_SECONDS, then their
+unused tokens go back to the store, with the next store call of the worker
+or at the latest with the sweep it runs once per lease. Refusals are
+repeated locally for at most as long, so returned tokens are noticed
+quickly.
+Most decisions are a dict lookup under a lock, the store sees about one
+round trip per tenth of a bucket. Buckets of fewer than 20 tokens, like
+"10/day", are leased one token at a time, so each allowed request is a
+round trip, at most the bucket size per period and client. No tokens of
+theirs can come back early, so their refusals stay local until the next
+token is due. A bucket that stays locked by other workers lets the
+request through rather than failing it.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils.module_loading import import_string
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+from airport.models import ThrottleBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE = "airport.throttling.DatabaseBucketStore"
+
+
+def refill(tokens, updated_at, capacity, rate, now):
+    """Tokens in the bucket at now, rate is tokens per second"""
+
+    return min(capacity, tokens + max(now - updated_at, 0) * rate)
+
+
+def take_tokens(tokens, capacity, rate, wanted, returned):
+    """Applies one store call to a refilled bucket.
+
+    Returns (tokens left, tokens granted, seconds until the next token).
+    """
+
+    tokens = min(capacity, tokens + returned)
+    granted = min(wanted, int(tokens))
+    tokens -= granted
+    wait = 0.0 if granted else (1 - tokens) / rate
+    return tokens, granted, wait
+
+
+class CacheBucketStore:
+    """Buckets in the default Django cache, shared when the cache is (Redis,
+    Memcached). Updates of a bucket are serialized with a lock taken by
+    cache.add(), which is atomic on every backend."""
+
+    lock_timeout = 2
+    lock_poll = 0.001
+
+    prefix = "token-bucket:"
+
+    def take(self, key, capacity, rate, wanted, returned, now):
+        key = self.prefix + key
+        lock = f"{key}:lock"
+        deadline = time.monotonic() + self.lock_timeout
+        # A holder that died releases the lock when it expires
+        while not cache.add(lock, 1, self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Throttle bucket {key} stays locked")
+            time.sleep(self.lock_poll)
+        try:
+            tokens, updated_at = cache.get(key, (capacity, now))
+            tokens = refill(tokens, updated_at, capacity, rate, now)
+            tokens, granted, wait = take_tokens(
+                tokens, capacity, rate, wanted, returned
+            )
+            # A full bucket is the default, so idle buckets may expire
+            cache.set(key, (tokens, now), (capacity - tokens) / rate + 1)
+        finally:
+            cache.delete(lock)
+        return granted, wait
+
+    def clear(self):
+        cache.clear()
+
+
+class DatabaseBucketStore:
+    """Buckets in the ThrottleBucket table, locked per row while updated.
+
+    The row lock is taken with NOWAIT and retried until lock_timeout, so a
+    hot bucket can not queue up the workers behind it.
+    """
+
+    lock_timeout = 0.1
+    lock_poll = 0.005
+
+    def take(self, key, capacity, rate, wanted, returned, now):
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                return self.take_locked(key, capacity, rate, wanted, returned, now)
+            except OperationalError as error:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"Throttle bucket {key} stays locked: {error}"
+                    ) from error
+                time.sleep(self.lock_poll)
+
+    @staticmethod
+    def take_locked(key, capacity, rate, wanted, returned, now):
+        buckets = ThrottleBucket.objects.select_for_update(nowait=True)
+        with transaction.atomic():
+            bucket = buckets.filter(key=key).first()
+            if bucket is None:
+                try:
+                    with transaction.atomic():
+                        bucket = ThrottleBucket.objects.create(
+                            key=key, tokens=capacity, updated_at=now
+                        )
+                except IntegrityError:
+                    bucket = buckets.get(key=key)
+
+            tokens = refill(bucket.tokens, bucket.updated_at, capacity, rate, now)
+            tokens, granted, wait = take_tokens(
+                tokens, capacity, rate, wanted, returned
+            )
+            ThrottleBucket.objects.filter(id=bucket.id).update(
+                tokens=tokens, updated_at=now
+            )
+        return granted, wait
+
+    def clear(self):
+        ThrottleBucket.objects.all().delete()
+
+
+class FileBucketStore:
+    """Buckets in a SQLite file, for running several local workers without
+    touching the application database"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.THROTTLE_STORE_PATH)
+        self._local = threading.local()
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate, wanted, returned, now):
+        connection = self.connection()
+        # IMMEDIATE takes the write lock up front, so workers never
+        # read the same bucket state
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as error:
+            raise TimeoutError(f"Throttle bucket {key} stays locked: {error}")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM bucket WHERE key = ?", (key,)
+            ).fetchone()
+            tokens = capacity if row is None else refill(*row, capacity, rate, now)
+            tokens, granted, wait = take_tokens(
+                tokens, capacity, rate, wanted, returned
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO bucket (key, tokens, updated_at) "
+                "VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return granted, wait
+
+    def clear(self):
+        self.connection().execute("DELETE FROM bucket")
+
+
+@dataclass
+class Lease:
+    tokens: int = 0
+    expires_at: float = 0.0
+    blocked_until: float = 0.0
+    available_at: float = 0.0
+    # Of the bucket, to give unused tokens back
+    capacity: int = 0
+    rate: float = 0.0
+
+
+class BucketLimiter:
+    """Process-local front of the shared store"""
+
+    def __init__(self, store=None):
+        self._store = store
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._leases = {}
+        self._next_sweep = 0.0
+
+    @property
+    def store(self):
+        if self._store is not None:
+            return self._store
+        path = getattr(settings, "THROTTLE_STORE", DEFAULT_STORE)
+        if path not in self._stores:
+            self._stores[path] = import_string(path)()
+        return self._stores[path]
+
+    @staticmethod
+    def lease_seconds():
+        return getattr(settings, "THROTTLE_LEASE_SECONDS", 1.0)
+
+    @staticmethod
+    def lease_size(capacity):
+        return max(1, capacity // 10)
+
+    def allow(self, key, capacity, rate, now=None):
+        """Spends a token of the bucket, returns (allowed, seconds to wait)"""
+
+        now = time.time() if now is None else now
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None:
+                if lease.tokens and now < lease.expires_at:
+                    lease.tokens -= 1
+                    return True, 0.0
+                if now < lease.blocked_until:
+                    return False, lease.available_at - now
+                returned = lease.tokens
+                lease.tokens = 0
+            else:
+                returned = 0
+            expired = self._take_expired(now)
+            if lease is None and len(self._leases) >= getattr(
+                settings, "THROTTLE_LOCAL_KEYS", 100_000
+            ):
+                self._prune(now)
+
+        self._give_back(expired, now)
+        lease_size = self.lease_size(capacity)
+        try:
+            granted, wait = self.store.take(
+                key, capacity, rate, lease_size, returned, now
+            )
+        except TimeoutError as error:
+            logger.warning("Throttle store unavailable, request allowed: %s", error)
+            return True, 0.0
+        with self._lock:
+            if granted:
+                lease = self._leases.get(key)
+                if lease is not None and lease.tokens and now < lease.expires_at:
+                    # Another thread leased meanwhile, keep both leases
+                    lease.tokens += granted - 1
+                else:
+                    self._leases[key] = Lease(
+                        granted - 1,
+                        now + self.lease_seconds(),
+                        capacity=capacity,
+                        rate=rate,
+                    )
+                return True, 0.0
+            if lease_size > 1:
+                # Other workers may give tokens back before the next refill
+                wait_locally = min(wait, self.lease_seconds())
+            else:
+                wait_locally = wait
+            self._leases[key] = Lease(
+                blocked_until=now + wait_locally,
+                available_at=now + wait,
+                capacity=capacity,
+                rate=rate,
+            )
+            return False, wait
+
+    def _take_expired(self, now):
+        """Unused tokens of expired leases, once per lease period, as
+        (key, capacity, rate, tokens)"""
+
+        if now < self._next_sweep:
+            return []
+        self._next_sweep = now + self.lease_seconds()
+        expired = []
+        for key, lease in self._leases.items():
+            if lease.tokens and now >= lease.expires_at:
+                expired.append((key, lease.capacity, lease.rate, lease.tokens))
+                lease.tokens = 0
+        return expired
+
+    def _give_back(self, expired, now):
+        for key, capacity, rate, tokens in expired:
+            try:
+                self.store.take(key, capacity, rate, 0, tokens, now)
+            except TimeoutError as error:
+                logger.warning("Leased throttle tokens lost: %s", error)
+
+    def _prune(self, now):
+        # Expired leases hold no tokens once swept
+        self._leases = {
+            key: lease
+            for key, lease in self._leases.items()
+            if lease.expires_at > now or lease.blocked_until > now
+        }
+
+    def clear(self):
+        """Forgets local leases, tests also clear the store"""
+
+        with self._lock:
+            self._leases.clear()
+
+
+limiter = BucketLimiter()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle keys and rates, token bucket decisions"""
+
+    limiter = limiter
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = self.limiter.allow(
+            self.key, self.num_requests, self.num_requests / self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonBucketThrottle(AnonRateThrottle, TokenBucketThrottle):
+    pass
+
+
+class UserBucketThrottle(UserRateThrottle, TokenBucketThrottle):
+    pass
+
+
+class ScopedBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    """Limits views with a throttle_scope ("search", "booking", "auth")"""
@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from airport import async_views
 from airport.views import (
     CrewPositionViewSet,
     CrewViewSet,
@@ -7,9 +9,12 @@ from airport.views import (
     RouteViewSet,
     AirplaneViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
     AirplaneTypeViewSet,
     TicketViewSet,
     OrderViewSet,
+    SlowQueryViewSet,
+    ItineraryView,
 )
 
 router = DefaultRouter()
@@ -20,11 +25,38 @@ router.register("route", RouteViewSet)
 router.register("airplane_type", AirplaneTypeViewSet)
 router.register("airplane", AirplaneViewSet)
 router.register("flight", FlightViewSet)
+router.register("flight_schedule", FlightScheduleViewSet)
 router.register("tickets", TicketViewSet)
 router.register("order", OrderViewSet)
+router.register("slow_queries", SlowQueryViewSet)
 
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("itineraries/", ItineraryView.as_view(), name="itineraries"),
+    path("async/flight/", async_views.flight_list, name="async-flight-list"),
+    path(
+        "async/flight/<int:pk>/",
+        async_views.flight_detail,
+        name="async-flight-detail",
+    ),
+    path(
+        "async/flight/<int:pk>/seats/",
+        async_views.flight_seats,
+        name="async-flight-seats",
+    ),
+    path("async/airport/", async_views.airport_list, name="async-airport-list"),
+    path(
+        "async/airport/<int:pk>/",
+        async_views.airport_detail,
+        name="async-airport-detail",
+    ),
+    path("async/route/", async_views.route_list, name="async-route-list"),
+    path(
+        "async/route/<int:pk>/",
+        async_views.route_detail,
+        name="async-route-detail",
+    ),
+]
 
 
 app_name = "airport"
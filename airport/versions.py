@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from airport.models import TableVersion
+
+
+def bump_table_version(name):
+    """Increments the shared version of the table, creating it on first use"""
+
+    now = timezone.now()
+    changes = {"version": F("version") + 1, "updated_at": now}
+    if TableVersion.objects.filter(name=name).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            TableVersion.objects.create(name=name, version=1, updated_at=now)
+    except IntegrityError:
+        TableVersion.objects.filter(name=name).update(**changes)
+
+
+def bump_table_version_on_commit(name):
+    """Bumps the version once the current transaction commits.
+
+    Keeps the version row lock out of long write transactions and makes
+    sure nobody sees the new version before the new data.
+    """
+
+    transaction.on_commit(lambda: bump_table_version(name))
+
+
+def table_versions(names):
+    """Returns {name: version} for the tables, 0 for tables never changed"""
+
+    versions = dict.fromkeys(names, 0)
+    versions.update(
+        TableVersion.objects.filter(name__in=names).values_list("name", "version")
+    )
+    return versions
+
+
+def table_state(names):
+    """Returns ({name: version}, time of the latest change or None) in one query"""
+
+    versions = dict.fromkeys(names, 0)
+    last_modified = None
+    for name, version, updated_at in TableVersion.objects.filter(
+        name__in=names
+    ).values_list("name", "version", "updated_at"):
+        versions[name] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+async def atable_versions(names):
+    """Async table_versions() for views served from the ASGI application"""
+
+    versions = dict.fromkeys(names, 0)
+    async for name, version in TableVersion.objects.filter(
+        name__in=names
+    ).values_list("name", "version"):
+        versions[name] = version
+    return versions
@@ -1,13 +1,31 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from django.db.models import F, Count
+from django.db import transaction
+from django.db.models import F, Count, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
-
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
+
+from airport.booking import hold_seats, occupied_seats, release_holds
+from airport.conditional import ConditionalGetMixin
+from airport.exports import (
+    CSVRenderer,
+    EXPORT_RENDERERS,
+    NDJSONRenderer,
+    export_response,
+)
+from airport.filters import TrigramSearchFilter
+from airport.itineraries import find_itineraries, flight_graph
 from airport.models import (
     CrewPosition,
     Crew,
@@ -16,10 +34,25 @@ from airport.models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightSchedule,
     Ticket,
     Order,
+    SeatHold,
+    SlowQuery,
+)
+from airport.pagination import (
+    FlightCursorPagination,
+    OrderCursorPagination,
+    TicketCursorPagination,
 )
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport.replicas import ReplicaReadMixin
+from airport.schedules import materialize_schedule
+from airport.seat_map import (
+    build_seat_bitmap,
+    build_seat_grid,
+    encode_seat_bitmap,
+)
 from airport.serializers import (
     CrewPositionSerializer,
     CrewSerializer,
@@ -29,21 +62,33 @@ from airport.serializers import (
     AirplaneSerializer,
     FlightSerializer,
     FlightDetailSerializer,
+    FlatFlightSerializer,
+    FlightScheduleSerializer,
+    MaterializeScheduleSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
     TicketSerializer,
     OrderSerializer,
+    SeatHoldSerializer,
+    SlowQuerySerializer,
 )
+from airport.slow_queries import flush as flush_slow_queries
 
 
-class CrewPositionViewSet(viewsets.ModelViewSet):
+class CrewPositionViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = CrewPosition.objects.all()
     serializer_class = CrewPositionSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_crewposition",)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_crew",)
+    filter_backends = (TrigramSearchFilter,)
+    search_fields = ("first_name", "last_name", "position__position")
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -55,28 +100,31 @@ class CrewViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+def filter_airports(queryset, params):
+    name = params.get("name")
+    code = params.get("code")
+    closest_big_city = params.get("closest_big_city")
+
+    if name:
+        queryset = queryset.filter(name__icontains=name)
+    if code:
+        queryset = queryset.filter(code__icontains=code)
+    if closest_big_city:
+        queryset = queryset.filter(closest_big_city__icontains=closest_big_city)
+
+    return queryset
+
+
+class AirportViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_airport",)
+    filter_backends = (TrigramSearchFilter,)
+    search_fields = ("name", "code", "closest_big_city")
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-
-        name = self.request.query_params.get("name")
-        code = self.request.query_params.get("code")
-        closest_big_city = self.request.query_params.get("closest_big_city")
-
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        if code:
-            queryset = queryset.filter(code__icontains=code)
-        if closest_big_city:
-            queryset = queryset.filter(
-                closest_big_city__icontains=closest_big_city
-            )
-
-        return queryset
+        return filter_airports(super().get_queryset(), self.request.query_params)
 
     @extend_schema(
         parameters=[
@@ -103,32 +151,35 @@ class AirportViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+def filter_routes(queryset, params):
+    source = params.get("source")
+    destination = params.get("destination")
+    distance = params.get("distance")
+
+    if source:
+        queryset = queryset.filter(source__name__icontains=source)
+    if destination:
+        queryset = queryset.filter(destination__name__icontains=destination)
+    if distance:
+        try:
+            distance = float(distance)
+            queryset = queryset.filter(distance__gte=distance)
+        except ValueError:
+            pass
+
+    return queryset
+
+
+class RouteViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_route", "airport_airport")
+    filter_backends = (TrigramSearchFilter,)
+    search_fields = ("source__name", "destination__name")
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-
-        source = self.request.query_params.get("source")
-        destination = self.request.query_params.get("destination")
-        distance = self.request.query_params.get("distance")
-
-        if source:
-            queryset = queryset.filter(source__name__icontains=source)
-        if destination:
-            queryset = queryset.filter(
-                destination__name__icontains=destination
-            )
-        if distance:
-            try:
-                distance = float(distance)
-                queryset = queryset.filter(distance__gte=distance)
-            except ValueError:
-                pass
-
-        return queryset
+        return filter_routes(super().get_queryset(), self.request.query_params)
 
     @extend_schema(
         parameters=[
@@ -155,10 +206,13 @@ class RouteViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+class AirplaneTypeViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_airplanetype",)
+    filter_backends = (TrigramSearchFilter,)
+    search_fields = ("brand", "model")
 
     def get_queryset(self):
         brand = self.request.query_params.get("brand")
@@ -171,23 +225,206 @@ class AirplaneTypeViewSet(viewsets.ModelViewSet):
         return queryset.distinct()
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = (
+        "airport_airplane",
+        "airport_airplane_crew",
+        "airport_airplanetype",
+        "airport_crew",
+        "airport_crewposition",
+    )
 
 
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Flight.objects.all()
-        .select_related("airplane", "route")
-        .annotate(
-            tickets_available=(
-                F("airplane__row") * F("airplane__seats_in_row") - Count("tickets")
+def local_day_start(date, tz=None):
+    """Start of the date in tz, by default the timezone active for the request"""
+
+    return timezone.make_aware(
+        datetime.combine(date, time.min), tz or timezone.get_current_timezone()
+    )
+
+
+def requested_timezone(params):
+    """Time zone named by ?tz=, None when the parameter is missing"""
+
+    name = params.get("tz")
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": f'Unknown time zone "{name}".'})
+
+
+def with_available_tickets(queryset):
+    """Annotates flights with seats neither sold nor held right now"""
+
+    return queryset.annotate(
+        tickets_available=(
+            F("capacity")
+            - F("seats_sold")
+            - Coalesce(
+                Subquery(
+                    SeatHold.objects.filter(flight=OuterRef("pk"), expires_at__gt=Now())
+                    .order_by()
+                    .values("flight")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
             )
         )
     )
+
+
+def hold_expiry(aggregate, condition):
+    """Earliest or latest expires_at of the flight's holds matching condition"""
+
+    return Subquery(
+        SeatHold.objects.filter(condition, flight=OuterRef("pk"))
+        .order_by()
+        .values("flight")
+        .annotate(expiry=aggregate("expires_at"))
+        .values("expiry")
+    )
+
+
+def filter_flights(queryset, params):
+    departure_time = params.get("departure_time")
+    arrival_time = params.get("arrival_time")
+    available_tickets = params.get("available_tickets")
+    tz = requested_timezone(params)
+
+    if available_tickets:
+        queryset = queryset.filter(tickets_available__gte=available_tickets)
+
+    # Plain timestamp ranges keep the departure and arrival indexes usable,
+    # a __date lookup would cast every row before comparing
+    if departure_time:
+        start_date = datetime.strptime(departure_time, "%Y-%m-%d").date()
+        queryset = queryset.filter(
+            departure_time__gte=local_day_start(start_date, tz),
+            departure_time__lt=local_day_start(start_date + timedelta(days=1), tz),
+        )
+
+    if arrival_time:
+        date = datetime.strptime(arrival_time, "%Y-%m-%d").date()
+        queryset = queryset.filter(arrival_time__gte=local_day_start(date, tz))
+
+    return queryset
+
+
+FLIGHT_LIST_PARAMETERS = [
+    OpenApiParameter(
+        "departure_time",
+        type=OpenApiTypes.DATE,
+        description=f"Filter by departure date "
+                    f"(ex. ?departure_time=2023-08-01)",
+    ),
+    OpenApiParameter(
+        "arrival_time",
+        type=OpenApiTypes.DATE,
+        description=f"Filter by arrival date"
+                    f" (ex. ?arrival_time=2023-08-02)",
+    ),
+    OpenApiParameter(
+        "available_tickets",
+        type=OpenApiTypes.INT,
+        description=f"Filter by available tickets "
+                    f"is greater or equal (ex. ?available_tickets=10)",
+    ),
+    OpenApiParameter(
+        "tz",
+        type=OpenApiTypes.STR,
+        description="IANA time zone of the departure and arrival dates, "
+                    "the server time zone by default (ex. ?tz=Europe/Kyiv)",
+    ),
+]
+
+
+FLIGHT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("source", "route__source__code"),
+    ("destination", "route__destination__code"),
+    ("route", "route_id"),
+    ("airplane", "airplane_id"),
+    ("departure_time", "departure_time"),
+    ("arrival_time", "arrival_time"),
+    ("capacity", "capacity"),
+    ("seats_sold", "seats_sold"),
+    ("available_tickets", "tickets_available"),
+)
+
+
+class FlightViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = with_available_tickets(
+        Flight.objects.all().select_related("airplane", "route")
+    )
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "search"
+    version_tables = (
+        "airport_flight",
+        "airport_route",
+        "airport_airport",
+        "airport_airplane",
+        "airport_airplane_crew",
+        "airport_airplanetype",
+        "airport_crew",
+        "airport_crewposition",
+        "airport_ticket",
+        "airport_seathold",
+    )
+    # Every booking and hold bumps these, so apart from the seat map the
+    # ETag carries the available tickets of the returned flights instead
+    seat_tables = ("airport_ticket", "airport_seathold")
+    conditional_actions = ("list", "flat", "retrieve", "seats")
+    pagination_class = FlightCursorPagination
+
+    def get_etag_tables(self):
+        if self.action == "seats":
+            return self.version_tables
+        return tuple(
+            name for name in self.version_tables if name not in self.seat_tables
+        )
+
+    def requested_flights(self):
+        """Available tickets of the flights the action returns and the next
+        and last expiry of their holds, which expire without writes"""
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .annotate(
+                next_expiry=hold_expiry(Min, Q(expires_at__gt=Now())),
+                last_expiry=hold_expiry(Max, Q(expires_at__lte=Now())),
+            )
+            .values(
+                "id",
+                "departure_time",
+                "tickets_available",
+                "next_expiry",
+                "last_expiry",
+            )
+        )
+        if "pk" in self.kwargs:
+            return list(rows.filter(pk=self.kwargs["pk"]))
+        return self.paginate_queryset(rows)
+
+    def get_extra_validators(self, request):
+        if "pk" in self.kwargs and not str(self.kwargs["pk"]).isdigit():
+            return [], None
+        rows = self.requested_flights()
+        parts = [f"{row['id']}:{row['tickets_available']}" for row in rows]
+        next_expiry = min(
+            (row["next_expiry"] for row in rows if row["next_expiry"]), default=None
+        )
+        if next_expiry:
+            parts.append(str(int(next_expiry.timestamp())))
+        last_expiry = max(
+            (row["last_expiry"] for row in rows if row["last_expiry"]), default=None
+        )
+        return parts, last_expiry
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -204,61 +441,202 @@ class FlightViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
 
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
-        available_tickets = self.request.query_params.get("available_tickets")
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("airplane__crew")
 
-        if available_tickets:
-            queryset = queryset.filter(tickets_available__gte=available_tickets)
+        return filter_flights(queryset, self.request.query_params)
 
-        if departure_time:
-            start_date = datetime.strptime(departure_time, "%Y-%m-%d").date()
-            end_date = start_date + timedelta(days=1)
-            queryset = queryset.filter(
-                departure_time__date__gte=start_date,
-                departure_time__date__lt=end_date
-            )
+    @extend_schema(parameters=FLIGHT_LIST_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-        if arrival_time:
-            date = datetime.strptime(arrival_time, "%Y-%m-%d").date()
-            queryset = queryset.filter(arrival_time__date__gte=date)
+    @extend_schema(
+        parameters=FLIGHT_LIST_PARAMETERS, responses=FlightSerializer(many=True)
+    )
+    @action(methods=["GET"], detail=False, url_path="flat")
+    def flat(self, request):
+        """Same output as the flight list, built from plain rows for large pages"""
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *FlatFlightSerializer.values
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(FlatFlightSerializer(page).data)
 
-        return queryset
+    @extend_schema(
+        parameters=FLIGHT_LIST_PARAMETERS,
+        responses={
+            (200, NDJSONRenderer.media_type): OpenApiTypes.OBJECT,
+            (200, CSVRenderer.media_type): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """Every flight matching the filters, streamed as NDJSON or CSV
+        (?format=ndjson|csv)"""
+        queryset = self.filter_queryset(self.get_queryset()).order_by("id")
+        return export_response(request, queryset, FLIGHT_EXPORT_COLUMNS, "flights")
 
     @extend_schema(
         parameters=[
             OpenApiParameter(
-                "departure_time",
-                type=OpenApiTypes.DATE,
-                description=f"Filter by departure date "
-                            f"(ex. ?departure_time=2023-08-01)",
-            ),
-            OpenApiParameter(
-                "arrival_time",
-                type=OpenApiTypes.DATE,
-                description=f"Filter by arrival date"
-                            f" (ex. ?arrival_time=2023-08-02)",
-            ),
-            OpenApiParameter(
-                "available_tickets",
-                type=OpenApiTypes.INT,
-                description=f"Filter by available tickets "
-                            f"is greater or equal (ex. ?available_tickets=10)",
+                "mode",
+                type=OpenApiTypes.STR,
+                description="Seat map encoding: bitmap (default) or grid "
+                            "(ex. ?mode=grid)",
             ),
         ]
     )
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Sold and held seats of the flight, one bit per seat in row-major order"""
+        flight = get_object_or_404(
+            Flight.objects.select_related("airplane"), pk=pk
+        )
+        rows = flight.airplane.row
+        seats_in_row = flight.airplane.seats_in_row
+        occupied = occupied_seats(flight.id)
+
+        data = {
+            "flight": flight.id,
+            "rows": rows,
+            "seats_in_row": seats_in_row,
+        }
+        if request.query_params.get("mode") == "grid":
+            data["seats"] = build_seat_grid(rows, seats_in_row, occupied)
+        else:
+            data["encoding"] = "base64"
+            data["bitmap"] = encode_seat_bitmap(
+                build_seat_bitmap(rows, seats_in_row, occupied)
+            )
+        return Response(data)
+
+    @extend_schema(request=SeatHoldSerializer, responses=SeatHoldSerializer)
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="hold",
+        permission_classes=(IsAuthenticated,),
+        throttle_scope="booking",
+    )
+    def hold(self, request, pk=None):
+        """Hold seats of the flight for the current user until checkout"""
+        flight = get_object_or_404(
+            Flight.objects.select_related("airplane"), pk=pk
+        )
+
+        if request.method == "DELETE":
+            release_holds(request.user, flight)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = SeatHoldSerializer(
+            data=request.data, context={"flight": flight}
+        )
+        serializer.is_valid(raise_exception=True)
+        seats = serializer.validated_data["seats"]
+        expires_at = hold_seats(
+            request.user, flight, [(seat["row"], seat["seat"]) for seat in seats]
+        )
+        return Response(
+            SeatHoldSerializer({"seats": seats, "expires_at": expires_at}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class FlightScheduleViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
+    queryset = FlightSchedule.objects.all()
+    serializer_class = FlightScheduleSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    version_tables = ("airport_flightschedule",)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            schedule = serializer.save()
+            materialize_schedule(schedule)
 
+    def perform_update(self, serializer):
+        """Regenerates upcoming flights only, past ones stay as they flew"""
+        with transaction.atomic():
+            schedule = serializer.save()
+            materialize_schedule(schedule, start=timezone.localdate())
 
-class TicketViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        request=MaterializeScheduleSerializer, responses=MaterializeScheduleSerializer
+    )
+    @action(methods=["POST"], detail=True, url_path="materialize")
+    def materialize(self, request, pk=None):
+        """Regenerate the flights of the schedule between start and end
+        (both optional, whole schedule by default). Flights with sold
+        tickets are kept as they are."""
+        schedule = self.get_object()
+        serializer = MaterializeScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = materialize_schedule(schedule, **serializer.validated_data)
+        return Response(MaterializeScheduleSerializer(result).data)
+
+
+TICKET_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("order", "order_id"),
+    ("order_number", "order__order_number"),
+    ("created_at", "order__created_at"),
+    ("user", "order__user_id"),
+    ("email", "order__user__email"),
+    ("flight", "flight_id"),
+    ("row", "row"),
+    ("seat", "seat"),
+)
+
+
+class TicketViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     permission_classes = (IsAuthenticated,)
+    version_tables = ("airport_ticket", "airport_order")
+    user_scoped = True
+    pagination_class = TicketCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        return Ticket.objects.filter(order__user=user)
+        return Ticket.objects.filter(order__user=user).annotate(
+            created_at=F("order__created_at")
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "flight",
+                type=OpenApiTypes.INT,
+                description="Only tickets of the flight (ex. ?flight=1)",
+            ),
+        ],
+        responses={
+            (200, NDJSONRenderer.media_type): OpenApiTypes.OBJECT,
+            (200, CSVRenderer.media_type): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=(IsAdminUser,),
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """Tickets of all users, streamed as NDJSON or CSV (?format=ndjson|csv)"""
+        queryset = Ticket.objects.order_by("id")
+        flight = request.query_params.get("flight")
+        if flight:
+            if not flight.isdigit():
+                raise ValidationError({"flight": "A valid integer is required."})
+            queryset = queryset.filter(flight_id=flight)
+        return export_response(request, queryset, TICKET_EXPORT_COLUMNS, "tickets")
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -268,13 +646,96 @@ class TicketViewSet(viewsets.ModelViewSet):
         ticket.order.save()
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    throttle_scope = "booking"
+    version_tables = ("airport_order", "airport_ticket")
+    user_scoped = True
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         return Order.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class SlowQueryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Slowest queries by total time, recorded when SLOW_QUERY_LOG is on"""
+
+    queryset = SlowQuery.objects.all()
+    serializer_class = SlowQuerySerializer
+    permission_classes = (IsAdminUser,)
+
+    def list(self, request, *args, **kwargs):
+        flush_slow_queries()
+        return super().list(request, *args, **kwargs)
+
+
+class ItineraryView(APIView):
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    throttle_scope = "search"
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Source airport code (ex. ?from=KBP)",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Destination airport code (ex. ?to=JFK)",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description="Departure date of the first leg (ex. ?date=2023-08-01)",
+            ),
+            OpenApiParameter(
+                "min_connection",
+                type=OpenApiTypes.INT,
+                description="Minimum connection time in minutes (default 45)",
+            ),
+            OpenApiParameter(
+                "max_connection",
+                type=OpenApiTypes.INT,
+                description="Maximum connection time in minutes (default 1440)",
+            ),
+            OpenApiParameter(
+                "max_legs",
+                type=OpenApiTypes.INT,
+                description="Maximum number of flights (default 3)",
+            ),
+        ],
+        responses=ItinerarySerializer(many=True),
+    )
+    def get(self, request):
+        """Connecting flights between two airports ordered by arrival time"""
+        params = request.query_params.dict()
+        params["source"] = params.pop("from", None)
+        params["destination"] = params.pop("to", None)
+        search = ItinerarySearchSerializer(data=params)
+        search.is_valid(raise_exception=True)
+        data = search.validated_data
+
+        itineraries = find_itineraries(
+            data["source"].id,
+            data["destination"].id,
+            data["date"],
+            min_connection=timedelta(minutes=data["min_connection"]),
+            max_connection=timedelta(minutes=data["max_connection"]),
+            max_legs=data["max_legs"],
+            limit=data["limit"],
+        )
+        _, airport_codes = flight_graph.airports()
+        serializer = ItinerarySerializer(
+            itineraries, many=True, context={"airport_codes": airport_codes}
+        )
+        return Response(serializer.data)
@@ -2,6 +2,8 @@
 ASGI config for airport_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by an ASGI server, the async endpoints under /api/airport/async/ run
+on the event loop instead of occupying a worker thread per request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -14,3 +16,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_api.settings")
 
 application = get_asgi_application()
+
+from airport.reference_cache import warm_on_start  # noqa: E402
+
+warm_on_start()
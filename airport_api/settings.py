@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework_simplejwt",
     "drf_spectacular",
     "rest_framework",
@@ -51,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "airport.metrics.MetricsMiddleware",
+    "airport.replicas.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,9 +95,38 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
         "PORT": os.environ.get("POSTGRES_PORT"),
+        # Persistent connections, checked before their first use by a request
+        "CONN_MAX_AGE": int(os.environ.get("POSTGRES_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Read replicas of POSTGRES_DB, comma-separated host[:port] values. Tests
+# read them through the primary (TEST MIRROR)
+DATABASE_REPLICAS = []
+for index, address in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1
+):
+    host, _, port = address.strip().partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["airport.replicas.ReplicaRouter"]
+
+# Cache shared by the workers at REDIS_URL, otherwise one per process. Read
+# replicas require a shared one, manage.py check fails without it
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -145,12 +177,19 @@ AUTH_USER_MODEL = "user.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.AnonBucketThrottle",
+        "airport.throttling.UserBucketThrottle",
+        "airport.throttling.ScopedBucketThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "30/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/day",
+        "user": "30/day",
+        "search": "60/min",
+        "booking": "20/min",
+        "auth": "10/min",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -172,3 +211,87 @@ SPECTACULAR_SETTINGS = {
         "defaultModelExpandDepth": 2,
     },
 }
+
+# Lock used to serialize ticket bookings per flight: "row" or "advisory"
+BOOKING_LOCK_STRATEGY = os.environ.get("BOOKING_LOCK_STRATEGY", "row")
+
+# How long seats stay held for a user while the order is being completed
+SEAT_HOLD_TTL = timedelta(
+    minutes=int(os.environ.get("SEAT_HOLD_TTL_MINUTES", 10))
+)
+
+# Key of the order number permutation, must not change once orders exist
+ORDER_NUMBER_KEY = os.environ.get("ORDER_NUMBER_KEY", "airport-order-number")
+
+# Seconds a worker keeps a day of departures for the itinerary search
+ITINERARY_CACHE_TTL = int(os.environ.get("ITINERARY_CACHE_TTL", 60))
+
+# Seconds between checks of reference table versions changed by other workers
+REFERENCE_CACHE_CHECK_INTERVAL = float(
+    os.environ.get("REFERENCE_CACHE_CHECK_INTERVAL", 1)
+)
+REFERENCE_CACHE_WARM_ON_START = (
+    os.environ.get("REFERENCE_CACHE_WARM_ON_START", "false").lower() == "true"
+)
+
+# Longest time an async seat map request waits for the map to change,
+# and how often it checks meanwhile (seconds). Each waiting request runs
+# one query per interval.
+SEAT_MAP_LONG_POLL_TIMEOUT = float(os.environ.get("SEAT_MAP_LONG_POLL_TIMEOUT", 30))
+SEAT_MAP_POLL_INTERVAL = float(os.environ.get("SEAT_MAP_POLL_INTERVAL", 0.5))
+
+# OpenAPI schema written by build_openapi_schema and served by /api/schema/
+OPENAPI_SCHEMA_FILE = os.environ.get(
+    "OPENAPI_SCHEMA_FILE", BASE_DIR / "openapi-schema.json"
+)
+
+# Rows fetched per round trip by the streaming export endpoints
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+# Flights written per bulk insert when a recurring schedule is materialized
+SCHEDULE_BATCH_SIZE = int(os.environ.get("SCHEDULE_BATCH_SIZE", 1000))
+
+# Shared store of the throttle token buckets: DatabaseBucketStore,
+# CacheBucketStore (needs a cache shared by the workers), or FileBucketStore
+# with THROTTLE_STORE_PATH for local multi-worker runs
+THROTTLE_STORE = os.environ.get(
+    "THROTTLE_STORE", "airport.throttling.DatabaseBucketStore"
+)
+THROTTLE_STORE_PATH = os.environ.get(
+    "THROTTLE_STORE_PATH", BASE_DIR / "throttle-buckets.sqlite3"
+)
+# Seconds a worker spends leased tokens and repeats refusals on its own
+THROTTLE_LEASE_SECONDS = float(os.environ.get("THROTTLE_LEASE_SECONDS", 1))
+
+# Seconds the permission flags of a user are cached for JWT authentication,
+# and whether to read them from the token claims instead
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", 60))
+AUTH_TRUST_TOKEN_CLAIMS = (
+    os.environ.get("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+)
+
+# Directory where every worker writes its request metrics for /metrics to
+# add up (only the serving worker is reported when unset), how often the
+# workers write them (seconds), and the bearer token that lets scrapers
+# other than staff users read /metrics, or METRICS_PUBLIC to open it to all
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "false").lower() == "true"
+
+# Log queries slower than SLOW_QUERY_THRESHOLD_MS (milliseconds) to the
+# SlowQuery table, with an EXPLAIN plan taken at most every
+# SLOW_QUERY_EXPLAIN_INTERVAL seconds per statement and worker
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 200))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", 300))
+
+# Seconds a user reads from the primary after a request that wrote, to
+# see their own changes despite replica lag, and seconds a worker skips a
+# replica it could not connect to
+REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", 5))
+REPLICA_RETRY_SECONDS = float(os.environ.get("REPLICA_RETRY_SECONDS", 30))
+
+# Months after the current one that get flight partitions on PostgreSQL,
+# by migration 0020 and by each run of create_flight_partitions
+FLIGHT_PARTITION_MONTHS_AHEAD = int(os.environ.get("FLIGHT_PARTITION_MONTHS_AHEAD", 3))
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_api.settings")
 
 application = get_wsgi_application()
+
+from airport.reference_cache import warm_on_start  # noqa: E402
+
+warm_on_start()
@@ -0,0 +1,151 @@
+"""JWT authentication that resolves the user without a query per request.
+
+Permissions only need is_active, is_staff and is_superuser, so those are
+kept in the cache for AUTH_USER_CACHE_TTL seconds and request.user is a
+User with every other field deferred: reading one of them loads it, and
+saving the instance only writes the fields that were loaded. Saving or
+deleting a user drops its entry, which reaches the other workers too when
+the cache is shared, and otherwise within the TTL.
+
+With AUTH_TRUST_TOKEN_CLAIMS the flags are read from the claims of the
+access token and the cache is not consulted either. Only access tokens
+carry them (see UserFlagsRefreshToken): they are read from the database
+whenever one is issued, at login and on refresh, so changes to a user
+apply within ACCESS_TOKEN_LIFETIME.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+USER_FLAGS = ("is_active", "is_staff", "is_superuser")
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def cache_ttl():
+    return getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+
+
+def trusted_claims():
+    return getattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", False)
+
+
+def user_lookup(user_id):
+    return {api_settings.USER_ID_FIELD: user_id}
+
+
+def build_user(pk, flags):
+    """User instance with only the id and the flags loaded"""
+
+    User = get_user_model()
+    loaded = {"id": pk, **dict(zip(USER_FLAGS, flags))}
+    # from_db() takes the values in the order of the model fields
+    names = [
+        field.attname for field in User._meta.concrete_fields if field.attname in loaded
+    ]
+    return User.from_db(User.objects.db, names, [loaded[name] for name in names])
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def cached_user(user_id):
+    """Returns the user with the given token id, or None when there is none"""
+
+    key = user_cache_key(user_id)
+    row = cache.get(key)
+    if row is None:
+        row = (
+            get_user_model()
+            .objects.filter(**user_lookup(user_id))
+            .values_list("id", *USER_FLAGS)
+            .first()
+        )
+        if row is None:
+            return None
+        cache.set(key, row, cache_ttl())
+    return build_user(row[0], row[1:])
+
+
+async def acached_user(user_id):
+    """Async cached_user() for the views served from the ASGI application"""
+
+    key = user_cache_key(user_id)
+    row = await cache.aget(key)
+    if row is None:
+        row = (
+            await get_user_model()
+            .objects.filter(**user_lookup(user_id))
+            .values_list("id", *USER_FLAGS)
+            .afirst()
+        )
+        if row is None:
+            return None
+        await cache.aset(key, row, cache_ttl())
+    return build_user(row[0], row[1:])
+
+
+class UserFlagsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the current flags of the user"""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        flags = (
+            get_user_model()
+            .objects.filter(**user_lookup(self[api_settings.USER_ID_CLAIM]))
+            .values_list(*USER_FLAGS)
+            .first()
+        )
+        if flags is not None:
+            for flag, value in zip(USER_FLAGS, flags):
+                access[flag] = value
+        return access
+
+
+def claimed_user(validated_token):
+    """User built from the token claims, None when the token has none"""
+
+    if not trusted_claims() or api_settings.USER_ID_FIELD != "id":
+        return None
+    try:
+        flags = [validated_token[flag] for flag in USER_FLAGS]
+    except KeyError:
+        return None
+    return build_user(validated_token[api_settings.USER_ID_CLAIM], flags)
+
+
+def token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def check_active(user):
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = token_user_id(validated_token)
+        user = claimed_user(validated_token) or cached_user(user_id)
+        return check_active(user)
+
+    async def aget_user(self, validated_token):
+        user_id = token_user_id(validated_token)
+        user = claimed_user(validated_token) or await acached_user(user_id)
+        return check_active(user)
@@ -1,8 +1,14 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 
 from django.utils.translation import gettext as _
 
+from user.authentication import UserFlagsRefreshToken
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -60,3 +66,16 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class AuthTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the permission flags of the user to the access token, read by
+    CachedJWTAuthentication when AUTH_TRUST_TOKEN_CLAIMS is on"""
+
+    token_class = UserFlagsRefreshToken
+
+
+class AuthTokenRefreshSerializer(TokenRefreshSerializer):
+    """Issues access tokens with the flags the user has now"""
+
+    token_class = UserFlagsRefreshToken
@@ -1,3 +1,109 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-# Create your tests here.
+AIRPORT_URL = reverse("airport:airport-list")
+TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def user_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method)(url, data, format="json")
+        user_table = get_user_model()._meta.db_table
+        return res, [query for query in queries if user_table in query["sql"]]
+
+    def test_user_is_loaded_once_per_ttl(self):
+        self.authorize(AccessToken.for_user(self.user))
+
+        res, queries = self.user_queries("get", AIRPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+        res, queries = self.user_queries("get", AIRPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    def test_admin_permission_is_decided_from_the_cache(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.authorize(AccessToken.for_user(self.user))
+        self.client.get(AIRPORT_URL)
+
+        res, queries = self.user_queries(
+            "post",
+            AIRPORT_URL,
+            {"name": "Boryspil", "code": "KBP", "closest_big_city": "Kyiv"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(queries, [])
+
+    def test_saving_the_user_drops_the_cached_flags(self):
+        self.authorize(AccessToken.for_user(self.user))
+        self.client.get(AIRPORT_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_fields_load_on_access(self):
+        self.authorize(AccessToken.for_user(self.user))
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "test@test.com")
+
+    @override_settings(AUTH_TRUST_TOKEN_CLAIMS=True)
+    def test_trusted_claims_skip_the_user_lookup(self):
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "testpass"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.authorize(res.data["access"])
+
+        res, queries = self.user_queries("get", AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    @override_settings(AUTH_TRUST_TOKEN_CLAIMS=True)
+    def test_refreshed_token_carries_the_current_flags(self):
+        self.user.is_staff = True
+        self.user.save()
+        tokens = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "testpass"}
+        ).data
+        self.assertNotIn("is_staff", RefreshToken(tokens["refresh"]))
+
+        self.user.is_staff = False
+        self.user.save()
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]})
+        self.authorize(res.data["access"])
+        res = self.client.post(
+            AIRPORT_URL, {"name": "Boryspil", "code": "KBP", "closest_big_city": "Kyiv"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
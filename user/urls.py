@@ -1,10 +1,11 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from user.views import (
     CreateUserView,
     ManageUserView,
     LogOutView,
+    TokenObtainPairView,
+    TokenRefreshView,
 )
 
 urlpatterns = [
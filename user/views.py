@@ -1,3 +1,4 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
@@ -7,13 +8,29 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
 from rest_framework.views import APIView
+from rest_framework_simplejwt import views as jwt_views
 
-from user.serializers import UserSerializer
+from user.serializers import (
+    AuthTokenObtainPairSerializer,
+    AuthTokenRefreshSerializer,
+    UserSerializer,
+)
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
+    throttle_scope = "auth"
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    serializer_class = AuthTokenObtainPairSerializer
+    throttle_scope = "auth"
+
+
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    serializer_class = AuthTokenRefreshSerializer
+    throttle_scope = "auth"
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -21,7 +38,8 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user only has the fields permissions need loaded
+        return get_user_model().objects.get(pk=self.request.user.pk)
 
 
 class LogOutView(APIView):